@@ -52,6 +52,16 @@ class Menu(NamedTuple):
 	key:Union[Name, Sigil, None]
 	fields:list
 	
+class Measure(NamedTuple):
+	margin:Marginalia
+	key:Union[Name, Sigil, None]
+	fields:list # Each one's shape is a Reading.
+
+class Reading(NamedTuple):
+	measure:Union[Name, None] # None means the values given to `incr` without naming a measure.
+	statistic:Name
+	margin:Marginalia
+
 class Tree(NamedTuple):
 	margin:Marginalia
 	key:Union[Name, Sigil, None]
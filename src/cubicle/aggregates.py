@@ -0,0 +1,260 @@
+"""
+Cells that remember more than a sum.
+
+Ordinarily a canvas cell is a plain number: `incr` adds to it and that's that.
+Beneath a `:measure` in the layout, a cell instead keeps a `Tally`: for each
+measure fed into it, whichever accumulators the layout needs in order to show
+the statistics its fields name. That way a single pass over the data can fill
+in counts, totals, extremes, distinct counts, and percentiles side by side.
+
+Every kind of accumulator merges with `+`. That's how tallies survive folding
+into "other" and bulk ingestion, and it's also how subtotals of statistics that
+don't add up (everything but counts and sums) get worked out: not by a formula,
+but by merging the accumulators of all the cells the subtotal covers.
+"""
+
+import hashlib, math, re
+from typing import Optional
+
+class Accumulator:
+	"""
+	Abstract base for the kinds of accumulator. Each kind supplies some statistics,
+	takes values one at a time with `.add(value)`, and merges with `+` into a new one
+	(leaving both operands alone). A fresh instance must read as if nothing were seen.
+	"""
+	STATISTICS = ()
+	
+	@classmethod
+	def reads(cls, statistic:str) -> bool:
+		return statistic in cls.STATISTICS
+	
+	def add(self, value): raise NotImplementedError(type(self))
+	def __add__(self, other): raise NotImplementedError(type(self))
+	def read(self, statistic:str): raise NotImplementedError(type(self))
+
+
+class Moments(Accumulator):
+	""" The small fixed vector [count, sum, min, max], from which also the mean. """
+	__slots__ = ['acc']
+	STATISTICS = ('count', 'sum', 'min', 'max', 'mean')
+
+	def __init__(self):
+		self.acc = [0, 0, None, None]
+
+	def add(self, value):
+		acc = self.acc
+		if acc[0]:
+			acc[0] += 1
+			acc[1] += value
+			if value < acc[2]: acc[2] = value
+			if value > acc[3]: acc[3] = value
+		else: self.acc = [1, value, value, value]
+
+	def __add__(self, other:"Moments") -> "Moments":
+		merged = Moments()
+		if not other.acc[0]: merged.acc = list(self.acc)
+		elif not self.acc[0]: merged.acc = list(other.acc)
+		else:
+			(n, s, lo, hi), (m, t, low, high) = self.acc, other.acc
+			merged.acc = [n+m, s+t, min(lo, low), max(hi, high)]
+		return merged
+
+	def read(self, statistic:str):
+		count, total, low, high = self.acc
+		if statistic == 'count': return count
+		if not count: return None
+		if statistic == 'sum': return total
+		if statistic == 'min': return low
+		if statistic == 'max': return high
+		if statistic == 'mean': return total / count
+		raise KeyError(statistic)
+
+
+def _hash64(value) -> int:
+	"""
+	Python's own `hash` is salted per process, which would spoil merging sketches made elsewhere.
+	So identifiers get a proper digest of their text (or `repr`, for things other than text).
+	"""
+	if isinstance(value, str): data = value.encode('utf-8')
+	elif isinstance(value, bytes): data = value
+	else: data = repr(value).encode('utf-8')
+	return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+class HyperLogLog(Accumulator):
+	"""
+	Approximate count of distinct values. Standard error is about 1.04/sqrt(2**PRECISION),
+	or 1.6% as given, in 2**PRECISION bytes of registers no matter how many values arrive.
+	Until there are more than EXACT_LIMIT distinct values, it just keeps their hashes and
+	the count is exact: most cells of most reports are small, and registers would be waste.
+	"""
+	__slots__ = ['exact', 'registers']
+	STATISTICS = ('distinct',)
+	PRECISION = 12
+	EXACT_LIMIT = 64
+
+	def __init__(self):
+		self.exact = set()
+		self.registers = None
+
+	def add(self, value):
+		code = _hash64(value)
+		if self.registers is None:
+			self.exact.add(code)
+			if len(self.exact) > self.EXACT_LIMIT: self.__densify()
+		else: self.__observe(code)
+
+	def __observe(self, code:int):
+		width = 64 - self.PRECISION
+		index, rest = code >> width, code & ((1 << width) - 1)
+		rank = width - rest.bit_length() + 1
+		if rank > self.registers[index]: self.registers[index] = rank
+
+	def __densify(self):
+		self.registers = bytearray(1 << self.PRECISION)
+		for code in self.exact: self.__observe(code)
+		self.exact = set()
+
+	def __add__(self, other:"HyperLogLog") -> "HyperLogLog":
+		merged = HyperLogLog()
+		if self.registers is None and other.registers is None:
+			merged.exact = self.exact | other.exact
+			if len(merged.exact) > self.EXACT_LIMIT: merged.__densify()
+			return merged
+		merged.registers = bytearray(1 << self.PRECISION)
+		for sketch in (self, other):
+			if sketch.registers is None:
+				for code in sketch.exact: merged.__observe(code)
+			else: merged.registers = bytearray(map(max, merged.registers, sketch.registers))
+		return merged
+
+	def estimate(self) -> int:
+		if self.registers is None: return len(self.exact)
+		m = len(self.registers)
+		raw = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+		zeros = self.registers.count(0)
+		if raw <= 2.5 * m and zeros: raw = m * math.log(m / zeros) # Linear counting does better at the low end.
+		return round(raw)
+
+	def read(self, statistic:str):
+		if statistic == 'distinct': return self.estimate()
+		raise KeyError(statistic)
+
+
+class QuantileSketch(Accumulator):
+	"""
+	Approximate quantiles in bounded memory, after Karnin, Lang, and Liberty ("KLL").
+	Items at level h stand for 2**h of the originals. When a level fills up, it gets
+	sorted and every other item goes up a level, so the whole thing stays at about 3*K
+	items however many values arrive. Rank error is around 1.7/K, so 1% or so as given.
+	Until the first compaction, it's exact.
+	
+	The statistics are `median` and the percentiles `p95`, `p99`, and so forth,
+	with an underscore for a decimal point: `p99_9`. They read by nearest rank.
+	"""
+	__slots__ = ['levels', 'size', 'coin']
+	K = 200
+	PERCENTILE = re.compile(r'p(\d+)(?:_(\d+))?$')
+	
+	def __init__(self):
+		self.levels = [[]]
+		self.size = 0
+		self.coin = 0 # Alternates which half of a level goes up; random would do, but this is repeatable.
+	
+	@classmethod
+	def reads(cls, statistic:str) -> bool:
+		return cls.fraction(statistic) is not None
+	
+	@classmethod
+	def fraction(cls, statistic:str) -> Optional[float]:
+		if statistic == 'median': return 0.5
+		match = cls.PERCENTILE.match(statistic)
+		if match:
+			it = float(match.group(1) + '.' + (match.group(2) or '0')) / 100
+			if it <= 1: return it
+	
+	def __capacity(self, level:int) -> int:
+		return max(2, int(self.K * (2/3) ** (len(self.levels) - 1 - level)))
+	
+	def add(self, value):
+		self.levels[0].append(value)
+		self.size += 1
+		if len(self.levels[0]) >= self.__capacity(0): self.__compress()
+	
+	def __compress(self):
+		""" Compact the lowest level that's over capacity, and so on until all fit. """
+		while True:
+			for h, level in enumerate(self.levels):
+				if len(level) >= self.__capacity(h): break
+			else: return
+			if h + 1 == len(self.levels): self.levels.append([])
+			level.sort()
+			keep = [level.pop()] if len(level) % 2 else []
+			self.coin ^= 1
+			self.levels[h+1].extend(level[self.coin::2])
+			self.levels[h] = keep
+	
+	def __add__(self, other:"QuantileSketch") -> "QuantileSketch":
+		merged = QuantileSketch()
+		height = max(len(self.levels), len(other.levels))
+		merged.levels = [[] for _ in range(height)]
+		for sketch in (self, other):
+			for h, level in enumerate(sketch.levels): merged.levels[h].extend(level)
+		merged.size = self.size + other.size
+		merged.coin = self.coin ^ other.coin
+		merged.__compress()
+		return merged
+	
+	def quantile(self, fraction:float):
+		weighted = sorted((item, 1 << h) for h, level in enumerate(self.levels) for item in level)
+		if not weighted: return None
+		goal, seen = fraction * self.size, 0 # Compaction conserves the total weight.
+		for item, weight in weighted:
+			seen += weight
+			if seen >= goal: return item
+		return weighted[-1][0]
+	
+	def read(self, statistic:str):
+		fraction = self.fraction(statistic)
+		if fraction is None: raise KeyError(statistic)
+		return self.quantile(fraction)
+
+
+KINDS = (Moments, HyperLogLog, QuantileSketch)
+ADDITIVE = frozenset(['count', 'sum']) # A spreadsheet SUM gives the right subtotal of these.
+
+def kind_of(statistic:str) -> Optional[type]:
+	""" Which sort of accumulator can supply a given statistic, if any. """
+	for kind in KINDS:
+		if kind.reads(statistic): return kind
+
+
+class Tally:
+	""" The accumulators of one cell, keyed by measure and kind. The anonymous measure is `None`. """
+	__slots__ = ['parts']
+
+	def __init__(self):
+		self.parts = {}
+
+	def add(self, measure:Optional[str], value, kinds=(Moments,)):
+		for kind in kinds:
+			try: part = self.parts[measure, kind]
+			except KeyError: part = self.parts[measure, kind] = kind()
+			part.add(value)
+
+	def __add__(self, other:"Tally") -> "Tally":
+		merged = Tally()
+		merged.parts.update(self.parts)
+		for key, part in other.parts.items():
+			merged.parts[key] = merged.parts[key] + part if key in merged.parts else part
+		return merged
+
+	def part(self, measure:Optional[str], kind:type):
+		return self.parts.get((measure, kind))
+
+	def read(self, measure:Optional[str], statistic:str):
+		""" A measure never fed reads as it would from an empty accumulator. """
+		kind = kind_of(statistic)
+		part = self.parts.get((measure, kind))
+		return (kind() if part is None else part).read(statistic)
+
+	def __repr__(self): return 'Tally(%r)' % self.parts
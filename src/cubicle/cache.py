@@ -0,0 +1,175 @@
+"""
+Skipping the plot when a report would come out the same as last time.
+
+A `WorkbookCache` names each workbook by a digest of everything that goes into it:
+the compiled module, the canvas name, the environment's `fingerprint`, the plotting
+options, and the data, meaning the layout trees and the cells. If a workbook with that
+digest is already in the cache directory, it gets copied to where you wanted it, and
+nothing is plotted. Otherwise, the workbook is plotted and then kept in the cache.
+
+The digest of the data doesn't depend on the order in which it arrived, with two
+exceptions: floating-point sums come out of addition in whatever order it happened,
+and some sketches (e.g. for quantiles) depend on order. Either way, a mismatch only
+means plotting again. Functions (sort keys and the like) count by name alone, so
+changing what one does without renaming it calls for `clear`.
+"""
+
+import hashlib, os, shutil, tempfile, time
+from typing import Mapping, Optional
+import xlsxwriter
+from . import dynamic, version
+
+_SUFFIX = '.xlsx'
+
+
+def _feed(update, it, memo:dict):
+	""" Write a canonical rendition of `it` to a hash. Sets go in a standard order; dicts keep theirs. """
+	kind = type(it)
+	if it is None or kind in (bool, int, float, complex, str, bytes):
+		update(('%s:%r;' % (kind.__name__, it)).encode('utf-8'))
+		return
+	if id(it) in memo:
+		update(b'@%d;' % memo[id(it)][0]) # Something seen before, e.g. a shape used twice.
+		return
+	memo[id(it)] = len(memo), it # Keep it alive, so its id stays put.
+	update(('<%s.%s' % (kind.__module__, kind.__qualname__)).encode('utf-8'))
+	if isinstance(it, (tuple, list)):
+		for each in it: _feed(update, each, memo)
+	elif isinstance(it, Mapping):
+		for key, value in it.items():
+			_feed(update, key, memo)
+			_feed(update, value, memo)
+	elif isinstance(it, (set, frozenset)):
+		for each in sorted(map(_digest, it)): update(each)
+	elif hasattr(it, '__qualname__'): # Functions, classes, and the like count by name.
+		update(('%s.%s' % (getattr(it, '__module__', None), it.__qualname__)).encode('utf-8'))
+	elif hasattr(it, '__dict__') or hasattr(it, '__slots__'): _feed(update, _state(it), memo)
+	else: update(repr(it).encode('utf-8'))
+	update(b'>')
+
+def _state(it) -> dict:
+	state = dict(getattr(it, '__dict__', {}))
+	for cls in type(it).__mro__:
+		for slot in getattr(cls, '__slots__', ()):
+			if hasattr(it, slot): state[slot] = getattr(it, slot)
+	return state
+
+def _digest(it) -> bytes:
+	h = hashlib.blake2b(digest_size=20)
+	_feed(h.update, it, {})
+	return h.digest()
+
+
+def _feed_data(update, canvas:dynamic.Canvas):
+	"""
+	The trees go in with each node's children in a standard order, which also numbers the nodes.
+	Then the cells go in by those numbers. So the order in which data arrived doesn't matter.
+	"""
+	canvas.sweep()
+	serials = {}
+	def walk(node:dynamic.Node):
+		serials[node] = len(serials)
+		if isinstance(node, dynamic.InternalNode):
+			census = node.census
+			update(b'[%d' % len(node.children))
+			if census: update(b'+' + _digest(census.other)) # Where it is makes a difference.
+			for label_digest, child in sorted((_digest(label), child) for label, child in node.children.items()):
+				update(label_digest)
+				walk(child)
+			update(b']')
+	for direction in (canvas.across, canvas.down): walk(direction.tree)
+	for c, r, value in sorted((serials[c], serials[r], value) for (c, r), value in canvas.cell_data.items()):
+		update(b'%d,%d=' % (c, r))
+		_feed(update, value, {})
+
+class WorkbookCache:
+	"""
+	Keeps workbooks in `directory`, which it creates if need be, named by digest.
+	Workbooks not used in `max_age` seconds get thrown out, and then the least recently
+	used as necessary to get the total size under `max_bytes`. Either may be None for no limit.
+	Several processes may share a cache directory.
+	"""
+	def __init__(self, directory, *, max_bytes:Optional[int]=None, max_age:Optional[float]=None):
+		self.directory = os.fspath(directory)
+		self.max_bytes = max_bytes
+		self.max_age = max_age
+		self.hits = self.misses = 0
+		self.__modules = {} # id -> (module, digest), since a module is big and doesn't change.
+		os.makedirs(self.directory, exist_ok=True)
+
+	def digest(self, canvas:dynamic.Canvas, **options) -> str:
+		""" The name for the workbook that plotting this canvas, with these options, would make. """
+		h = hashlib.blake2b(digest_size=20)
+		h.update(('cubicle %s xlsxwriter %s;' % (version.__version__, xlsxwriter.__version__)).encode('utf-8'))
+		h.update(self.__module_digest(canvas.cub_module))
+		_feed(h.update, canvas.identifier, {})
+		_feed(h.update, canvas.environment.fingerprint(), {})
+		_feed(h.update, sorted(options.items()), {})
+		_feed_data(h.update, canvas)
+		return h.hexdigest()
+
+	def __module_digest(self, cub_module) -> bytes:
+		try: return self.__modules[id(cub_module)][1]
+		except KeyError:
+			digest = _digest(cub_module)
+			self.__modules[id(cub_module)] = cub_module, digest
+			return digest
+
+	def plot(self, canvas:dynamic.Canvas, filename, top_row_index:int=0, left_column_index:int=0, blank=None, *, sheet_name:Optional[str]=None, workbook_options:dict=None, **kwargs) -> bool:
+		"""
+		Make a workbook at `filename` (a path) with the canvas plotted on one worksheet, or copy
+		the same from the cache. Other keyword arguments are as for `Canvas.plot`. The answer is
+		whether it came from the cache.
+		"""
+		workbook_options = workbook_options or {}
+		key = self.digest(canvas, top_row_index=top_row_index, left_column_index=left_column_index, blank=blank, sheet_name=sheet_name, workbook_options=workbook_options, **kwargs)
+		cached = os.path.join(self.directory, key + _SUFFIX)
+		try:
+			shutil.copyfile(cached, filename)
+			os.utime(cached) # It's recently used now.
+		except FileNotFoundError: pass
+		else:
+			self.hits += 1
+			return True
+		self.misses += 1
+		workbook = xlsxwriter.Workbook(filename, workbook_options)
+		try: canvas.plot(workbook, workbook.add_worksheet(sheet_name), top_row_index, left_column_index, blank, **kwargs)
+		finally: workbook.close()
+		self.__store(filename, cached)
+		self.evict()
+		return False
+
+	def __store(self, filename, cached):
+		""" Copy to a temporary name and then rename, so that no reader ever sees half a file. """
+		fd, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+		os.close(fd)
+		try:
+			shutil.copyfile(filename, temporary)
+			os.replace(temporary, cached)
+		except BaseException:
+			os.unlink(temporary)
+			raise
+
+	def evict(self):
+		""" Apply the limits on age and size now. This happens anyway after each new workbook. """
+		entries = []
+		for entry in os.scandir(self.directory):
+			if not entry.name.endswith(_SUFFIX): continue
+			try: stat = entry.stat()
+			except FileNotFoundError: continue # Another process got there first.
+			entries.append((stat.st_mtime, stat.st_size, entry.path))
+		entries.sort()
+		cutoff = None if self.max_age is None else time.time() - self.max_age
+		total = sum(size for _, size, _ in entries)
+		for mtime, size, path in entries:
+			if (cutoff is None or mtime >= cutoff) and (self.max_bytes is None or total <= self.max_bytes): break
+			try: os.unlink(path)
+			except FileNotFoundError: pass
+			total -= size
+
+	def clear(self):
+		""" Throw out every cached workbook. """
+		for entry in os.scandir(self.directory):
+			if entry.name.endswith(_SUFFIX):
+				try: os.unlink(entry.path)
+				except FileNotFoundError: pass
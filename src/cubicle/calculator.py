@@ -0,0 +1,206 @@
+"""
+Just enough of the spreadsheet formula language to compute, here in Python, the
+formulas that cubicle itself writes: arithmetic, parentheses, percentages, and a
+handful of aggregate functions over numbers and ranges.
+
+A formula arrives as a list of pieces. Strings are formula text, to be scanned.
+Anything else is an operand already worked out by the caller: a number, or a
+`Cells` object holding the values in a range. Anything outside the vocabulary
+raises `Unevaluable`, in which case the spreadsheet application gets to work it
+out for itself as always.
+"""
+
+import math, re
+from numbers import Number
+from typing import List
+
+class Unevaluable(Exception):
+	""" This formula is beyond our means; leave it for the spreadsheet. """
+
+class Cells(tuple):
+	""" The values found in a range of cells, with blanks as None. """
+
+TOKEN = re.compile(r'''
+	\s+
+	| (?P<number> (?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)? )
+	| (?P<function> [A-Za-z][A-Za-z0-9.]*(?=\s*\() )
+	| (?P<string> "(?:[^"]|"")*" )
+	| (?P<punct> [-+*/^%(),] )
+''', re.VERBOSE)
+
+
+def _numbers(args):
+	"""
+	Values from ranges count only if they are numbers; blanks and text are skipped.
+	Values given directly must be numbers, as far as we are concerned.
+	"""
+	for arg in args:
+		if isinstance(arg, Cells):
+			for value in arg:
+				if isinstance(value, Number) and not isinstance(value, bool): yield value
+		elif isinstance(arg, Number): yield arg
+		elif arg is not None: raise Unevaluable(arg)
+
+def total(*args):
+	""" Like the spreadsheet's SUM function, but integers stay integers. """
+	them = list(_numbers(args))
+	if all(isinstance(x, int) for x in them): return sum(them)
+	return math.fsum(them)
+
+def _average(*args):
+	them = list(_numbers(args))
+	if not them: raise Unevaluable('#DIV/0!')
+	return math.fsum(them) / len(them)
+
+def _extremum(pick):
+	def function(*args):
+		them = list(_numbers(args))
+		return pick(them) if them else 0
+	return function
+
+def _round(value, digits=0):
+	digits = int(scalar(digits))
+	value = scalar(value)
+	scale = 10 ** digits
+	magnitude = math.floor(abs(value) * scale + 0.5) / scale # Spreadsheets round half away from zero.
+	return math.copysign(magnitude, value)
+
+FUNCTIONS = {
+	'SUM': total,
+	'MIN': _extremum(min),
+	'MAX': _extremum(max),
+	'AVERAGE': _average,
+	'COUNT': lambda *args: sum(1 for _ in _numbers(args)),
+	'ABS': lambda value: abs(scalar(value)),
+	'ROUND': _round,
+}
+
+def scalar(value):
+	""" A range used as a plain value must be just one cell; blanks count as zero. """
+	if isinstance(value, Cells):
+		if len(value) != 1: raise Unevaluable('#VALUE!')
+		value = value[0]
+	if value is None: return 0
+	if isinstance(value, Number) and not isinstance(value, bool): return value
+	raise Unevaluable(value)
+
+
+def calculate(pieces:List[object]):
+	""" Evaluate a formula given as described in the module docstring. """
+	pieces = list(pieces)
+	# Formulas come with a leading equals-sign, or perhaps two. Those don't mean anything here.
+	while pieces and isinstance(pieces[0], str):
+		head = pieces[0].lstrip().lstrip('=')
+		if head:
+			pieces[0] = head
+			break
+		pieces.pop(0)
+	return _Parser(_scan(pieces)).formula()
+
+def _scan(pieces):
+	tokens = []
+	for piece in pieces:
+		if not isinstance(piece, str):
+			tokens.append(('operand', piece))
+			continue
+		position = 0
+		while position < len(piece):
+			match = TOKEN.match(piece, position)
+			if match is None: raise Unevaluable(piece[position:])
+			position = match.end()
+			kind = match.lastgroup
+			if kind == 'number': tokens.append(('operand', float(match.group()) if set('.eE') & set(match.group()) else int(match.group())))
+			elif kind == 'string': tokens.append(('operand', match.group()[1:-1].replace('""', '"')))
+			elif kind == 'function': tokens.append(('function', match.group().upper()))
+			elif kind == 'punct': tokens.append((match.group(), None))
+	return tokens
+
+
+class _Parser:
+	"""
+	Recursive descent, with the spreadsheet's notion of precedence:
+	negation, then percent, then exponent, then multiplicative, then additive.
+	"""
+	def __init__(self, tokens):
+		self.tokens = tokens
+		self.position = 0
+
+	def peek(self):
+		if self.position < len(self.tokens): return self.tokens[self.position][0]
+
+	def take(self):
+		token = self.tokens[self.position]
+		self.position += 1
+		return token
+
+	def expect(self, kind):
+		if self.peek() != kind: raise Unevaluable('expected '+kind)
+		return self.take()
+
+	def formula(self):
+		value = self.additive()
+		if self.peek() is not None: raise Unevaluable('trailing '+self.peek())
+		return scalar(value) if isinstance(value, Cells) else value
+
+	def additive(self):
+		value = self.multiplicative()
+		while self.peek() in ('+', '-'):
+			op = self.take()[0]
+			right = scalar(self.multiplicative())
+			value = scalar(value) + right if op == '+' else scalar(value) - right
+		return value
+
+	def multiplicative(self):
+		value = self.power()
+		while self.peek() in ('*', '/'):
+			op = self.take()[0]
+			right = scalar(self.power())
+			if op == '*': value = scalar(value) * right
+			elif right == 0: raise Unevaluable('#DIV/0!')
+			else: value = scalar(value) / right
+		return value
+
+	def power(self):
+		value = self.unary()
+		while self.peek() == '^':
+			self.take()
+			try: value = scalar(value) ** scalar(self.unary())
+			except (ArithmeticError, ValueError): raise Unevaluable('#NUM!') from None
+			if isinstance(value, complex): raise Unevaluable('#NUM!')
+		return value
+
+	def unary(self):
+		if self.peek() == '-':
+			self.take()
+			return -scalar(self.unary())
+		if self.peek() == '+':
+			self.take()
+			return self.unary()
+		value = self.primary()
+		while self.peek() == '%':
+			self.take()
+			value = scalar(value) / 100
+		return value
+
+	def primary(self):
+		kind = self.peek()
+		if kind == 'operand': return self.take()[1]
+		if kind == '(':
+			self.take()
+			value = self.additive()
+			self.expect(')')
+			return value
+		if kind == 'function':
+			name = self.take()[1]
+			if name not in FUNCTIONS: raise Unevaluable(name)
+			self.expect('(')
+			args = []
+			if self.peek() != ')':
+				args.append(self.additive())
+				while self.peek() == ',':
+					self.take()
+					args.append(self.additive())
+			self.expect(')')
+			try: return FUNCTIONS[name](*args)
+			except TypeError: raise Unevaluable(name) from None
+		raise Unevaluable(kind)
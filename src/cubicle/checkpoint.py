@@ -0,0 +1,237 @@
+"""
+Saving a populated canvas, and getting it back later: `Canvas.save` and `Canvas.load`.
+
+Pickling a canvas would drag along the compiled module, the environment, and a web of
+node objects. A checkpoint instead records only what the data made: which ordinals turned
+up where in the layout trees, and what's in the cells. The module and environment come
+from the caller on the way back in, and the checkpoint is checked against them.
+
+The format is a header followed by sections, each a four-byte tag and a length:
+
+	NAME	the canvas identifier
+	KEYS	the canvas's axis keys, as a sanity check on the layout
+	ORDS	the table of distinct ordinals
+	TREE	per direction, the tree in pre-order: each internal node's child count,
+		then for each child the index of its ordinal, then that child's subtree
+	CELL	two arrays of node serial numbers (column and row) and the values
+	CENS	any top-N census state: per census, its node's serial number and settings,
+		then members and Space-Saving counters as lists of ordinals and weights
+
+Node serial numbers count every node in pre-order, across and then down, and are how
+the cells refer to them. So restoring a canvas involves no key-path lookups at all.
+
+Lists of values (ordinals, weights, and cell values alike) are stored as a tag per value,
+then the integers and the floats in packed arrays, then anything else in one pickle.
+Serial numbers and counts are unsigned 32-bit integers, but lengths are 64-bit.
+"""
+
+import pickle, struct, sys
+from array import array
+from typing import BinaryIO
+from . import dynamic, static, runtime
+
+MAGIC = b'CUBICLE\x00'
+VERSION = 1
+
+SECTIONS = frozenset([b'NAME', b'KEYS', b'ORDS', b'TREE', b'CELL', b'CENS'])
+
+_INT, _FLOAT, _OTHER = 0, 1, 2
+
+class CheckpointError(ValueError):
+	""" The checkpoint is damaged, from a newer version, or made for some other layout. """
+
+# Whatever decoding a damaged checkpoint might raise. A garbled length in a pickle can even ask for more memory than there is.
+_DAMAGE = (struct.error, pickle.UnpicklingError, EOFError, IndexError, KeyError, StopIteration, ValueError, TypeError, AttributeError, ImportError, ArithmeticError, RecursionError, MemoryError)
+
+def _typecode(candidates:str, size:int) -> str:
+	""" The `array` type codes are sized per platform, so pick one that matches the format. """
+	for code in candidates:
+		if array(code).itemsize == size: return code
+	raise ImportError("No %d-byte array type among %r on this platform." % (size, candidates))
+
+_U32, _I64, _F64 = _typecode('IL', 4), _typecode('qlL', 8), _typecode('d', 8)
+
+
+def _pack_values(values:list) -> bytes:
+	tags, ints, floats, others = bytearray(), array(_I64), array(_F64), []
+	for value in values:
+		kind = type(value)
+		if kind is int and -2**63 <= value < 2**63:
+			tags.append(_INT)
+			ints.append(value)
+		elif kind is float:
+			tags.append(_FLOAT)
+			floats.append(value)
+		else:
+			tags.append(_OTHER)
+			others.append(value)
+	return b''.join([struct.pack('<QQQ', len(tags), len(ints), len(floats)), bytes(tags), _bytes(ints), _bytes(floats), pickle.dumps(others, pickle.HIGHEST_PROTOCOL)])
+
+def _unpack_values(data:bytes) -> list:
+	count, n_ints, n_floats = struct.unpack_from('<QQQ', data)
+	at = struct.calcsize('<QQQ')
+	tags = data[at:at+count]
+	at += count
+	ints = _array(_I64, data[at:at+8*n_ints])
+	at += 8*n_ints
+	floats = _array(_F64, data[at:at+8*n_floats])
+	at += 8*n_floats
+	sources = (iter(ints), iter(floats), iter(pickle.loads(data[at:])))
+	if len(tags) != count or len(ints) != n_ints or len(floats) != n_floats: raise CheckpointError("Checkpoint is truncated.")
+	return [next(sources[tag]) for tag in tags]
+
+def _pack_censuses(censuses:dict) -> bytes:
+	""" Census state by node serial number, without pickling the `dynamic.Census` objects themselves. """
+	head, values = [], []
+	for serial, census in censuses.items():
+		members, counters = census.state()
+		head.extend([serial, census.top, census.capacity, len(members), len(counters)])
+		values.append(census.other)
+		for table in (members, counters):
+			values.extend(table.keys())
+			values.extend(table.values())
+	return b''.join([struct.pack('<Q', len(censuses)), _bytes(array(_U32, head)), _pack_values(values)])
+
+def _unpack_censuses(data:bytes) -> dict:
+	""" The inverse of `_pack_censuses`. """
+	count, = struct.unpack_from('<Q', data)
+	at = 8 + 4*5*count
+	head = _array(_U32, data[8:at])
+	if len(head) != 5*count: raise CheckpointError("Checkpoint is truncated.")
+	values = iter(_unpack_values(data[at:]))
+	def table(size):
+		keys = [next(values) for _ in range(size)]
+		return dict(zip(keys, [next(values) for _ in range(size)]))
+	censuses = {}
+	for i in range(0, len(head), 5):
+		serial, top, capacity, n_members, n_counters = head[i:i+5]
+		other = next(values)
+		members = table(n_members)
+		censuses[serial] = dynamic.Census.restore(top, other, capacity, members, table(n_counters))
+	return censuses
+
+_SWAP = sys.byteorder != 'little' # The format is little-endian throughout.
+
+def _bytes(numbers:array) -> bytes:
+	if _SWAP:
+		numbers = array(numbers.typecode, numbers)
+		numbers.byteswap()
+	return numbers.tobytes()
+
+def _array(typecode:str, data:bytes) -> array:
+	it = array(typecode)
+	it.frombytes(data)
+	if _SWAP: it.byteswap()
+	return it
+
+
+def _flatten(canvas:dynamic.Canvas):
+	"""
+	The layout trees as two pre-order streams of numbers, along with
+	the table of ordinals they refer to and a list of nodes by serial number.
+	"""
+	ordinals, nodes = {}, []
+	def walk(node:dynamic.Node, out:array):
+		nodes.append(node)
+		if isinstance(node, dynamic.InternalNode):
+			out.append(len(node.children))
+			for label, child in node.children.items():
+				out.append(ordinals.setdefault(label, len(ordinals)))
+				walk(child, out)
+	streams = []
+	for direction in (canvas.across, canvas.down):
+		out = array(_U32)
+		walk(direction.tree, out)
+		streams.append(out)
+	return list(ordinals), nodes, streams
+
+def _rebuild(canvas:dynamic.Canvas, ordinals:list, streams) -> list:
+	""" The inverse of `_flatten`, into a fresh canvas. Returns the nodes by serial number. """
+	nodes = []
+	def build(shape:static.ShapeDefinition, node:dynamic.Node, stream):
+		nodes.append(node)
+		if isinstance(node, dynamic.InternalNode):
+			for _ in range(next(stream)):
+				label = ordinals[next(stream)]
+				within = shape.descend(label)
+				try: child = node.children[label]
+				except KeyError: child = node.children[label] = dynamic.node_factory.visit(within)
+				build(within, child, stream)
+	try:
+		for direction, stream in zip((canvas.across, canvas.down), streams):
+			build(direction.shape, direction.tree, iter(stream))
+	except (KeyError, IndexError, StopIteration) as e: raise CheckpointError("Checkpoint does not fit the layout.") from e
+	return nodes
+
+def _axis_keys(canvas:dynamic.Canvas) -> bytes:
+	return '\x1f'.join(sorted(canvas.space)).encode('utf-8')
+
+
+def save(canvas:dynamic.Canvas, fileobj:BinaryIO):
+	canvas.sweep()
+	ordinals, nodes, streams = _flatten(canvas)
+	serials = {node:i for i, node in enumerate(nodes)}
+	censuses = {i:node.census for i, node in enumerate(nodes) if isinstance(node, dynamic.InternalNode) and node.census}
+	trees = [_bytes(stream) for stream in streams]
+	cols, rows, values = array(_U32), array(_U32), []
+	for (col_node, row_node), value in canvas.cell_data.items():
+		cols.append(serials[col_node])
+		rows.append(serials[row_node])
+		values.append(value)
+
+	fileobj.write(MAGIC + struct.pack('<I', VERSION))
+	def section(tag:bytes, *parts:bytes):
+		fileobj.write(tag + struct.pack('<Q', sum(map(len, parts))))
+		for part in parts: fileobj.write(part)
+	section(b'NAME', canvas.identifier.encode('utf-8'))
+	section(b'KEYS', _axis_keys(canvas))
+	section(b'ORDS', _pack_values(ordinals))
+	section(b'TREE', struct.pack('<Q', len(trees[0])), *trees)
+	section(b'CELL', struct.pack('<Q', len(cols)), _bytes(cols), _bytes(rows), _pack_values(values))
+	section(b'CENS', _pack_censuses(censuses))
+
+
+def load(cub_module:static.CubModule, identifier:str, environment:runtime.Environment, fileobj:BinaryIO, **kwargs) -> dynamic.Canvas:
+	def read(size:int) -> bytes:
+		try: data = fileobj.read(size)
+		except (OverflowError, MemoryError) as e: raise CheckpointError("Checkpoint is truncated.") from e # A garbled length, most likely.
+		if len(data) != size: raise CheckpointError("Checkpoint is truncated.")
+		return data
+
+	if fileobj.read(len(MAGIC)) != MAGIC: raise CheckpointError("Not a canvas checkpoint.")
+	version, = struct.unpack('<I', read(4))
+	if version > VERSION: raise CheckpointError("Checkpoint format version %d is newer than this software (%d)." % (version, VERSION))
+	sections = {}
+	while True:
+		head = fileobj.read(12)
+		if not head: break
+		if len(head) != 12: raise CheckpointError("Checkpoint is truncated.")
+		size, = struct.unpack('<Q', head[4:])
+		sections[head[:4]] = read(size)
+	missing = SECTIONS - sections.keys()
+	if missing: raise CheckpointError("Checkpoint lacks sections %s." % b', '.join(sorted(missing)).decode('ascii'))
+
+	canvas = dynamic.Canvas(cub_module, identifier, environment, **kwargs)
+	if sections[b'KEYS'] != _axis_keys(canvas):
+		raise CheckpointError("Checkpoint of canvas %r does not match the layout of %r." % (sections[b'NAME'].decode('utf-8', 'replace'), identifier))
+	try:
+		tree = sections[b'TREE']
+		split = 8 + struct.unpack_from('<Q', tree)[0]
+		nodes = _rebuild(canvas, _unpack_values(sections[b'ORDS']), [_array(_U32, tree[8:split]), _array(_U32, tree[split:])])
+
+		cells = sections[b'CELL']
+		count, = struct.unpack_from('<Q', cells)
+		cols = _array(_U32, cells[8:8+4*count])
+		rows = _array(_U32, cells[8+4*count:8+8*count])
+		values = _unpack_values(cells[8+8*count:])
+		if not len(cols) == len(rows) == len(values) == count: raise CheckpointError("Checkpoint is truncated.")
+		cell_data = canvas.cell_data
+		for c, r, value in zip(cols, rows, values):
+			cell_data[nodes[c], nodes[r]] = value
+
+		for serial, census in _unpack_censuses(sections[b'CENS']).items():
+			nodes[serial].census = census
+		for direction in (canvas.across, canvas.down): direction.resume()
+	except CheckpointError: raise
+	except _DAMAGE as e: raise CheckpointError("Checkpoint is damaged, or does not fit the layout.") from e
+	return canvas
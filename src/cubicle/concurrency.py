@@ -0,0 +1,93 @@
+"""
+Feeding one canvas from many threads at once.
+
+A `dynamic.Canvas` is not thread-safe: finding a key path grows the layout trees,
+and `incr` is a read-modify-write of the cell store. One big lock around every call
+would be safe, but then producers spend their time queueing for it.
+
+So a `ConcurrentCanvas` gives each producing thread a `dynamic.Batch` of its own
+(a "shard") to pre-aggregate into. Each shard has a lock, but only its own thread
+takes it in the ordinary course of events, so it's all but free. The canvas lock
+is taken only to apply a whole batch, once per distinct point rather than once per
+call. None of this relies on the global interpreter lock for correctness, so on a
+free-threaded build of Python the producers can truly run side by side.
+"""
+
+import contextlib, threading
+from typing import Callable
+from .dynamic import Canvas, Batch
+
+class _Shard:
+	__slots__ = ['lock', 'batch']
+	def __init__(self, batch:Batch):
+		self.lock = threading.Lock()
+		self.batch = batch
+
+
+class ConcurrentCanvas:
+	"""
+	Any number of threads may call `incr`, `decr`, and `poke` at the same time.
+	A thread's contributions reach the canvas when its batch grows past `batch_limit`
+	distinct points, or when any thread calls `flush`. To plot (or otherwise read)
+	the canvas, use `with concurrent.exclusive() as canvas:` which flushes everything
+	first and keeps producers out of the way meanwhile.
+
+	Since data are applied later, a bad point (an invalid ordinal, say) comes to light only
+	when the batch containing it gets applied. The rest of that batch goes in regardless.
+	The bad point goes to `reject(point, exception)` if you supply that callback,
+	or else its exception raises from whichever call happened to apply the batch.
+	"""
+	def __init__(self, canvas:Canvas, *, batch_limit:int=10000, reject:Callable=None):
+		self.canvas = canvas
+		self.batch_limit = batch_limit
+		self.reject = reject
+		self.__lock = threading.RLock() # Guards the canvas proper.
+		self.__local = threading.local()
+		self.__shards = []
+		self.__registry = threading.Lock() # Guards the list of shards.
+
+	def __shard(self) -> _Shard:
+		try: return self.__local.shard
+		except AttributeError:
+			shard = self.__local.shard = _Shard(self.canvas.batch())
+			with self.__registry: self.__shards.append(shard)
+			return shard
+
+	def incr(self, point, value, measure:str=None):
+		shard = self.__shard()
+		with shard.lock:
+			shard.batch.incr(point, value, measure)
+			full = len(shard.batch) >= self.batch_limit
+		if full: self.__drain(shard)
+
+	def decr(self, point, value):
+		shard = self.__shard()
+		with shard.lock:
+			shard.batch.decr(point, value)
+			full = len(shard.batch) >= self.batch_limit
+		if full: self.__drain(shard)
+
+	def poke(self, point, value):
+		""" Goes straight in, after whatever this thread contributed before. """
+		self.__drain(self.__shard())
+		with self.__lock: self.canvas.poke(point, value)
+
+	def __drain(self, shard:_Shard):
+		with shard.lock:
+			batch, shard.batch = shard.batch, self.canvas.batch()
+		if len(batch):
+			errors = []
+			with self.__lock: self.canvas.apply(batch, self.reject or (lambda point, e: errors.append(e)))
+			if errors: raise errors[0]
+
+	def flush(self):
+		""" Apply every thread's pending contributions. """
+		with self.__registry: shards = list(self.__shards)
+		for shard in shards: self.__drain(shard)
+
+	@contextlib.contextmanager
+	def exclusive(self):
+		""" Flush, then hold the canvas still for reading or plotting. """
+		with self.__lock:
+			self.flush()
+			yield self.canvas
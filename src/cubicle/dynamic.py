@@ -6,10 +6,12 @@ the common data structure which is a "layout tree".
 The general description can be found at .../docs/technote.md
 """
 
-import collections
-from typing import Optional, Dict, Callable, List
+import bisect, collections, copy, csv, heapq, os, time
+from numbers import Number
+from typing import Optional, Dict, Callable, List, Iterable, Mapping, NamedTuple
 from boozetools.support import foundation
-from . import static, formulae, runtime, veneer, utility
+from xlsxwriter.utility import quote_sheetname
+from . import static, formulae, runtime, veneer, utility, calculator, xl_schema, aggregates
 
 
 class Node:
@@ -17,22 +19,298 @@ class Node:
 
 class LeafNode(Node):
 	""" Seems a half-decent idea to distinguish... """
-	__slots__ = ["begin", "margin", "style_class", "formula_class"]
+	__slots__ = ["begin", "margin", "style_class", "formula_class", "reading"]
 	def __init__(self, margin:static.Marginalia):
 		self.margin = margin
+		self.reading = None # For a field of a :measure, a `Reading`.
 	def end(self): return self.begin
 	def after(self): return self.begin+1
 
 class InternalNode(Node):
 	""" This can STILL be empty... """
-	__slots__ = ["begin", "margin", "style_class", "formula_class", "children", "size"]
+	__slots__ = ["begin", "margin", "style_class", "formula_class", "children", "size", "census"]
 	def __init__(self, margin:static.Marginalia):
 		self.margin = margin
 		self.children = {}
+		self.census = None # For a tree with a cardinality policy, a `Census`. False if known to have none.
 	def end(self): return self.begin + self.size - 1
 	def after(self): return self.begin + self.size
 
 
+class Reading(NamedTuple):
+	""" Where a field of a :measure finds its data, and which statistic it shows. """
+	host: InternalNode
+	measure: Optional[str]
+	statistic: str
+
+class Rollup(NamedTuple):
+	""" Boilerplate for a subtotal of a statistic that doesn't add up: merge the accumulators of the cells selected. """
+	selection: formulae.Selection
+
+def _keeps_tally(pair) -> bool:
+	""" Cells under a :measure are keyed by the measure node itself, not by a leaf. """
+	return isinstance(pair[0], InternalNode) or isinstance(pair[1], InternalNode)
+
+def _tally_key(col_node:LeafNode, row_node:LeafNode):
+	col_reading, row_reading = col_node.reading, row_node.reading
+	return (col_node if col_reading is None else col_reading.host), (row_node if row_reading is None else row_reading.host)
+
+def _recipe(shape:static.ShapeDefinition, recipe:dict) -> dict:
+	""" Which kinds of accumulator each measure needs, judging by the statistics that the layout reads. """
+	if isinstance(shape, static.ReadingDefinition):
+		kinds = recipe.setdefault(shape.measure, [])
+		kind = aggregates.kind_of(shape.statistic)
+		if kind not in kinds: kinds.append(kind)
+	elif isinstance(shape, static.TreeDefinition): _recipe(shape.within, recipe)
+	elif isinstance(shape, (static.FrameDefinition, static.MenuDefinition)):
+		for within in shape.fields.values(): _recipe(within, recipe)
+	return recipe
+
+def _skeleton(shape:static.ShapeDefinition):
+	"""
+	What a shape looks like to the layout tree, leaving out margins, styles, and formulas.
+	The compiler styles each canvas's shapes separately, so two canvases over the same axes
+	have distinct but equivalent shapes. Their skeletons are equal, so they can share a tree.
+	"""
+	if isinstance(shape, static.ReadingDefinition): return 'reading', shape.measure, shape.statistic
+	if isinstance(shape, static.LeafDefinition): return 'leaf',
+	reader = type(shape.reader), shape.reader.key
+	if isinstance(shape, static.TreeDefinition): return type(shape), reader, _skeleton(shape.within)
+	return type(shape), reader, tuple((label, _skeleton(within)) for label, within in shape.fields.items())
+
+def _portion(tally:aggregates.Tally, recipe:dict) -> aggregates.Tally:
+	""" A copy of just those parts of a tally which some canvas's layout reads. """
+	it = aggregates.Tally()
+	for (measure, kind), part in tally.parts.items():
+		if kind in recipe.get(measure, ()): it.parts[measure, kind] = copy.deepcopy(part)
+	return it
+
+class Census:
+	"""
+	Keeps a tree axis down to its `top` heaviest ordinals (the "members") plus one
+	more, `other`, for all the rest. Weight is whatever gets added to the cells.
+	
+	Members' weights are known exactly. Those of everything else are estimated with
+	the Space-Saving algorithm in a bounded number of counters, so memory stays bounded
+	however long the tail. When an outsider's estimate rises above the lightest member
+	(the "floor"), they trade places: the member's subtree is folded into `other`, and
+	the outsider gets a fresh one. Weight which went to `other` before a promotion
+	stays there, so a promoted ordinal's figures are complete only from then on.
+	"""
+	
+	def __init__(self, top:int, other, capacity:int=None):
+		assert top > 0, top
+		self.top, self.other = top, other
+		self.capacity = capacity or 4 * top
+		self.members = {}
+		self.floor = 0 # No more than the lightest member's weight; refreshed as needed.
+		self.__counters = {}
+		self.__heap = [] # Entries (count, serial, ordinal), some of them stale.
+		self.__serial = 0
+	
+	@staticmethod
+	def policy(env:runtime.Environment, key) -> "Census":
+		""" The census for a new tree node along the given axis, or False if it has no limit. """
+		rule = env.cardinality(key)
+		return False if rule is None else Census(*rule)
+	
+	def admit(self, ordinal, weight, demote:Callable):
+		"""
+		Which ordinal to use for data that arrives under `ordinal`: either itself or `other`.
+		If that means a member gets demoted, then `demote(victim)` must fold it into `other`.
+		"""
+		members = self.members
+		if ordinal in members:
+			members[ordinal] += weight
+			return ordinal
+		if ordinal == self.other: return ordinal
+		if len(members) < self.top:
+			members[ordinal] = weight
+			return ordinal
+		estimate = self.__count(ordinal, weight)
+		if estimate <= self.floor: return self.other
+		self.floor = min(members.values())
+		if estimate <= self.floor: return self.other
+		victim = min(members, key=members.get)
+		del self.__counters[ordinal]
+		self.__count(victim, members.pop(victim))
+		members[ordinal] = estimate
+		demote(victim)
+		self.floor = min(members.values())
+		return ordinal
+	
+	def place(self, ordinal):
+		""" For data moving in wholesale, e.g. by a fold: like `admit` but without weight or demotions. """
+		if ordinal in self.members or ordinal == self.other: return ordinal
+		if len(self.members) < self.top:
+			self.members[ordinal] = 0
+			return ordinal
+		return self.other
+	
+	def state(self) -> tuple:
+		""" Everything a checkpoint needs besides the settings, as (members, counters): each maps ordinals to weights. """
+		return dict(self.members), dict(self.__counters)
+	
+	@classmethod
+	def restore(cls, top:int, other, capacity:int, members:dict, counters:dict) -> "Census":
+		""" The inverse of `state`, given the settings too. """
+		it = cls(top, other, capacity)
+		it.members.update(members)
+		it.__counters.update(counters)
+		it.__heap = [(count, i, o) for i, (o, count) in enumerate(counters.items())]
+		heapq.heapify(it.__heap)
+		it.__serial = len(it.__heap)
+		return it
+	
+	def __count(self, ordinal, weight):
+		counters = self.__counters
+		if ordinal in counters: counters[ordinal] += weight
+		elif len(counters) < self.capacity: counters[ordinal] = weight
+		else:
+			# Space-Saving: the newcomer takes over the smallest counter, and adds to it.
+			heap = self.__heap
+			while True:
+				count, _, least = heapq.heappop(heap)
+				if counters.get(least) == count: break
+			del counters[least]
+			counters[ordinal] = count + weight
+		self.__serial += 1
+		heapq.heappush(self.__heap, (counters[ordinal], self.__serial, ordinal))
+		if len(self.__heap) > 4 * self.capacity + 16:
+			self.__heap = [(count, i, o) for i, (o, count) in enumerate(counters.items())]
+			heapq.heapify(self.__heap)
+		return counters[ordinal]
+
+
+class Rolling:
+	"""
+	Keeps a tree axis down to a window of its most recent ordinals (see `Environment.window`).
+	When an ordinal arrives that's newer than any before, everything older than it less the
+	`span` expires. Each child along the axis goes on a heap when it's made and comes off
+	once when it expires, so the cost is amortized over the data that made it. Otherwise,
+	checking an ordinal against the window costs a comparison or two.
+	
+	One of these covers every node along its axis in a tree, however deep, with a single clock.
+	"""
+	
+	def __init__(self, span):
+		self.span = span
+		self.newest = None
+		self.__heap = [] # Entries (ordinal, serial, parent node), some for children already gone.
+		self.__serial = 0
+	
+	def admit(self, key, ordinal):
+		""" Data for an ordinal that has already expired is refused. """
+		if self.newest is not None and ordinal < self.newest - self.span: raise runtime.ExpiredOrdinalError(key, ordinal)
+	
+	def track(self, parent:InternalNode, ordinal):
+		""" A new child has appeared along the axis, and will expire in due course. """
+		self.__serial += 1
+		heapq.heappush(self.__heap, (ordinal, self.__serial, parent))
+	
+	def advance(self, ordinal, expire:Callable):
+		""" Move the clock along if `ordinal` is the newest yet, and call `expire(parent, ordinal)` for each child that falls out. """
+		if self.newest is not None and not self.newest < ordinal: return
+		self.newest = ordinal
+		cutoff, heap = ordinal - self.span, self.__heap
+		while heap and heap[0][0] < cutoff:
+			old, _, parent = heapq.heappop(heap)
+			expire(parent, old)
+
+
+class SheetLimitError(Exception):
+	""" The canvas will not fit on a worksheet. """
+
+def _span(node:Node) -> int:
+	""" How many rows (or columns) a planned node takes up. """
+	return node.after() - node.begin
+
+
+class IngestReport(NamedTuple):
+	""" What happened during a bulk ingestion. """
+	rows: int
+	rejected: int
+	seconds: float
+	
+	@property
+	def accepted(self) -> int: return self.rows - self.rejected
+	
+	@property
+	def rows_per_second(self) -> float:
+		return self.rows / self.seconds if self.seconds else float('inf')
+
+
+class Batch:
+	"""
+	Contributions to a canvas, pre-aggregated by point but not yet placed: see `Canvas.batch`.
+	Finding the key path is most of the cost of `incr`, so `Canvas.apply` does it once per
+	distinct point. Until then, a batch has nothing to do with the canvas's layout trees,
+	so filling one needs no coordination with anything else that's going on.
+	"""
+	def __init__(self, recipe:dict):
+		self.recipe = recipe
+		self.totals = {} # Frozen point -> sum of plain numbers given.
+		self.tallies = {} # Frozen point -> `aggregates.Tally`, in case the point lands beneath a :measure.
+		self.taken = set() # Points given to `decr`, which is no good beneath a :measure.
+		self.unsummed = set() # Points given other than a number, which is no good except beneath a :measure.
+	
+	@staticmethod
+	def freeze(point:Mapping) -> tuple:
+		return tuple(sorted(point.items()))
+	
+	def incr(self, point, value, measure:str=None):
+		key = self.freeze(point)
+		if isinstance(value, Number):
+			self.totals[key] = self.totals.get(key, 0) + value
+			if not self.recipe: return
+		else: self.unsummed.add(key)
+		try: tally = self.tallies[key]
+		except KeyError: tally = self.tallies[key] = aggregates.Tally()
+		for name, each in (value.items() if isinstance(value, Mapping) else [(measure, value)]):
+			kinds = self.recipe.get(name)
+			if kinds: tally.add(name, each, kinds)
+	
+	def decr(self, point, value):
+		key = self.freeze(point)
+		self.totals[key] = self.totals.get(key, 0) - value
+		self.taken.add(key)
+	
+	def __len__(self):
+		""" The number of distinct points, which is what it costs to apply. """
+		return len(self.totals.keys() | self.tallies.keys())
+
+
+class Estimate(NamedTuple):
+	""" What `Canvas.estimate` predicts about plotting a canvas. Memory is in bytes. """
+	rows: int
+	columns: int
+	cells: int
+	populated: int
+	formats: int
+	formula_cells: int
+	formula_chars: int
+	longest_formula: int
+	memory: int # for xlsxwriter in its normal mode
+	constant_memory: int # for xlsxwriter with the `constant_memory` option
+	fits: bool # within the limits of a single worksheet
+	
+	# Rough bytes per cell written, as measured of xlsxwriter. Text and formulas cost extra per character.
+	NUMBER_COST = 135
+	BLANK_COST = 100
+	FORMULA_COST = 130
+	TEXT_COST = 240
+
+
+class Window(NamedTuple):
+	""" A block of a canvas, as `Canvas.render_window` gives it: no workbook involved. """
+	rows: range # The rows and columns of the full plot which it covers, clipped to the canvas.
+	columns: range
+	cells: list # Lists by row of (value, style) pairs. A style is a dict of xlsxwriter format properties.
+	merges: list # Tuples of (top, left, bottom, right, value, style), clipped to the window.
+	heights: list # By row, in points, or None for the default.
+	widths: list # By column, in characters, or None for the default.
+
+
 class Canvas:
 	"""
 	This is the actual object that collects actual data for actual plotting into an actual spreadsheet somewhere.
@@ -42,31 +320,446 @@ class Canvas:
 	and require client code to pass in both but then client code might accidentally get it wrong...
 	It's better this way I think. At least for the overall canvas object.
 	"""
-	def __init__(self, cub_module:static.CubModule, identifier:str, environment:runtime.Environment):
+	def __init__(self, cub_module:static.CubModule, identifier:str, environment:runtime.Environment, *, cell_store=None, group:"CanvasGroup"=None):
+		"""
+		The `cell_store` is for when the usual `defaultdict(int)` won't do,
+		for instance a `storage.SpillingCellStore` for canvases too big for RAM.
+		A canvas in a `CanvasGroup` shares layout trees with the others; the group makes those.
+		"""
 		self.cub_module = cub_module # This turns out to get consulted...
+		self.identifier = identifier
 		self.definition = cub_module.canvases[identifier]
 		self.environment = environment
-		self.cell_data = collections.defaultdict(int)
-		self.across = Direction(self.definition.horizontal, environment)
-		self.down = Direction(self.definition.vertical, environment)
+		self.group = group
+		self.cell_data = collections.defaultdict(int) if cell_store is None else cell_store
+		self.read_only = False # As for a snapshot: see `snapshot.attach`.
+		trees = None if group is None else group.trees
+		self.across = Direction(self.definition.horizontal, environment, trees)
+		self.down = Direction(self.definition.vertical, environment, trees)
 		self.space = self.across.space | self.down.space
 		intersection = self.across.space & self.down.space
 		assert not intersection, intersection
+		self.__recipe = _recipe(self.definition.vertical, _recipe(self.definition.horizontal, {}))
+		self.__plans = [None] if group is None else group.plans # Shared trees, shared plan.
+		self.__window = None
+		self.__dead = set() # Nodes of expired subtrees, whose cells have yet to be swept away.
+		self.__swept = None # How many cells there were after the last sweep, or else at the first expiry.
+	
+	def fresh(self, *, cell_store=None) -> "Canvas":
+		"""
+		An empty canvas just like this one as constructed, but without going over the definition again.
+		For making one report after another from the same layout. The new canvas belongs to no group.
+		"""
+		it = copy.copy(self)
+		it.group = None
+		it.read_only = False
+		it.cell_data = collections.defaultdict(int) if cell_store is None else cell_store
+		it.across, it.down = self.across.fresh(), self.down.fresh()
+		it.__plans = [None]
+		it.__window = None
+		it.__dead = set()
+		it.__swept = None
+		return it
+	
+	@property
+	def planned_by(self) -> Optional["Renderer"]:
+		""" The `Renderer` whose plan the layout nodes now reflect, if any. """
+		return self.__plans[0]
+	
+	@planned_by.setter
+	def planned_by(self, renderer:Optional["Renderer"]):
+		self.__plans[0] = renderer
 		
 	# A few routines for plugging data into a grid:
 	
+	def __writable(self):
+		""" Refuse data before looking for where it goes, so that a read-only canvas's trees stay as they are. """
+		if self.read_only: raise TypeError("This canvas is read-only.")
+	
 	def poke(self, point, value):
 		self.cell_data[self.key_pair(point)] = value
 	
-	def incr(self, point, value):
-		self.cell_data[self.key_pair(point)] += value
+	def incr(self, point, value, measure:str=None):
+		"""
+		Beneath a :measure, the cell keeps a `aggregates.Tally` rather than a sum. There, `value`
+		may be a mapping of measure names to numbers, all recorded at once. A plain number goes
+		to the given `measure`, or to the anonymous one if you don't name a measure.
+		"""
+		self.__writable()
+		keeps, weight = self.check(point), value if isinstance(value, Number) else 1
+		if not keeps:
+			if isinstance(value, Mapping): raise TypeError("Only a :measure can take a mapping of measures.")
+			self.cell_data[self.key_pair(point, weight, checked=True)] += value
+		else:
+			pair = self.key_pair(point, weight, checked=True)
+			tally = self.cell_data.get(pair)
+			if tally is None: tally = aggregates.Tally()
+			if isinstance(value, Mapping):
+				for name, each in value.items(): self.__record(tally, name, each)
+			else: self.__record(tally, measure, value)
+			self.cell_data[pair] = tally # Reassign, so that a cell store notices the change.
+	
+	def __record(self, tally:aggregates.Tally, measure, value):
+		""" Measures which no field reads are not worth keeping. """
+		kinds = self.__recipe.get(measure)
+		if kinds: tally.add(measure, value, kinds)
 	
 	def decr(self, point, value):
-		self.cell_data[self.key_pair(point)] -= value
+		self.__writable()
+		if self.check(point): raise TypeError("There is no taking back from a :measure; minimum and maximum do not subtract.")
+		self.cell_data[self.key_pair(point, 0, checked=True)] -= value
+	
+	def save(self, fileobj):
+		""" Write a checkpoint of everything the data have made, to a binary file. See module `checkpoint`. """
+		from . import checkpoint
+		checkpoint.save(self, fileobj)
+	
+	@staticmethod
+	def load(cub_module:static.CubModule, identifier:str, environment:runtime.Environment, fileobj, *, cell_store=None) -> "Canvas":
+		""" The canvas as it was when saved. The module and environment must be those it was made with, or near enough. """
+		from . import checkpoint
+		return checkpoint.load(cub_module, identifier, environment, fileobj, cell_store=cell_store)
+	
+	def freeze(self, path):
+		""" Write a read-only snapshot for other processes to `snapshot.attach` and share. """
+		from . import snapshot
+		snapshot.freeze(self, path)
 	
-	def key_pair(self, point):
-		fkn = FindKeyNode(point, self.environment)
-		return fkn.visit(self.across), fkn.visit(self.down)
+	def batch(self) -> Batch:
+		""" An empty `Batch` suited to this canvas. """
+		return Batch(self.__recipe)
+	
+	def apply(self, batch:Batch, reject:Callable=None):
+		"""
+		Put a batch's contributions into the canvas, with the same effect as the `incr` and `decr` calls that
+		went into it. Every point gets checked before any goes in. So if one won't go (an invalid ordinal, say)
+		then the first such problem raises, leaving both the canvas and the batch just as they were.
+		Or, like the bulk operations below, hand each bad point to `reject(point, exception)`,
+		and the good ones go in regardless.
+		"""
+		self.__writable()
+		totals, tallies = batch.totals, batch.tallies
+		good = []
+		for key in totals.keys() | tallies.keys():
+			point, met = dict(key), []
+			try:
+				keeps = self.check(point, met=met)
+				if keeps and key in batch.taken: raise TypeError("There is no taking back from a :measure; minimum and maximum do not subtract.")
+				if not keeps and key in batch.unsummed: raise TypeError("Only a :measure can take values other than numbers.")
+			except (KeyError, TypeError) as e:
+				if reject is None: raise
+				reject(point, e)
+			else: good.append((point, met, key))
+		for point, met, key in _in_windows(good, reject):
+			total = totals.get(key)
+			self.deposit(self.key_pair(point, 1 if total is None else total, checked=True), total, tallies.get(key))
+	
+	def deposit(self, pair, total, tally:aggregates.Tally=None):
+		"""
+		Add to the cell at a pair of nodes from `key_pair`: the total, or else beneath a :measure, the tally.
+		The canvas keeps the tally, so don't add to it afterward. A total of `None` means there was only a mapping.
+		"""
+		if _keeps_tally(pair): self.__deposit(pair, aggregates.Tally() if tally is None else tally)
+		elif total is None: raise TypeError("Only a :measure can take a mapping of measures.")
+		else: self.cell_data[pair] += total
+	
+	def __deposit(self, pair, tally:aggregates.Tally):
+		""" Reassign even when merging in place, so that a cell store notices the change. """
+		cell_data = self.cell_data
+		cell_data[pair] = _combine(cell_data[pair], tally) if pair in cell_data else tally
+	
+	def read_cell(self, col_node:LeafNode, row_node:LeafNode, default=None):
+		""" What the data says belongs at a given intersection of leaves, or else the default. """
+		col_reading, row_reading = col_node.reading, row_node.reading
+		if col_reading is None and row_reading is None: return self.cell_data.get((col_node, row_node), default)
+		reading = col_reading or row_reading
+		tally = self.cell_data.get(_tally_key(col_node, row_node))
+		if tally is None: return default
+		if not isinstance(tally, aggregates.Tally): return tally # As left by `poke`.
+		value = tally.read(reading.measure, reading.statistic)
+		return default if value is None else value
+	
+	def rollup(self, cursor, selection:formulae.Selection, reading:Reading, default=None):
+		"""
+		A subtotal of some statistic that doesn't add up, such as a distinct count: Merge the accumulators
+		from all the cells that the equivalent subtotal formula would have summed, and read that instead.
+		"""
+		kind = aggregates.kind_of(reading.statistic)
+		merged = None
+		for col_node in self.across.data_leaves(cursor, selection):
+			for row_node in self.down.data_leaves(cursor, selection):
+				tally = self.cell_data.get(_tally_key(col_node, row_node))
+				if not isinstance(tally, aggregates.Tally): continue
+				part = tally.part(reading.measure, kind)
+				if part is not None: merged = part if merged is None else merged + part
+		value = (kind() if merged is None else merged).read(reading.statistic)
+		return default if value is None else value
+	
+	def check(self, point, checked:dict=None, met:list=None) -> bool:
+		"""
+		Raise whatever `key_pair` would about a point, but without changing anything.
+		The answer is whether the point lands beneath a :measure, where cells keep a tally.
+		Trees already in `checked` are skipped; the rest go in it, along with their answers.
+		Given a list for `met`, the rolling windows which the point meets go in it, as for `_in_windows`.
+		"""
+		ckp = CheckKeyPath(point, self.environment)
+		keeps = False
+		for direction in (self.across, self.down):
+			if checked is not None and direction.tree in checked: lands = checked[direction.tree]
+			else:
+				lands = ckp.visit(direction)
+				if checked is not None: checked[direction.tree] = lands
+			keeps = keeps or lands
+		if met is not None: met.extend(ckp.met)
+		return keeps
+	
+	# Answers straight from the data, without plotting anything:
+
+	def get(self, point, default=None):
+		"""
+		The value at a point given as for `incr`, or else the default. This creates nothing.
+		Beneath a :measure, name the field in the point just as for a frame.
+		An ordinal lumped into "other" by a cardinality policy has no value of its own.
+		"""
+		fen = FindExtantNode(point, self.environment)
+		col_node, row_node = fen.visit(self.across), fen.visit(self.down)
+		if col_node is None or row_node is None: return default
+		return self.read_cell(col_node, row_node, default)
+
+	def slice(self, selection) -> list:
+		"""
+		The populated data cells within a selection, as `(point, value)` pairs. The selection is either
+		a `formulae.Selection`, with criteria working as in the layout language, or a plain dictionary
+		of ordinals by axis, where a set of ordinals means any of them. Frames not mentioned mean the
+		default field if there is one, as in a formula. Otherwise, an axis not mentioned means all of it.
+		"""
+		found = ((point, self.read_cell(col_leaf, row_leaf)) for col_leaf, row_leaf, point in self.__select(selection))
+		return [(point, value) for point, value in found if value is not None]
+
+	def total(self, selection):
+		"""
+		What a subtotal over the selection would come to. Beneath a :measure, select just one field.
+		Statistics that don't add up (all but counts and sums) come of merging accumulators, as in a subtotal.
+		"""
+		found = list(self.__select(selection))
+		readings = {(leaf.reading.measure, leaf.reading.statistic) for pair in found for leaf in pair[:2] if leaf.reading is not None}
+		if len(readings) > 1: raise ValueError("Select just one field of the :measure to total.", sorted(readings, key=repr))
+		if readings:
+			measure, statistic = readings.pop()
+			if statistic not in aggregates.ADDITIVE:
+				kind = aggregates.kind_of(statistic)
+				merged = kind()
+				for key in {_tally_key(c, r) for c, r, _ in found}:
+					tally = self.cell_data.get(key)
+					part = tally.part(measure, kind) if isinstance(tally, aggregates.Tally) else None
+					if part is not None: merged = merged + part
+				return merged.read(statistic)
+		return calculator.total(calculator.Cells(self.read_cell(c, r) for c, r, _ in found))
+
+	def __select(self, selection):
+		""" Yield (column leaf, row leaf, point) for each populated data cell within a selection. """
+		if not isinstance(selection, formulae.Selection):
+			selection = formulae.Selection({
+				key: formulae.IsInSet(frozenset(value)) if isinstance(value, (set, frozenset)) else formulae.IsEqual(value)
+				for key, value in selection.items()
+			})
+		stray = selection.criteria.keys() - self.space
+		if stray: raise KeyError("No such axes in this canvas", sorted(stray))
+		sides = []
+		for direction in (self.across, self.down):
+			grouped = {} # By the node which keys the cells, which for a field of a :measure is the measure.
+			for leaf, point in SelectPoints(selection.projection(direction.space)).visit(direction):
+				grouped.setdefault(leaf if leaf.reading is None else leaf.reading.host, []).append((leaf, point))
+			sides.append(grouped)
+		cols, rows = sides
+		cell_data = self.cell_data
+		# Probe for each combination, or else scan the cells: whichever is less work.
+		if len(cols) * len(rows) <= len(cell_data): keys = [(c, r) for c in cols for r in rows if (c, r) in cell_data]
+		else: keys = [key for key in cell_data.keys() if key[0] in cols and key[1] in rows]
+		for c, r in keys:
+			for col_leaf, col_point in cols[c]:
+				for row_leaf, row_point in rows[r]:
+					yield col_leaf, row_leaf, {**col_point, **row_point}
+	
+	def key_pair(self, point, weight=1, resolved:dict=None, *, checked=False):
+		"""
+		The weight only matters along axes with a cardinality policy: it's how an ordinal
+		earns (or keeps) its own place in the tree, rather than being lumped in with "other".
+		
+		The whole point gets checked before any tree grows, so a bad one leaves no trace.
+		If you've already done that with `check`, say so.
+		
+		Canvases in a group may share trees. Pass the same `resolved` dictionary to each
+		for the same point, and each shared tree gets searched (and weighed) only once.
+		"""
+		self.__writable()
+		if not checked: self.check(point)
+		self.planned_by = None # The trees may grow, which spoils any plan.
+		fkn = FindKeyNode(point, self.environment, weight)
+		pair = []
+		for side, direction in enumerate((self.across, self.down)):
+			if resolved is not None and direction.tree in resolved: pair.append(resolved[direction.tree])
+			else:
+				fkn.fold = lambda shape, node, victim: self.__fold(side, shape, node, victim)
+				fkn.rolling = direction.rolling
+				fkn.expire = lambda node, ordinal: self.__expire(side, node, ordinal)
+				found = fkn.visit(direction)
+				if resolved is not None: resolved[direction.tree] = found
+				pair.append(found)
+		return tuple(pair)
+	
+	def __fold(self, side:int, shape:static.TreeDefinition, node:InternalNode, victim):
+		"""
+		Demote a tree's child to its "other" child, moving the data along with it.
+		`side` says which half of the cell keys refers to this direction.
+		Every canvas in the group which shares the tree gets its data moved likewise.
+		"""
+		evicted = node.children.pop(victim)
+		mapping = {}
+		self.__graft(shape, node, node.census.other, evicted, mapping)
+		tree = (self.across, self.down)[side].tree
+		for canvas in ([self] if self.group is None else self.group.canvases.values()):
+			for i, direction in enumerate((canvas.across, canvas.down)):
+				if direction.tree is tree: canvas.__remap(i, mapping)
+	
+	def __expire(self, side:int, parent:InternalNode, ordinal):
+		"""
+		Take a child that has aged out of its window out of the tree. Its cells (in every canvas of the
+		group which shares the tree) are left for `sweep`, since finding them means looking at all the cells.
+		"""
+		gone = parent.children.pop(ordinal, None)
+		if gone is None: return
+		if parent.census: parent.census.members.pop(ordinal, None)
+		dead = []
+		def walk(node:Node):
+			dead.append(node)
+			if isinstance(node, InternalNode):
+				for child in node.children.values(): walk(child)
+		walk(gone)
+		tree = (self.across, self.down)[side].tree
+		for canvas in ([self] if self.group is None else self.group.canvases.values()):
+			if tree is canvas.across.tree or tree is canvas.down.tree: canvas.__bury(dead)
+	
+	def __bury(self, dead:list):
+		"""
+		Sweeping costs a look at every cell, so wait until either the cells have doubled since last time
+		or the dead nodes outnumber them. Either way, that cost is amortized over what made it necessary.
+		"""
+		self.__dead.update(dead)
+		size = len(self.cell_data)
+		if self.__swept is None: self.__swept = size # The cells may have come from a checkpoint, or a store that was already full.
+		if size >= 2 * self.__swept or len(self.__dead) >= size: self.sweep()
+	
+	def sweep(self):
+		""" Throw out any cells left behind by a rolling window. This happens as needed, but you may as well. """
+		if not self.__dead: return
+		dead, cell_data = self.__dead, self.cell_data
+		for key in [key for key in cell_data.keys() if key[0] in dead or key[1] in dead]: del cell_data[key]
+		self.__dead = set()
+		self.__swept = len(cell_data)
+	
+	def __remap(self, side:int, mapping:dict):
+		""" Move the cells keyed by nodes in the mapping to the nodes they map to, combining as need be. """
+		cell_data = self.cell_data
+		for key in [key for key in cell_data.keys() if key[side] in mapping]:
+			value = cell_data.pop(key)
+			new_key = (mapping[key[0]], key[1]) if side == 0 else (key[0], mapping[key[1]])
+			cell_data[new_key] = _combine(cell_data[new_key], value) if new_key in cell_data else value
+	
+	def __graft(self, shape:static.CompoundShapeDefinition, parent:InternalNode, label, source:Node, mapping:dict):
+		""" Find (or make) the child of `parent` to take over from `source`, and likewise all the way down. """
+		census = parent.census
+		if census is None and isinstance(shape, static.TreeDefinition):
+			census = parent.census = Census.policy(self.environment, shape.cursor_key)
+		if census: label = census.place(label)
+		within = shape.descend(label)
+		try: target = parent.children[label]
+		except KeyError: target = parent.children[label] = node_factory.visit(within)
+		if isinstance(source, LeafNode) or isinstance(within, static.MeasureDefinition): mapping[source] = target
+		else:
+			for child_label, child in source.children.items(): self.__graft(within, target, child_label, child, mapping)
+	
+	# Bulk operations for whole streams of data. These behave like `incr`, except that
+	# a record which cannot be placed gets handed to the `reject` callback (along with
+	# the exception that explains why) rather than aborting the whole job.
+	
+	def ingest_records(self, records:Iterable[Mapping], axis_map:Mapping[str, str], value_field:Optional[str], *, chunk_size:int=10000, convert:Callable=None, reject:Callable=None, measure:str=None) -> IngestReport:
+		"""
+		Feed a stream of records (e.g. from `csv.DictReader`) into the canvas.
+		`axis_map` goes from canvas axis keys to record field names. Each record
+		contributes `record[value_field]` (passed through `convert` if given),
+		or just one if `value_field` is None. Beneath a :measure, the values count
+		toward the `measure` named, which is by default the value field's name.
+		
+		Records are taken a chunk at a time and pre-aggregated by coordinate,
+		so each distinct coordinate in a chunk finds its key path only once.
+		An ordinal of None (from an SQL NULL, or a short CSV row) is invalid.
+		"""
+		self.__writable()
+		return _ingest(records, axis_map, value_field, chunk_size, convert, reject, measure, self.__recipe, self.__place)
+	
+	def ingest_csv(self, source, axis_map:Mapping[str, str], value_field:Optional[str]=None, *, convert:Callable=float, encoding='utf-8', dialect='excel', **kwargs) -> IngestReport:
+		"""
+		Convenience wrapper around `ingest_records` for a CSV file with a header line.
+		`source` may be a path or an open text file. CSV fields are all text, so the
+		value field (if any) goes through `convert`, which defaults to `float`.
+		"""
+		if isinstance(source, (str, os.PathLike)):
+			with open(source, newline='', encoding=encoding) as fh:
+				return self.ingest_csv(fh, axis_map, value_field, convert=convert, dialect=dialect, **kwargs)
+		if value_field is None: convert = None
+		return self.ingest_records(csv.DictReader(source, dialect=dialect), axis_map, value_field, convert=convert, **kwargs)
+	
+	def ingest_query(self, connection, sql:str, axis_columns=None, value_column:Optional[str]=None, *, parameters=(), chunk_size:int=10000, reject:Callable=None) -> IngestReport:
+		"""
+		Let the database do the aggregation: The query `sql` gets wrapped in a GROUP BY
+		over the axis columns, so only distinct coordinates come back to be placed.
+		`axis_columns` may map axis keys to column names, or simply list column names which
+		are also axis keys. If not given, the query's columns named in `self.space` are used.
+		Each coordinate gets the SUM of `value_column` (ignoring NULLs) or else a COUNT(*).
+		A canvas with a :measure wants more than sums, so then the rows come back ungrouped.
+		
+		Any DB-API connection should do, provided it understands double-quoted identifiers
+		and derived tables. The `sqlite3` module in the standard library certainly does.
+		Rejected rows come back as tuples of the axis columns followed by the total.
+		A NULL in an axis column is an invalid ordinal, so those rows are rejected.
+		"""
+		def quote(name): return '"%s"' % name.replace('"', '""')
+		def fetch(query):
+			cursor = connection.cursor()
+			try:
+				cursor.execute(query, parameters)
+				while True:
+					batch = cursor.fetchmany(chunk_size)
+					if not batch: break
+					yield from batch
+			finally: cursor.close()
+		
+		derived = '(%s) AS q' % sql.strip().rstrip(';')
+		if axis_columns is None:
+			cursor = connection.cursor()
+			try:
+				cursor.execute('SELECT * FROM %s WHERE 1=0' % derived, parameters)
+				axis_columns = [d[0] for d in cursor.description if d[0] in self.space]
+			finally: cursor.close()
+		if isinstance(axis_columns, Mapping): axis_map = dict(axis_columns)
+		else: axis_map = {column: column for column in axis_columns}
+		if not axis_map: raise ValueError("No axis columns to group by.")
+		
+		columns = ', '.join(quote(column) for column in axis_map.values())
+		if self.__recipe:
+			if value_column is None: query = 'SELECT %s, 1 FROM %s' % (columns, derived)
+			else: query = 'SELECT %s, %s FROM %s WHERE %s IS NOT NULL' % (columns, quote(value_column), derived, quote(value_column))
+		elif value_column is None: query = 'SELECT %s, COUNT(*) FROM %s GROUP BY %s' % (columns, derived, columns)
+		else: query = 'SELECT %s, SUM(%s) FROM %s WHERE %s IS NOT NULL GROUP BY %s' % (columns, quote(value_column), derived, quote(value_column), columns)
+		positions = {key: i for i, key in enumerate(axis_map)}
+		return self.ingest_records(fetch(query), positions, len(positions), chunk_size=chunk_size, reject=reject, measure=value_column)
+	
+	def __place(self, point, total, tally:Optional[aggregates.Tally], weight):
+		""" Put one coordinate's contribution where it belongs, or raise without having changed anything. """
+		keeps = self.check(point)
+		if not keeps and total is None: raise TypeError("Only a :measure can take values other than numbers.")
+		self.deposit(self.key_pair(point, weight, checked=True), total, tally)
 	
 	# It's sometimes necessary to remove rows and/or columns that are, for instance, all zero or nearly so.
 	# The relevant
@@ -74,129 +767,258 @@ class Canvas:
 	# Since all the cosmetic surgery is performed in the language, it's therefore all represented in
 	# the .definition object, and thus we can proceed on to plotting.
 	
-	def plot(self, workbook, sheet, top_row_index:int, left_column_index:int, blank=None):
-		""" Argument order (row/column) is here consistent with xlsxwriter. """
-		
-		background_format = self.cub_module.styles[self.definition.background_style]
-		
-		def find_format():
-			"""
-			For styling, the concept is simple enough: You take the margin styles as a background and then overlay
-			that with any extra bits that are specified in the canvas definition as style rules.
-			"""
-			col_style = col_margin.style_index
-			row_style = row_margin.style_index
-			col_cls = col_node.style_class
-			row_cls = row_node.style_class
-			fmt_key = col_style, row_style, col_cls, row_cls
-			try: return style_cache[fmt_key]
-			except:
-				styles = self.cub_module.styles
-				rules = self.definition.style_rules
-				bits = dict(background_format)
-				bits.update(styles[row_style])
-				bits.update(styles[col_style])
-				for i in skin.select(col_cls, row_cls):
-					bits.update(styles[rules[i].payload])
-				it = style_cache[fmt_key] = workbook.add_format(bits)
-				return it
-			pass
-		
-		def template(index, yon:static.Marginalia):
-			if isinstance(index, int):
-				them = yon.texts
-				if index < len(them): return them[index]
-				else: return formulae.THE_NOTHING
-		
-		def compete(a:Optional[static.Hint], b:Optional[static.Hint]):
-			if a is None: return b
-			if b is None: return a
-			if b.priority > a.priority: return b
-			return a
-		
-		def find_formula():
-			"""
-			Determining which hint applies is a bit more of a trick.
-			First, if there's a patch defined which applies, then it takes priority.
-			Otherwise, if a margin's "hint" field contains an integer, that's a
-			reference to the OTHER axis's corresponding list of margin templates.
-			Next, one margin.hint may supply a specific hint to use (with priority)
-			"""
-			cf, rf = col_margin.hint, row_margin.hint
-			if 'gap' in (cf, rf): return None
-			formula = check_patch()
-			if formula is None: formula = template(cf, row_margin)
-			if formula is None: formula = template(rf, col_margin)
-			if formula is None: formula = compete(cf, rf)
-			if formula is None: return self.cell_data.get((col_node, row_node), blank)
-			return FormulaInterpreter(cursor, self).visit(formula)
-		
-		def check_patch():
-			patch_key = col_node.formula_class, row_node.formula_class
-			try: return formula_cache[patch_key]
-			except KeyError:
-				candidates = patch.select(*patch_key)
-				if candidates:
-					winning_patch_index = candidates[-1]
-					winning_rule = self.definition.formula_rules[winning_patch_index]
-					winning_formula = winning_rule.payload
-				else:
-					winning_formula = None
-				it = formula_cache[patch_key] = winning_formula
-				return it
+	def plot(self, workbook, sheet, top_row_index:int, left_column_index:int, blank=None, *, evaluate=False, values_only=False, subtotal_refs=True, sparse=False, hoist_formats=False):
+		"""
+		Argument order (row/column) is here consistent with xlsxwriter.
+		
+		With `evaluate`, formulas are also computed here in Python and the results
+		written alongside as cached values, so that readers which do not recalculate
+		(LibreOffice on load, pandas, openpyxl...) see numbers rather than zeros.
+		With `values_only`, the computed values are written instead of the formulas.
+		Formulas beyond the evaluator's vocabulary are written as formulas regardless.
+		
+		With `subtotal_refs` (the default) a summation refers to any already-plotted cells
+		which hold the sums of parts of its data, rather than to all that data again.
 		
+		With `sparse`, blank cells are not written at all unless their format shows
+		on a blank cell (borders, fills, and so forth), and everything else is written
+		with the specific xlsxwriter method for its kind. Text then stays text, even if
+		it happens to look like a formula or a URL. Sparse canvases plot faster and
+		make smaller files this way.
+		
+		With `hoist_formats`, a row (or else column) where most cells share a format
+		gets that format once, as the row's (or column's) own, and those cells inherit it.
+		Only the exceptions carry a format of their own. Blank cells which inherit are not
+		written at all. Bear in mind that a row or column format reaches beyond the edges
+		of the canvas.
+		"""
+		renderer = Renderer(self, top_row_index, left_column_index, blank)
+		self.__check_fit(renderer, top_row_index, xl_schema.MAX_ROWS, 'rows', 'Perhaps try `plot_pages` instead.')
+		self.__check_fit(renderer, left_column_index, xl_schema.MAX_COLUMNS, 'columns')
+		pages = Pagination(self.down, top_row_index, None)
+		self.__plot(workbook, lambda page:sheet, renderer, pages, evaluate=evaluate, values_only=values_only, subtotal_refs=subtotal_refs, sparse=sparse, hoist_formats=hoist_formats)
+	
+	def plot_pages(self, workbook, name:str, top_row_index:int, left_column_index:int, blank=None, *, row_limit:int=xl_schema.MAX_ROWS, **kwargs) -> list:
+		"""
+		Like `plot`, but if the canvas is too tall for one worksheet, then spread it over several.
+		The first is called `name`, and later ones get a number in parentheses after the name.
+		They're added to the workbook only as needed, and each is finished before the next begins.
+		
+		Pages break at the boundaries of the biggest subtrees that will fit. Headings (whatever
+		comes before the main body of rows) repeat on every page. Whatever comes after goes on
+		the last page. Formulas refer across pages as necessary. See `Pagination` for details.
+		
+		Keyword arguments are as for `plot`. The answer is the list of worksheets.
+		"""
+		renderer = Renderer(self, top_row_index, left_column_index, blank)
+		self.__check_fit(renderer, left_column_index, xl_schema.MAX_COLUMNS, 'columns')
+		pages = Pagination(self.down, top_row_index, row_limit)
+		names = pages.names(name)
+		sheets = []
+		def open_sheet(page):
+			while len(sheets) <= page: sheets.append(workbook.add_worksheet(names[len(sheets)]))
+			return sheets[page]
+		self.__plot(workbook, open_sheet, renderer, pages, **kwargs)
+		return sheets
+	
+	def __check_fit(self, renderer:"Renderer", origin:int, limit:int, what:str, advice:str=''):
+		direction = self.down if what == 'rows' else self.across
+		extent = origin + _span(direction.tree)
+		if extent > limit: raise SheetLimitError(' '.join(filter(None, ['This canvas needs %d %s, but a worksheet has only %d.'%(extent, what, limit), advice])))
+	
+	def __plot(self, workbook, open_sheet:Callable, renderer:"Renderer", pages:"Pagination", *, evaluate=False, values_only=False, subtotal_refs=True, sparse=False, hoist_formats=False):
+		"""
+		The common part of `plot` and `plot_pages`. The renderer has already planned the layout,
+		and the pagination knows which rows go on which page; `open_sheet` supplies the worksheets.
+		"""
 		def ops(index):
 			level, hidden, collapsed = self.cub_module.outlines[index]
 			return {'level':level, 'hidden':hidden, 'collapsed':collapsed}
 		
-		style_cache = {}
-		formula_cache = {}
-		skin = veneer.CrossClassifier(self.definition.style_rules, self.across.space, self.down.space)
-		patch = veneer.CrossClassifier(self.definition.formula_rules, self.across.space, self.down.space)
-		self.across.plan(Cartographer(left_column_index, skin.across, patch.across))
-		self.down.plan(Cartographer(top_row_index, skin.down, patch.down))
-		cursor = {}
-		tour = LeafTour(cursor)
-		# Set all the widths etc.
-		for col_node in tour.visit(self.across):
-			assert isinstance(col_node, LeafNode)
-			col_margin = col_node.margin
-			sheet.set_column(col_node.begin, col_node.begin, col_margin.width, options=ops(col_margin.outline_index))
-		
-		# Set all the heights etc. and plot all the data.
-		for row_node in tour.visit(self.down):
-			assert isinstance(row_node, LeafNode)
-			row_margin = row_node.margin
-			sheet.set_row(row_node.begin, row_margin.height, options=ops(row_margin.outline_index))
-			
-			for col_node in tour.visit(self.across):
+		def find_format(fmt_key):
+			try: return formats[fmt_key]
+			except KeyError:
+				it = formats[fmt_key] = workbook.add_format(renderer.style_bits(fmt_key))
+				return it
+		
+		def write(sheet, row, col, content, item, fmt, cursor):
+			formula = is_formula(content)
+			if evaluator is not None and formula:
+				try: value = evaluator.formula(content, cursor)
+				except calculator.Unevaluable: pass
+				else:
+					if not values_only: return sheet.write_formula(row, col, item, fmt, value)
+					item, formula = value, False
+			if not sparse: sheet.write(row, col, item, fmt)
+			elif formula: sheet.write_formula(row, col, item, fmt)
+			elif isinstance(item, str): sheet.write_string(row, col, item, fmt)
+			elif isinstance(item, Number) and not isinstance(item, bool): sheet.write_number(row, col, item, fmt)
+			else: sheet.write(row, col, item, fmt)
+		
+		def start_page(page):
+			""" Set all the widths etc. and repeat any headings. """
+			pages.current = page
+			sheet = open_sheet(page)
+			for col_node in LeafTour({}).visit(self.across):
 				assert isinstance(col_node, LeafNode)
 				col_margin = col_node.margin
-				sheet.write(row_node.begin, col_node.begin, find_formula(), find_format())
-			pass
+				col_key = hoisted_columns.get(col_node)
+				col_fmt = None if col_key is None else find_format(col_key)
+				sheet.set_column(col_node.begin, col_node.begin, col_margin.width, col_fmt, options=ops(col_margin.outline_index))
+			for row_node, row_cursor in headings: plot_row(sheet, row_node.begin, row_node, row_cursor)
+			return sheet
+		
+		def plot_row(sheet, row, row_node, row_cursor):
+			""" Set the height etc. and plot all the data. """
+			row_margin = row_node.margin
+			row_key = renderer.row_style(row_node) if hoist_formats else None
+			row_fmt = None if row_key is None else find_format(row_key)
+			row_identity = None if row_key is None else renderer.style_identity(row_key)
+			sheet.set_row(row, row_margin.height, row_fmt, options=ops(row_margin.outline_index))
+			for col_node in LeafTour(row_cursor).visit(self.across):
+				assert isinstance(col_node, LeafNode)
+				content = renderer.boilerplate(col_node, row_node)
+				item = renderer.interpret(content, col_node, row_node, row_cursor)
+				# A cell with no format of its own takes that of its row, or else its column.
+				fmt_key = renderer.format_key(col_node, row_node)
+				col_key = hoisted_columns.get(col_node)
+				default = row_identity if row_key is not None else None if col_key is None else renderer.style_identity(col_key)
+				inherited = default is not None and renderer.style_identity(fmt_key) == default
+				if sparse and (item is None or item == ''):
+					if inherited or (default is None and not renderer.shows_blank(col_node, row_node)): continue
+				fmt = None if inherited else find_format(fmt_key)
+				write(sheet, row, col_node.begin, content, item, fmt, row_cursor)
+		
+		formats = {}
+		renderer.address = pages.address
+		if subtotal_refs:
+			renderer.subtotals = Subtotals()
+			renderer.subtotals.address = pages.address
+		evaluator = Evaluator(renderer) if evaluate or values_only else None
+		hoisted_columns = {}
+		if hoist_formats:
+			for col_node in LeafTour({}).visit(self.across):
+				col_key = renderer.column_style(col_node)
+				if col_key is not None: hoisted_columns[col_node] = col_key
+		
+		cursor = {}
+		headings = [] # Rows (with their cursors) to repeat at the top of every page
+		sheet, page = None, -1
+		for row_node in PlanTour(cursor).visit(self.down):
+			assert isinstance(row_node, LeafNode)
+			where, row = pages.locate(row_node.begin)
+			if where is None:
+				headings.append((row_node, dict(cursor)))
+				continue
+			while page < where:
+				page += 1
+				sheet = start_page(page)
+			plot_row(sheet, row, row_node, cursor)
+		while page < pages.last:
+			page += 1
+			start_page(page)
 		
 		# Plot all merge cells rules. This is done literally in order of merge rules.
 		# Formats on the merge cells are computed the same way as those on regular cells.
 		for spec in self.definition.merge_specs:
 			across = spec.selection.projection(self.across.space)
 			for row_node in self.down.tour_merge(cursor, spec.selection.projection(self.down.space)):
-				row_margin = row_node.margin
-				top,bottom = row_node.begin, row_node.end()
-				for col_node in self.across.tour_merge(cursor, across):
-					col_margin = col_node.margin
-					left,right = col_node.begin, col_node.end()
-					item = FormulaInterpreter(cursor, self).visit(spec.payload)
-					if top==bottom and left==right: sheet.write(top, left, item, find_format())
-					else: sheet.merge_range(top, left, bottom, right, item, find_format())
+				for page, top, bottom in pages.spans(row_node.begin, row_node.end()):
+					pages.current = page
+					sheet = open_sheet(page)
+					for col_node in self.across.tour_merge(cursor, across):
+						left,right = col_node.begin, col_node.end()
+						item = FormulaInterpreter(cursor, self, renderer.subtotals, pages.address).visit(spec.payload)
+						fmt = find_format(renderer.format_key(col_node, row_node))
+						if top==bottom and left==right: write(sheet, top, left, spec.payload, item, fmt, cursor)
+						else:
+							sheet.merge_range(top, left, bottom, right, item, fmt)
+							if evaluator is not None and is_formula(spec.payload): write(sheet, top, left, spec.payload, item, fmt, cursor)
 		pass
 	
+	
+	def render_window(self, rows:range, columns:range=None, *, evaluate=False) -> Window:
+		"""
+		Render just a block of the canvas as it would plot at the top left of a worksheet, but
+		without any workbook: say, for a preview. By default, the block is as wide as the canvas.
+		The plan gets made on the first call and kept for later windows, until more data arrive or
+		the canvas is plotted. With `evaluate`, formulas come out as their values wherever those can be
+		worked out here. Summations never refer to subtotals, as there's no telling which cells came first.
+		"""
+		plan = self.__window
+		if plan is None or plan.renderer is not self.planned_by: plan = self.__window = WindowPlan(self)
+		return plan.render(rows, range(plan.width) if columns is None else columns, evaluate)
+	
+	def estimate(self, top_row_index:int=0, left_column_index:int=0) -> Estimate:
+		"""
+		Plan the canvas, but instead of plotting it, predict how big the job will be.
+		
+		Cells with the same margins and the same formula class on both axes get the same
+		boilerplate. So it's enough to interpret one representative of each such group
+		and multiply. The representative is the last of its group, which has the longest
+		cell addresses. Formula lengths come out as if without `subtotal_refs`, so they're
+		generous for a summary over a deep hierarchy.
+		"""
+		self.sweep()
+		renderer = Renderer(self, top_row_index, left_column_index, None)
+		def groups(direction):
+			found, cursor = {}, {}
+			for leaf in PlanTour(cursor).visit(direction):
+				key = id(leaf.margin), leaf.formula_class
+				count = found[key][1] if key in found else 0
+				found[key] = (leaf, dict(cursor)), count + 1 # The last has the longest addresses.
+			return list(found.values())
+		columns, rows = groups(self.across), groups(self.down)
+		data = formula_cells = formula_chars = longest = text_cells = text_chars = blanks = 0
+		for (col_node, col_cursor), col_count in columns:
+			for (row_node, row_cursor), row_count in rows:
+				count = col_count * row_count
+				content = renderer.boilerplate(col_node, row_node)
+				if content is None:
+					data += count
+					continue
+				item = renderer.interpret(content, col_node, row_node, {**row_cursor, **col_cursor})
+				if is_formula(content):
+					formula_cells += count
+					formula_chars += len(item) * count
+					longest = max(longest, len(item))
+				elif item is None or item == '': blanks += count
+				else:
+					text_cells += count
+					text_chars += len(str(item)) * count
+		populated = min(len(self.cell_data), data)
+		blanks += data - populated
+		
+		kinds = lambda direction: {(leaf.margin.style_index, leaf.style_class) for leaf in LeafTour({}).visit(direction)}
+		formats = {renderer.style_identity((c[0], r[0], c[1], r[1])) for c in kinds(self.across) for r in kinds(self.down)}
+		
+		width, height = _span(self.across.tree), _span(self.down.tree)
+		memory = (
+			populated * Estimate.NUMBER_COST + blanks * Estimate.BLANK_COST
+			+ formula_cells * Estimate.FORMULA_COST + formula_chars
+			+ text_cells * Estimate.TEXT_COST + text_chars
+		)
+		fits = (
+			top_row_index + height <= xl_schema.MAX_ROWS
+			and left_column_index + width <= xl_schema.MAX_COLUMNS
+			and longest <= xl_schema.MAX_FORMULA
+		)
+		return Estimate(
+			rows=height, columns=width, cells=width*height, populated=populated, formats=len(formats),
+			formula_cells=formula_cells, formula_chars=formula_chars, longest_formula=longest,
+			memory=memory, constant_memory=width * Estimate.TEXT_COST, fits=fits,
+		)
+	
+	def data_index(self, cursor, selection:formulae.Selection):
+		""" The column and row positions of DATA cells where all criteria are met, as runs. """
+		assert selection.criteria.keys() <= self.space, '%r not found among %r'%(selection.criteria.keys() - self.space, self.space)
+		return self.across.data_index(cursor, selection), self.down.data_index(cursor, selection)
+	
 	def data_range(self, cursor, selection:formulae.Selection):
 		"""
 		All the DATA cells where all criteria are met, as a list of ranges or cells (or just a zero)
 		"""
-		assert selection.criteria.keys() <= self.space, '%r not found among %r'%(selection.criteria.keys() - self.space, self.space)
-		columns = self.across.data_index(cursor, selection)
-		rows = self.down.data_index(cursor, selection)
+		columns, rows = self.data_index(cursor, selection)
 		if rows and columns:
 			return [utility.make_range(c, r) for c in columns for r in rows]
 		else:
@@ -206,15 +1028,678 @@ class Canvas:
 		""" DTSTTCPW dictates this means of exposing data zones to the application. """
 		return self.definition.zones[key]
 
+class CanvasGroup:
+	"""
+	Several canvases fed from the same data, which pay for finding key paths only once.
+	
+	Canvases often differ only in what they show of the same axes: one has regions down and
+	months across, another has months down and regions across, a third shows a different
+	measure. The group gives canvases whose shapes agree (see `_skeleton`) the same layout
+	trees, so a point finds its way down each distinct tree just once however many canvases
+	use it. Then its value goes into every canvas, just as if you'd called each one's `incr`.
+	
+	Feed the members only through the group: a cardinality policy on a shared tree must see
+	each point just once. Read, plot, and so forth with each canvas as usual. Plotting one
+	member re-plans the shared trees, so that spoils any other member's `render_window` plan.
+	"""
+	def __init__(self, cub_module:static.CubModule, identifiers:Iterable[str], environment:runtime.Environment):
+		self.trees = {} # By skeleton, each a layout tree with its rolling windows
+		self.plans = [None] # The members' `planned_by`
+		self.canvases = {}
+		for identifier in identifiers: self.canvases[identifier] = Canvas(cub_module, identifier, environment, group=self)
+		self.__recipes = [(canvas, canvas.batch().recipe) for canvas in self.canvases.values()]
+		self.__recipe = {}
+		for canvas, recipe in self.__recipes:
+			for measure, kinds in recipe.items():
+				mine = self.__recipe.setdefault(measure, [])
+				mine.extend(kind for kind in kinds if kind not in mine)
+	
+	def __getitem__(self, identifier:str) -> Canvas: return self.canvases[identifier]
+	
+	def __check(self, point, total=0, taken=False, met:list=None):
+		""" Every canvas must accept the point before any tree grows, so a bad point goes nowhere. """
+		checked = {}
+		for canvas, recipe in self.__recipes:
+			keeps = canvas.check(point, checked, met)
+			if keeps and taken: raise TypeError("There is no taking back from a :measure; minimum and maximum do not subtract.")
+			if total is None and not keeps: raise TypeError("Only a :measure can take values other than numbers.")
+	
+	def __place(self, point, total, tally:Optional[aggregates.Tally], weight, taken=False):
+		self.__check(point, total, taken)
+		self.__put(point, total, tally, weight)
+	
+	def __put(self, point, total, tally:Optional[aggregates.Tally], weight):
+		""" Into every canvas, once checked. Each canvas gets a tally of its own. """
+		resolved = {}
+		pairs = [canvas.key_pair(point, weight, resolved, checked=True) for canvas, recipe in self.__recipes]
+		for (canvas, recipe), pair in zip(self.__recipes, pairs):
+			canvas.deposit(pair, total, None if tally is None else _portion(tally, recipe))
+	
+	def poke(self, point, value):
+		self.__check(point)
+		resolved = {}
+		pairs = [canvas.key_pair(point, 1, resolved, checked=True) for canvas, recipe in self.__recipes]
+		for (canvas, recipe), pair in zip(self.__recipes, pairs): canvas.cell_data[pair] = value
+	
+	def incr(self, point, value, measure:str=None):
+		""" As for `Canvas.incr`, but into every canvas of the group. """
+		tally = None
+		if self.__recipe:
+			tally = aggregates.Tally()
+			for name, each in (value.items() if isinstance(value, Mapping) else [(measure, value)]):
+				kinds = self.__recipe.get(name)
+				if kinds: tally.add(name, each, kinds)
+		if isinstance(value, Number): self.__place(point, value, tally, value)
+		else: self.__place(point, None, tally, 1)
+	
+	def decr(self, point, value):
+		self.__place(point, -value, None, 0, True)
+	
+	def batch(self) -> Batch:
+		""" An empty `Batch` suited to every canvas of the group. """
+		return Batch(self.__recipe)
+	
+	def apply(self, batch:Batch, reject:Callable=None):
+		""" As for `Canvas.apply`, but into every canvas of the group: all points get checked before any goes in. """
+		totals, tallies = batch.totals, batch.tallies
+		good = []
+		for key in totals.keys() | tallies.keys():
+			point, met = dict(key), []
+			total = None if key in batch.unsummed else totals.get(key) # So that a canvas without a :measure there refuses it.
+			try: self.__check(point, total, key in batch.taken, met)
+			except (KeyError, TypeError) as e:
+				if reject is None: raise
+				reject(point, e)
+			else: good.append((point, met, (key, total)))
+		for point, met, (key, total) in _in_windows(good, reject):
+			weight = totals.get(key)
+			self.__put(point, total, tallies.get(key), 1 if weight is None else weight)
+	
+	def ingest_records(self, records:Iterable[Mapping], axis_map:Mapping[str, str], value_field:Optional[str], *, chunk_size:int=10000, convert:Callable=None, reject:Callable=None, measure:str=None) -> IngestReport:
+		""" As for `Canvas.ingest_records`, but into every canvas of the group. The axis map covers them all. """
+		return _ingest(records, axis_map, value_field, chunk_size, convert, reject, measure, self.__recipe, self.__place)
+	
+	ingest_csv = Canvas.ingest_csv # It needs only `ingest_records`, which works alike here.
+
+
+def _ingest(records:Iterable[Mapping], axis_map:Mapping[str, str], value_field, chunk_size:int, convert, reject, measure, recipe:dict, place:Callable) -> IngestReport:
+	"""
+	The part of `Canvas.ingest_records` that doesn't care where the data goes: `place(point, total, tally, weight)`
+	puts each distinct coordinate's contribution wherever it belongs, raising `KeyError` or `TypeError` if it can't,
+	without having changed anything.
+	"""
+	axes = list(axis_map.items())
+	if measure is None and isinstance(value_field, str): measure = value_field
+	started = time.perf_counter()
+	rows = rejected = 0
+	for chunk in utility.chunked(records, chunk_size):
+		rows += len(chunk)
+		rejected += _ingest_chunk(chunk, axes, value_field, convert, reject, measure, recipe, place)
+	return IngestReport(rows, rejected, time.perf_counter() - started)
+
+def _ingest_chunk(chunk:list, axes:list, value_field, convert, reject, measure, recipe:dict, place:Callable) -> int:
+	""" Returns the number of rejected records. """
+	given = {} # By coordinate, the (index, value) of each record there.
+	errors = {} # By index into the chunk, why that record was rejected.
+	for index, record in enumerate(chunk):
+		try:
+			coordinate = tuple(record[field] for key, field in axes)
+			if None in coordinate: raise runtime.InvalidOrdinalError(axes[coordinate.index(None)][0], None)
+			value = 1 if value_field is None else record[value_field]
+			if convert is not None: value = convert(value)
+			if coordinate in given: given[coordinate].append((index, value))
+			else: given[coordinate] = [(index, value)]
+		except (KeyError, ValueError, TypeError) as e:
+			errors[index] = e
+	
+	kinds = recipe.get(measure)
+	point = {}
+	for coordinate, entries in given.items():
+		total, tally, weight = _contribution(entries, measure, kinds, errors)
+		if not entries: continue
+		point.update(zip((key for key, field in axes), coordinate))
+		try: place(point, total, tally, weight)
+		except (KeyError, TypeError) as e:
+			for index, value in entries: errors[index] = e
+	
+	if reject is not None:
+		for index in sorted(errors): reject(chunk[index], errors[index])
+	return len(errors)
+
+def _in_windows(good:list, reject:Optional[Callable]) -> list:
+	"""
+	For `apply`: The points of a batch go in no particular order, so a rolling window can move on partway
+	through. Whatever the newest of the batch would expire is refused now, rather than by surprise halfway.
+	Each of `good` is a triple of the point, the windows it met (from `Canvas.check`), and whatever else.
+	"""
+	newest = {}
+	for point, met, _ in good:
+		for rolling, key, ordinal in met:
+			if rolling not in newest or newest[rolling] < ordinal: newest[rolling] = ordinal
+	if not newest: return good
+	kept = []
+	for point, met, rest in good:
+		try:
+			for rolling, key, ordinal in met:
+				if ordinal < newest[rolling] - rolling.span: raise runtime.ExpiredOrdinalError(key, ordinal)
+		except runtime.ExpiredOrdinalError as e:
+			if reject is None: raise
+			reject(point, e)
+		else: kept.append((point, met, rest))
+	return kept
+
+def _contribution(entries:list, measure, kinds, errors:dict):
+	"""
+	Sum and tally the values at one coordinate, as (total, tally, weight). Only numbers get summed:
+	if there's anything else, the total is None, and each of those weighs one, as with `Canvas.incr`.
+	A value which won't go gets its record rejected (and taken out of `entries`), and the rest start
+	over, so that nothing of a rejected record stays in either the total or the tally.
+	"""
+	while True:
+		total, others = 0, 0
+		tally = aggregates.Tally() if kinds else None
+		for position, (index, value) in enumerate(entries):
+			try:
+				if tally is not None: tally.add(measure, value, kinds)
+				if isinstance(value, Number): total += value
+				else: others += 1
+			except (ValueError, TypeError, ArithmeticError) as e:
+				errors[index] = e
+				del entries[position]
+				break
+		else: return (None if others else total), tally, total + others
+
+def _combine(a, b):
+	""" The data of two cells put together, as when folding one into the other. """
+	return a + b
+
+_NOTHING_ELSE = object()
+
+def _template(index, yon:static.Marginalia):
+	if isinstance(index, int):
+		them = yon.texts
+		if index < len(them): return them[index]
+		else: return formulae.THE_NOTHING
+
+def _compete(a:Optional[static.Hint], b:Optional[static.Hint]):
+	if a is None: return b
+	if b is None: return a
+	if b.priority > a.priority: return b
+	return a
+
+def is_formula(content) -> bool:
+	return isinstance(content, formulae.Formula)
+
+class Renderer:
+	"""
+	The workbook-independent half of plotting: Plan a canvas at a given origin,
+	and then be able to say which formatting and which boilerplate belong in
+	any given cell. Plotting proper just carries the answers out to xlsxwriter.
+	"""
+	def __init__(self, canvas:Canvas, top_row_index:int, left_column_index:int, blank=None):
+		self.canvas = canvas
+		self.blank = blank
+		definition = canvas.definition
+		self.skin = veneer.CrossClassifier(definition.style_rules, canvas.across.space, canvas.down.space)
+		self.patch = veneer.CrossClassifier(definition.formula_rules, canvas.across.space, canvas.down.space)
+		canvas.across.plan(Cartographer(left_column_index, self.skin.across, self.patch.across))
+		canvas.down.plan(Cartographer(top_row_index, self.skin.down, self.patch.down))
+		canvas.planned_by = self
+		self.__background = canvas.cub_module.styles[definition.background_style]
+		self.__style_cache = {}
+		self.__patch_cache = {}
+		self.__plain = {}
+		self.__template_shapes = {}
+		self.__column_templates = {}
+		self.__row_templates = {}
+		self.__template_row = None
+		self.__shows_blank = {}
+		self.__kinds = {}
+		self.__prevailing_cache = {}
+		self.__identity = {}
+		self.subtotals = None # Set this to a `Subtotals` object to refer to them in later formulas.
+		self.address = utility.make_range # How to refer to a block of cells from the current cell.
+	
+	@staticmethod
+	def format_key(col_node:LeafNode, row_node:LeafNode):
+		return col_node.margin.style_index, row_node.margin.style_index, col_node.style_class, row_node.style_class
+	
+	def style_bits(self, fmt_key) -> dict:
+		"""
+		For styling, the concept is simple enough: You take the margin styles as a background and then overlay
+		that with any extra bits that are specified in the canvas definition as style rules.
+		"""
+		try: return self.__style_cache[fmt_key]
+		except KeyError:
+			col_style, row_style, col_cls, row_cls = fmt_key
+			styles = self.canvas.cub_module.styles
+			rules = self.canvas.definition.style_rules
+			bits = dict(self.__background)
+			bits.update(styles[row_style])
+			bits.update(styles[col_style])
+			for i in self.skin.select(col_cls, row_cls):
+				bits.update(styles[rules[i].payload])
+			it = self.__style_cache[fmt_key] = bits
+			return it
+	
+	def row_style(self, row_node:LeafNode) -> Optional[tuple]:
+		""" If at least half the cells in this row share a style, then a format key for that style. """
+		return self.__prevailing(row_node, self.canvas.across, lambda c,r:(c[0], r[0], c[1], r[1]))
+	
+	def column_style(self, col_node:LeafNode) -> Optional[tuple]:
+		""" If at least half the cells in this column share a style, then a format key for that style. """
+		return self.__prevailing(col_node, self.canvas.down, lambda r,c:(c[0], r[0], c[1], r[1]))
+	
+	def __prevailing(self, node:LeafNode, crosswise:"Direction", compose) -> Optional[tuple]:
+		"""
+		A cell's style depends only on the style index and style class of its row and column.
+		So it's enough to tally the distinct such pairs from the crosswise direction.
+		"""
+		kind = node.margin.style_index, node.style_class
+		key = id(crosswise), kind
+		try: return self.__prevailing_cache[key]
+		except KeyError: pass
+		try: others = self.__kinds[id(crosswise)]
+		except KeyError:
+			others = self.__kinds[id(crosswise)] = collections.Counter((leaf.margin.style_index, leaf.style_class) for leaf in LeafTour({}).visit(crosswise))
+		tally, example = collections.Counter(), {}
+		for other, count in others.items():
+			fmt_key = compose(other, kind)
+			identity = self.style_identity(fmt_key)
+			tally[identity] += count
+			example.setdefault(identity, fmt_key)
+		it = None
+		if tally:
+			identity, count = tally.most_common(1)[0]
+			if 2 * count >= sum(others.values()): it = example[identity]
+		self.__prevailing_cache[key] = it
+		return it
+	
+	def style_identity(self, fmt_key) -> tuple:
+		""" Different format keys can come to the same style bits. This tells when. """
+		try: return self.__identity[fmt_key]
+		except KeyError:
+			it = self.__identity[fmt_key] = tuple(sorted(self.style_bits(fmt_key).items()))
+			return it
+	
+	def shows_blank(self, col_node:LeafNode, row_node:LeafNode) -> bool:
+		""" Would a blank cell here look any different from no cell at all? """
+		fmt_key = self.format_key(col_node, row_node)
+		try: return self.__shows_blank[fmt_key]
+		except KeyError:
+			bits = self.style_bits(fmt_key)
+			it = self.__shows_blank[fmt_key] = any(bits.get(k, inert) != inert for k, inert in xl_schema.BLANK_CELL_PROPERTIES.items())
+			return it
+	
+	def boilerplate(self, col_node:LeafNode, row_node:LeafNode):
+		"""
+		Determining which hint applies is a bit more of a trick.
+		First, if there's a patch defined which applies, then it takes priority.
+		Otherwise, if a margin's "hint" field contains an integer, that's a
+		reference to the OTHER axis's corresponding list of margin templates.
+		Next, one margin.hint may supply a specific hint to use (with priority).
+		If nothing applies, the answer is None: the cell shows data.
+		"""
+		cf, rf = col_node.margin.hint, row_node.margin.hint
+		if 'gap' in (cf, rf): return formulae.THE_NOTHING
+		content = self.__check_patch(col_node.formula_class, row_node.formula_class)
+		if content is None: content = _template(cf, row_node.margin)
+		if content is None: content = _template(rf, col_node.margin)
+		if content is None: content = _compete(cf, rf)
+		if isinstance(content, static.Hint): content = content.boilerplate
+		reading = col_node.reading or row_node.reading
+		if reading is not None and reading.statistic not in aggregates.ADDITIVE and self.__is_plain_sum(content):
+			content = Rollup(next(bit.selection for bit in content.bits if isinstance(bit, formulae.Summation)))
+		return content
+	
+	def __check_patch(self, *patch_key):
+		try: return self.__patch_cache[patch_key]
+		except KeyError:
+			candidates = self.patch.select(*patch_key)
+			if candidates:
+				winning_patch_index = candidates[-1]
+				winning_rule = self.canvas.definition.formula_rules[winning_patch_index]
+				winning_formula = winning_rule.payload
+			else:
+				winning_formula = None
+			it = self.__patch_cache[patch_key] = winning_formula
+			return it
+	
+	def interpret(self, content, col_node:LeafNode, row_node:LeafNode, cursor:dict):
+		"""
+		What goes in the cell given its boilerplate: data, text, or the text of a formula.
+		If we're keeping track of subtotals, then this cell may become one.
+		"""
+		if content is None: return self.canvas.read_cell(col_node, row_node, self.blank)
+		if isinstance(content, Rollup): return self.canvas.rollup(cursor, content.selection, col_node.reading or row_node.reading, self.blank)
+		if is_formula(content):
+			template = self.__template(content, col_node, row_node, cursor)
+			if template is not None: return template.fill(col_node.begin, row_node.begin, self.subtotals, self.__is_plain_sum(content), self.address)
+		interpreter = FormulaInterpreter(cursor, self.canvas, self.subtotals, self.address)
+		item = interpreter.visit(content)
+		if self.subtotals is not None and interpreter.summed and self.__is_plain_sum(content):
+			self.subtotals.record(col_node.begin, row_node.begin, *interpreter.summed)
+		return item
+	
+	def __template(self, formula:formulae.Formula, col_node:LeafNode, row_node:LeafNode, cursor:dict) -> Optional["FormulaTemplate"]:
+		"""
+		If none of a formula's selections say anything about rows, then in any cell they
+		select the cell's own row, and so the formula is the same all down a column except
+		for the row numbers. Likewise, mutatis mutandis, along a row. In those cases there
+		is no need to interpret the formula afresh for each cell: a template will do.
+		
+		Templates along a column are kept for the whole plot; those along a row only
+		until the next row begins, because plotting goes row by row.
+		"""
+		key = id(formula)
+		try: shape = self.__template_shapes[key]
+		except KeyError: shape = self.__template_shapes[key] = FormulaTemplate.shape_of(formula, self.canvas)
+		if shape is None: return None
+		if shape == 'down':
+			fixed_key = key, col_node
+			cache = self.__column_templates
+		else:
+			if self.__template_row is not row_node:
+				self.__row_templates.clear()
+				self.__template_row = row_node
+			fixed_key = key, row_node
+			cache = self.__row_templates
+		try: return cache[fixed_key]
+		except KeyError:
+			direction = self.canvas.across if shape == 'down' else self.canvas.down
+			it = cache[fixed_key] = FormulaTemplate(formula, shape, direction, cursor)
+			return it
+	
+	def __is_plain_sum(self, content) -> bool:
+		"""
+		Does the formula amount to nothing but a single summation? That is, either
+		`=[...]` or `=sum([...])`, give or take whitespace and capitalization.
+		"""
+		try: return self.__plain[id(content)]
+		except KeyError:
+			it = self.__plain[id(content)] = _is_plain_sum(content)
+			return it
+
+def _is_plain_sum(content) -> bool:
+	if not is_formula(content): return False
+	texts, sums = [''], 0
+	for bit in content.bits:
+		if isinstance(bit, formulae.Summation):
+			sums += 1
+			texts.append('')
+		elif isinstance(bit, formulae.LiteralText): texts[-1] += bit.text
+		else: return False
+	if sums != 1: return False
+	before, after = (''.join(t.split()).lower() for t in texts)
+	before = before.lstrip('=')
+	return (before, after) in (('', ''), ('sum(', ')'))
+
+class WindowPlan:
+	"""
+	What `Canvas.render_window` works out once and then reuses from one window to the next:
+	a renderer with its plan, the leaves by position in each direction, and the blocks that
+	merge rules cover. Then a window costs in proportion to its size, give or take formulas.
+	"""
+	def __init__(self, canvas:Canvas):
+		self.renderer = renderer = Renderer(canvas, 0, 0)
+		self.columns = _leaves_by_position(canvas.across)
+		self.rows = _leaves_by_position(canvas.down)
+		self.width, self.height = canvas.across.tree.after(), canvas.down.tree.after()
+		self.evaluator = None # Made when first wanted; it remembers values from one window to the next.
+		self.merges = []
+		for spec in canvas.definition.merge_specs:
+			across = spec.selection.projection(canvas.across.space)
+			for row_node in canvas.down.tour_merge({}, spec.selection.projection(canvas.down.space)):
+				for col_node in canvas.across.tour_merge({}, across):
+					self.merges.append((row_node.begin, col_node.begin, row_node.end(), col_node.end(), spec.payload, renderer.format_key(col_node, row_node)))
+	
+	def render(self, rows:range, columns:range, evaluate:bool) -> Window:
+		renderer = self.renderer
+		rows = range(max(rows.start, 0), min(rows.stop, self.height))
+		columns = range(max(columns.start, 0), min(columns.stop, self.width))
+		if evaluate and self.evaluator is None: self.evaluator = Evaluator(renderer)
+		
+		def value(content, item, cursor):
+			if evaluate and is_formula(content):
+				try: return self.evaluator.formula(content, cursor)
+				except calculator.Unevaluable: pass
+			return item
+		
+		col_leaves = [self.columns.get(c) for c in columns]
+		row_leaves = [self.rows.get(r) for r in rows]
+		cells = []
+		for row in row_leaves:
+			line = []
+			for col in col_leaves:
+				if row is None or col is None:
+					line.append((None, None))
+					continue
+				(col_node, col_cursor), (row_node, row_cursor) = col, row
+				cursor = {**col_cursor, **row_cursor}
+				content = renderer.boilerplate(col_node, row_node)
+				item = renderer.interpret(content, col_node, row_node, cursor)
+				line.append((value(content, item, cursor), renderer.style_bits(renderer.format_key(col_node, row_node))))
+			cells.append(line)
+		merges = []
+		for top, left, bottom, right, payload, fmt_key in self.merges:
+			if top >= rows.stop or bottom < rows.start or left >= columns.stop or right < columns.start: continue
+			item = FormulaInterpreter({}, renderer.canvas, None, renderer.address).visit(payload)
+			clipped = max(top, rows.start), max(left, columns.start), min(bottom, rows.stop-1), min(right, columns.stop-1)
+			merges.append((*clipped, value(payload, item, {}), renderer.style_bits(fmt_key)))
+		heights = [None if row is None else row[0].margin.height for row in row_leaves]
+		widths = [None if col is None else col[0].margin.width for col in col_leaves]
+		return Window(rows, columns, cells, merges, heights, widths)
+
+class Pagination:
+	"""
+	Where each row of a planned canvas lands, when it's spread over several worksheets.
+	
+	The top level of the row layout divides into a prefix (headings, say), a body, and
+	a suffix (grand totals, say). If the top level is a frame, the body is its biggest
+	part. Otherwise it's the whole thing. The body is split into pages at the highest
+	subtree boundaries that will do: a subtree which won't fit on the current page, but
+	would fit on a fresh one, starts a fresh one. A subtree too big for any page is
+	split among its children the same way. The prefix repeats at the top of every page.
+	The suffix goes on the last page, which may therefore be a page of its own.
+	
+	With no row limit, there is just the one page and every row stays put.
+	
+	Meanwhile, `current` is the page being plotted. References to cells on other pages
+	come out qualified with the sheet name, and those spanning pages come out in pieces.
+	"""
+	
+	def __init__(self, down:"Direction", top:int, row_limit:Optional[int]):
+		root = down.tree
+		if row_limit is None: body = root
+		elif isinstance(down.shape, static.FrameDefinition) and root.children:
+			body = max(sorted(root.children.values(), key=lambda n:n.begin), key=_span)
+		else: body = root
+		self.body_begin, self.body_after = body.begin, body.after()
+		self.starts = [body.begin] # The body row that begins each page
+		self.current = 0
+		if row_limit is None: return
+		prefix, suffix = body.begin - top, root.after() - body.after()
+		capacity = row_limit - top - prefix
+		if capacity < max(suffix, 1):
+			raise SheetLimitError('The headings and totals alone need more than %d rows.'%row_limit)
+		used = 0
+		def pack(node:Node):
+			nonlocal used
+			span = _span(node)
+			if used + span <= capacity: used += span
+			elif span <= capacity:
+				self.starts.append(node.begin)
+				used = span
+			else:
+				for child in sorted(node.children.values(), key=lambda n:n.begin): pack(child)
+		pack(body)
+		if used + suffix > capacity: self.starts.append(body.after())
+	
+	@property
+	def last(self) -> int: return len(self.starts) - 1
+	
+	def names(self, name:str) -> List[str]:
+		""" Name the pages, for the sake of references between them. """
+		self.sheet_names = [name] + ['%s (%d)'%(name, n) for n in range(2, len(self.starts)+1)]
+		return self.sheet_names
+	
+	def locate(self, row:int):
+		""" Which page, and what row on that page? The page is None for a heading, which goes on every page. """
+		if row < self.body_begin: return None, row
+		page = bisect.bisect_right(self.starts, row) - 1
+		return page, row - self.starts[page] + self.body_begin
+	
+	def spans(self, top:int, bottom:int):
+		""" Yield the (page, top, bottom) pieces of a block of rows, as they land. """
+		if top < self.body_begin:
+			for page in range(len(self.starts)): yield page, top, min(bottom, self.body_begin-1)
+			top = self.body_begin
+		while top <= bottom:
+			page, local = self.locate(top)
+			end = bottom if page == self.last else min(bottom, self.starts[page+1]-1)
+			yield page, local, local + end - top
+			top = end + 1
+	
+	def address(self, col_run, row_run) -> str:
+		""" A drop-in replacement for `utility.make_range` which knows about pages. """
+		if len(self.starts) == 1: return utility.make_range(col_run, row_run)
+		top, bottom = (row_run, row_run) if isinstance(row_run, int) else row_run
+		pieces = []
+		for page, local_top, local_bottom in self.spans(top, bottom):
+			if top < self.body_begin and page != self.current: continue
+			text = utility.make_range(col_run, local_top if local_top == local_bottom else (local_top, local_bottom))
+			if page != self.current: text = quote_sheetname(self.sheet_names[page]) + '!' + text
+			pieces.append(text)
+		return ','.join(pieces)
+
+class FormulaTemplate:
+	"""
+	A formula interpreted once, with the selections worked out only along one direction.
+	Along the other ("free") direction, each selection is just the current cell's own
+	row or column, so filling it in for a given cell is simple arithmetic.
+	"""
+	def __init__(self, formula:formulae.Formula, free:str, fixed:"Direction", cursor:dict):
+		self.free = free
+		self.parts = [] # Strings, or else pairs of (is_summation, runs along the fixed direction).
+		for bit in formula.bits:
+			if isinstance(bit, formulae.Selection): self.parts.append((False, fixed.data_index(cursor, bit)))
+			elif isinstance(bit, formulae.Summation): self.parts.append((True, fixed.data_index(cursor, bit.selection)))
+			elif isinstance(bit, formulae.Quotation): self.parts.append('"'+_constant_text(bit.content)+'"')
+			else: self.parts.append(bit.text)
+	
+	@staticmethod
+	def shape_of(formula:formulae.Formula, canvas:Canvas) -> Optional[str]:
+		""" Which direction is free, if any? Prefer 'down', since such templates last the whole plot. """
+		selections = []
+		for bit in formula.bits:
+			if isinstance(bit, formulae.Selection): selections.append(bit)
+			elif isinstance(bit, formulae.Summation): selections.append(bit.selection)
+			elif isinstance(bit, formulae.Quotation):
+				if _constant_text(bit.content) is None: return None
+			elif not isinstance(bit, formulae.LiteralText): return None
+		for free, direction in (('down', canvas.down), ('across', canvas.across)):
+			if not any(s.projection(direction.space).criteria for s in selections): return free
+	
+	def fill(self, col:int, row:int, subtotals:Optional["Subtotals"], plain_sum:bool, address:Callable=utility.make_range) -> str:
+		text = []
+		for part in self.parts:
+			if isinstance(part, str):
+				text.append(part)
+				continue
+			is_summation, runs = part
+			columns, rows = (runs, [row]) if self.free == 'down' else ([col], runs)
+			if is_summation and subtotals is not None:
+				text.append('sum(%s)'%','.join(subtotals.references(columns, rows)))
+				if plain_sum: subtotals.record(col, row, columns, rows)
+			else:
+				ranges = _ranges(columns, rows, address)
+				text.append('sum(%s)'%ranges if is_summation else ranges)
+		return '='+''.join(text)
+
+def _ranges(columns:list, rows:list, address:Callable) -> str:
+	""" A formula fragment referring to these runs of columns and rows, or zero if there are none. """
+	if rows and columns: return ','.join(address(c, r) for c in columns for r in rows)
+	else: return "0"
+
+def _constant_text(element) -> Optional[str]:
+	""" The text of a label which does not depend on the cursor, or else None. """
+	if isinstance(element, formulae.LiteralText): return element.text
+	if isinstance(element, formulae.Label) and all(isinstance(e, formulae.LiteralText) for e in element.bits):
+		return ''.join(e.text for e in element.bits)
+
+class Subtotals:
+	"""
+	When a plotted cell holds nothing but the sum of some block of data, later summations
+	covering that same block may as well refer to the cell instead of the data. Over a deep
+	hierarchy, that means a reference per subtotal rather than a range per run of leaves,
+	which keeps formulas short and recalculation quick.
+	
+	Blocks are filed two ways: by their columns and first row (for summing down) and by
+	their rows and first column (for summing across). A later summation gets broken into
+	the fewest pieces either way.
+	"""
+	def __init__(self):
+		self.__down = {}
+		self.__across = {}
+		self.address = utility.make_range # As for `Renderer.address`
+	
+	def record(self, col:int, row:int, columns:list, rows:list):
+		if not (columns and rows): return
+		address = col, row
+		row_positions, col_positions = list(_positions(rows)), list(_positions(columns))
+		self.__file(self.__down, (tuple(columns), row_positions[0]), len(row_positions), tuple(rows), address)
+		self.__file(self.__across, (tuple(rows), col_positions[0]), len(col_positions), tuple(columns), address)
+	
+	@staticmethod
+	def __file(index:dict, key, count:int, runs:tuple, address:tuple):
+		entries = index.setdefault(key, [])
+		if any(runs == e[1] for e in entries): return
+		entries.append((count, runs, address))
+		entries.sort(key=lambda e: -e[0]) # Prefer the biggest block.
+	
+	def references(self, columns:list, rows:list) -> List[str]:
+		""" What to put inside `sum(...)` for the data in these runs of columns and rows. """
+		if not (columns and rows): return ["0"]
+		address = self.address
+		down = self.__decompose(self.__down, tuple(columns), list(_positions(rows)), lambda run: [address(c, run) for c in columns], address)
+		across = self.__decompose(self.__across, tuple(rows), list(_positions(columns)), lambda run: [address(run, r) for r in rows], address)
+		best = min(down, across, key=len) if down and across else down or across
+		return best or [address(c, r) for c in columns for r in rows]
+	
+	@staticmethod
+	def __decompose(index:dict, fixed:tuple, positions:list, plain:Callable, address:Callable) -> Optional[list]:
+		""" Returns None if no subtotal applies, so the caller may fall back on the usual form. """
+		result, loose, found = [], [], False
+		def flush():
+			for run in utility.collapse_runs(loose): result.extend(plain(run))
+			loose.clear()
+		i = 0
+		while i < len(positions):
+			for count, runs, cell in index.get((fixed, positions[i]), ()):
+				if tuple(utility.collapse_runs(positions[i:i+count])) == runs:
+					flush()
+					result.append(address(*cell))
+					i += count
+					found = True
+					break
+			else:
+				loose.append(positions[i])
+				i += 1
+		flush()
+		if found: return result
+
 class FormulaInterpreter(foundation.Visitor):
 	"""
 	Not sure if this needs to be its own class or methods on Canvas,
 	but this works OK for now.
 	"""
-	def __init__(self, cursor:dict, canvas:Canvas):
+	def __init__(self, cursor:dict, canvas:Canvas, subtotals:"Subtotals"=None, address:Callable=utility.make_range):
 		self.cursor = cursor
 		self.canvas = canvas
 		self.env = canvas.environment
+		self.subtotals = subtotals
+		self.address = address
+		self.summed = None # The (columns, rows) of the most recent summation, when there are subtotals.
 	
 	def visit_BlankCell(self, _:formulae.BlankCell): return None
 	
@@ -239,10 +1724,12 @@ class FormulaInterpreter(foundation.Visitor):
 		return '='+''.join(str(self.visit(e)) for e in formula.bits)
 	
 	def visit_Selection(self, selection:formulae.Selection):
-		return ','.join(self.canvas.data_range(self.cursor, selection))
+		return _ranges(*self.canvas.data_index(self.cursor, selection), self.address)
 	
 	def visit_Summation(self, ss:formulae.Summation):
-		return 'sum(%s)'%self.visit(ss.selection)
+		if self.subtotals is None: return 'sum(%s)'%self.visit(ss.selection)
+		self.summed = self.canvas.data_index(self.cursor, ss.selection)
+		return 'sum(%s)'%','.join(self.subtotals.references(*self.summed))
 	
 	def visit_Quotation(self, quotation:formulae.Quotation):
 		return '"'+str(self.visit(quotation.content))+'"'
@@ -253,6 +1740,83 @@ class FormulaInterpreter(foundation.Visitor):
 	def visit_HeadRef(self, ref:formulae.HeadRef):
 		return '<head>'
 
+class Evaluator:
+	"""
+	Works out in Python what the spreadsheet would calculate for the formulas on a planned canvas.
+	
+	Formulas may refer to cells which hold formulas in turn (e.g. a grand total over subtotals)
+	so every cell's value is remembered once computed, as is every range. Thus the work proceeds
+	bottom-up and nothing gets summed twice, no matter how deeply the subtotals nest.
+	"""
+	def __init__(self, renderer:Renderer):
+		self.renderer = renderer
+		self.canvas = renderer.canvas
+		self.__columns = _leaves_by_position(self.canvas.across)
+		self.__rows = _leaves_by_position(self.canvas.down)
+		self.__cells = {}
+		self.__ranges = {}
+		self.__sums = {}
+	
+	def formula(self, content:formulae.Formula, cursor:dict):
+		""" The value of a formula as it would appear in a cell with the given cursor. """
+		pieces = []
+		for bit in content.bits:
+			if isinstance(bit, formulae.Selection): pieces.append(self.__range(cursor, bit))
+			elif isinstance(bit, formulae.Summation): pieces.append(self.__total(cursor, bit.selection))
+			else: pieces.append(str(FormulaInterpreter(cursor, self.canvas).visit(bit)))
+		return calculator.calculate(pieces)
+	
+	def cell(self, col_index:int, row_index:int):
+		"""
+		The value shown at a given position, which may need computing. Circular references
+		are as unevaluable here as anywhere. So are references to a cell we cannot compute.
+		"""
+		key = col_index, row_index
+		try: value = self.__cells[key]
+		except KeyError:
+			self.__cells[key] = calculator.Unevaluable # Meanwhile, as a guard against cycles.
+			col_node, col_cursor = self.__columns[col_index]
+			row_node, row_cursor = self.__rows[row_index]
+			content = self.renderer.boilerplate(col_node, row_node)
+			cursor = {**col_cursor, **row_cursor}
+			try:
+				if is_formula(content): value = self.formula(content, cursor)
+				else: value = self.renderer.interpret(content, col_node, row_node, cursor)
+			except calculator.Unevaluable: value = calculator.Unevaluable
+			else: self.__cells[key] = value
+		if value is calculator.Unevaluable: raise calculator.Unevaluable(key)
+		return value
+	
+	def __range(self, cursor:dict, selection:formulae.Selection) -> calculator.Cells:
+		return self.__cells_in(*self.canvas.data_index(cursor, selection))
+	
+	def __cells_in(self, columns, rows) -> calculator.Cells:
+		key = tuple(columns), tuple(rows)
+		try: return self.__ranges[key]
+		except KeyError:
+			values = [self.cell(c, r) for c in _positions(columns) for r in _positions(rows)]
+			it = self.__ranges[key] = calculator.Cells(values)
+			return it
+	
+	def __total(self, cursor:dict, selection:formulae.Selection):
+		columns, rows = self.canvas.data_index(cursor, selection)
+		key = tuple(columns), tuple(rows)
+		try: return self.__sums[key]
+		except KeyError:
+			it = self.__sums[key] = calculator.total(self.__cells_in(columns, rows))
+			return it
+
+def _leaves_by_position(direction:"Direction") -> dict:
+	""" Of a planned direction: each leaf node, and the cursor that goes with it. """
+	cursor = {}
+	return {node.begin: (node, dict(cursor)) for node in LeafTour(cursor).visit(direction)}
+
+def _positions(runs):
+	""" Undo `utility.collapse_runs`. """
+	for run in runs:
+		if isinstance(run, int): yield run
+		else: yield from range(run[0], run[1]+1)
+
 class Direction:
 	"""
 	Turns out there's a whole bunch of stuff where you have to keep the right dynamic tree with the right
@@ -260,13 +1824,47 @@ class Direction:
 	correspondences where I can accidentally get it wrong, I'll embody that correspondence as a single
 	unit of meaning in the form of this class.
 	"""
-	def __init__(self, shape:static.ShapeDefinition, env:runtime.Environment):
+	def __init__(self, shape:static.ShapeDefinition, env:runtime.Environment, trees:dict=None):
+		"""
+		Given `trees` (by skeleton), use the tree already there for an equivalent shape, if any.
+		Otherwise, make a fresh tree, and put it there for the next one.
+		"""
 		self.shape = shape
 		self.env = env
-		self.tree = node_factory.visit(self.shape)
 		self.space = set()
 		shape.accumulate_key_space(self.space)
+		if trees is None: self.tree, self.rolling = self.__grow()
+		else:
+			skeleton = _skeleton(shape)
+			try: self.tree, self.rolling = trees[skeleton]
+			except KeyError: self.tree, self.rolling = trees[skeleton] = self.__grow()
+	
+	def __grow(self):
+		""" A fresh tree, and a `Rolling` window (by axis) for whichever of its axes have one. """
+		rolling = {}
+		for key in self.space:
+			span = self.env.window(key)
+			if span is not None: rolling[key] = Rolling(span)
+		return node_factory.visit(self.shape), rolling
 
+	def fresh(self) -> "Direction":
+		""" The same, but with a tree of its own, as new. """
+		it = copy.copy(self)
+		it.tree, it.rolling = self.__grow()
+		return it
+	
+	def resume(self):
+		""" Set up any rolling windows to match a tree that was restored wholesale, as from a checkpoint. """
+		def walk(shape:static.ShapeDefinition, node:Node):
+			if isinstance(node, LeafNode): return
+			rolling = self.rolling.get(shape.cursor_key) if isinstance(shape, static.TreeDefinition) else None
+			for label, child in node.children.items():
+				if rolling is not None:
+					rolling.track(node, label)
+					if rolling.newest is None or rolling.newest < label: rolling.newest = label
+				walk(shape.descend(label), child)
+		if self.rolling: walk(self.shape, self.tree)
+	
 	def plan(self, cartographer:"Cartographer"):
 		state = veneer.PlanState({}, frozenset(), frozenset(), self.env)
 		cartographer.visit(self.shape, self.tree, state)
@@ -279,15 +1877,25 @@ class Direction:
 			raise
 		return utility.collapse_runs(sorted(fd.found))
 	
+	def data_leaves(self, cursor, selection:formulae.Selection) -> List[LeafNode]:
+		""" Like `data_index`, but the leaf nodes themselves. """
+		fd = FindLeaves(cursor, selection.projection(self.space))
+		fd.visit(self.shape, self.tree, len(fd.criteria))
+		return fd.found
+	
 	def tour_merge(self, cursor, selection:formulae.Selection):
 		return InternalTour(cursor, selection).visit(self.shape, self.tree, len(selection.criteria))
 
 class FindKeyNode(foundation.Visitor):
 	""" Go find the appropriate sub-node for a given point, principally for entering magnitude/attribute data. """
 	
-	def __init__(self, point: dict, env:runtime.Environment):
+	def __init__(self, point: dict, env:runtime.Environment, weight=1):
 		self.point = point
 		self.env = env
+		self.weight = weight
+		self.fold = None # Called as fold(shape, node, victim) when a cardinality policy demotes a child.
+		self.rolling = {} # By axis, the `Rolling` windows of the tree being searched.
+		self.expire = None # Called as expire(node, ordinal) when a child ages out of its window.
 	
 	def visit_Direction(self, direction: Direction):
 		return self.visit(direction.shape, direction.tree)
@@ -297,8 +1905,16 @@ class FindKeyNode(foundation.Visitor):
 	
 	def visit_TreeDefinition(self, shape:static.TreeDefinition, node:InternalNode) -> LeafNode:
 		ordinal = self.visit(shape.reader)
+		rolling = self.rolling.get(shape.cursor_key)
+		if rolling is not None: rolling.admit(shape.cursor_key, ordinal)
+		census = node.census
+		if census is None: census = node.census = Census.policy(self.env, shape.cursor_key)
+		if census: ordinal = census.admit(ordinal, self.weight, lambda victim: self.fold(shape, node, victim))
 		try: branch = node.children[ordinal]
-		except KeyError: branch = node.children[ordinal] = node_factory.visit(shape.within)
+		except KeyError:
+			branch = node.children[ordinal] = node_factory.visit(shape.within)
+			if rolling is not None: rolling.track(node, ordinal)
+		if rolling is not None: rolling.advance(ordinal, self.expire)
 		return self.visit(shape.within, branch)
 	
 	def visit_FrameDefinition(self, shape:static.FrameDefinition, node:InternalNode) -> LeafNode:
@@ -307,6 +1923,9 @@ class FindKeyNode(foundation.Visitor):
 		except KeyError: raise runtime.InvalidOrdinalError(shape.cursor_key, ordinal)
 		else: return self.visit(shape.fields[ordinal], branch)
 	
+	def visit_MeasureDefinition(self, shape:static.MeasureDefinition, node:InternalNode) -> InternalNode:
+		return node
+	
 	def visit_MenuDefinition(self, shape:static.MenuDefinition, node:InternalNode) -> LeafNode:
 		ordinal = self.visit(shape.reader)
 		try: within = shape.fields[ordinal]
@@ -328,6 +1947,42 @@ class FindKeyNode(foundation.Visitor):
 	def visit_DefaultReader(self, r:static.DefaultReader):
 		return self.point.get(r.key, '_')  # Absent key becomes '_'; for cosmetic frames.
 
+class CheckKeyPath(FindKeyNode):
+	"""
+	Read a point the way `FindKeyNode` would, and raise what it would, but touch no tree or census.
+	The answer is whether the point lands beneath a :measure.
+	"""
+	
+	def __init__(self, point: dict, env:runtime.Environment):
+		super().__init__(point, env)
+		self.met = [] # The (window, axis, ordinal) for each rolling window along the way.
+	
+	def visit_Direction(self, direction: Direction) -> bool:
+		self.rolling = direction.rolling
+		return self.visit(direction.shape)
+	
+	def visit_LeafDefinition(self, shape:static.LeafDefinition) -> bool:
+		return False
+	
+	def visit_TreeDefinition(self, shape:static.TreeDefinition) -> bool:
+		ordinal = self.visit(shape.reader)
+		rolling = self.rolling.get(shape.cursor_key)
+		if rolling is not None:
+			rolling.admit(shape.cursor_key, ordinal)
+			self.met.append((rolling, shape.cursor_key, ordinal))
+		return self.visit(shape.within)
+	
+	def visit_FrameDefinition(self, shape:static.FrameDefinition) -> bool:
+		ordinal = self.visit(shape.reader)
+		try: within = shape.fields[ordinal]
+		except KeyError: raise runtime.InvalidOrdinalError(shape.cursor_key, ordinal)
+		else: return self.visit(within)
+	
+	def visit_MeasureDefinition(self, shape:static.MeasureDefinition) -> bool:
+		return True
+	
+	visit_MenuDefinition = visit_FrameDefinition
+
 class NodeFilter(foundation.Visitor):
 	""" Commonalities for finding matching nodes after-the-fact. """
 	
@@ -405,6 +2060,69 @@ class FindData(NodeFilter):
 			for ordinal, child in node.children.items():
 				self.visit(shape.fields[ordinal], child, remain)
 	
+class FindLeaves(FindData):
+	""" The same search, but finding the nodes rather than their positions. """
+	
+	def visit_LeafDefinition(self, shape:static.LeafDefinition, node:LeafNode, remain:int):
+		if remain == 0:
+			self.found.append(node)
+	
+class FindExtantNode(FindKeyNode):
+	"""
+	Like `FindKeyNode`, but only looks: The tree does not grow, nor does any census take notice.
+	The result is None if nothing has arrived at the point. Beneath a :measure, the point names the field.
+	"""
+
+	def visit_TreeDefinition(self, shape:static.TreeDefinition, node:InternalNode) -> Optional[LeafNode]:
+		try: branch = node.children[self.visit(shape.reader)]
+		except KeyError: return None
+		return self.visit(shape.within, branch)
+
+	def visit_MeasureDefinition(self, shape:static.MeasureDefinition, node:InternalNode) -> LeafNode:
+		return self.visit_FrameDefinition(shape, node)
+
+	def visit_MenuDefinition(self, shape:static.MenuDefinition, node:InternalNode) -> Optional[LeafNode]:
+		ordinal = self.visit(shape.reader)
+		if ordinal not in shape.fields: raise runtime.InvalidOrdinalError(shape.cursor_key, ordinal)
+		try: branch = node.children[ordinal]
+		except KeyError: return None
+		return self.visit(shape.fields[ordinal], branch)
+
+class SelectPoints(NodeFilter):
+	"""
+	For reading a canvas from Python: The same search as `FindLeaves` with no cursor,
+	but yielding each leaf along with the point that leads there. Also, a frame which
+	the criteria do not mention, and which has no default field, gives all its fields.
+	"""
+
+	def __init__(self, selection: formulae.Selection):
+		self.criteria = selection.criteria
+		self.path = {}
+
+	def visit_Direction(self, direction:Direction):
+		return self.visit(direction.shape, direction.tree)
+
+	def visit_LeafDefinition(self, shape:static.LeafDefinition, node:LeafNode):
+		if self.criteria.keys() <= self.path.keys():
+			yield node, dict(self.path)
+
+	def __descend(self, shape:static.CompoundShapeDefinition, node:InternalNode, otherwise):
+		key = shape.cursor_key
+		pairs = self.visit(self.criteria[key], node.children) if key in self.criteria else otherwise()
+		for ordinal, child in list(pairs):
+			self.path[key] = ordinal
+			yield from self.visit(shape.descend(ordinal), child)
+		self.path.pop(key, None)
+
+	def visit_TreeDefinition(self, shape:static.TreeDefinition, node:InternalNode):
+		return self.__descend(shape, node, node.children.items)
+
+	def visit_FrameDefinition(self, shape:static.FrameDefinition, node:InternalNode):
+		return self.__descend(shape, node, lambda: [('_', node.children['_'])] if '_' in node.children else node.children.items())
+
+	def visit_MenuDefinition(self, shape:static.MenuDefinition, node:InternalNode):
+		return self.__descend(shape, node, node.children.items)
+
 class LeafTour(foundation.Visitor):
 	""" Walk a tree while keeping a cursor up to date; yield the leaf nodes. """
 	
@@ -423,6 +2141,15 @@ class LeafTour(foundation.Visitor):
 	def visit_Direction(self, direction:Direction):
 		return self.visit(direction.shape, direction.tree)
 
+class PlanTour(LeafTour):
+	""" Like `LeafTour`, but in the order of the most recent plan, which may differ from the order of arrival. """
+	
+	def visit_CompoundShapeDefinition(self, shape:static.CompoundShapeDefinition, node:InternalNode):
+		for label, child_node in sorted(node.children.items(), key=lambda item:item[1].begin):
+			self.cursor[shape.cursor_key] = label
+			yield from self.visit(shape.descend(label), child_node)
+			del self.cursor[shape.cursor_key]
+
 class InternalTour(NodeFilter):
 	"""
 	Yield matching (internal, if possible) nodes.
@@ -461,8 +2188,9 @@ class Cartographer(foundation.Visitor):
 		self.skin = skin
 		self.patch = patch
 	
-	def enter_node(self, node:Node, state:veneer.PlanState):
+	def enter_node(self, shape:static.ShapeDefinition, node:Node, state:veneer.PlanState):
 		node.begin = self.index
+		node.margin = shape.margin # A shared tree takes on the margins of whichever canvas plans it.
 		node.style_class = self.skin.classify(state)
 		node.formula_class = self.patch.classify(state)
 	
@@ -470,7 +2198,7 @@ class Cartographer(foundation.Visitor):
 		node.size = self.index - node.begin
 	
 	def visit_LeafDefinition(self, shape: static.LeafDefinition, node: LeafNode, state:veneer.PlanState):
-		self.enter_node(node, state)
+		self.enter_node(shape, node, state)
 		self.index += 1
 
 	def _compound(self, shape:static.CompoundShapeDefinition, node:InternalNode, state:veneer.PlanState, schedule):
@@ -479,7 +2207,7 @@ class Cartographer(foundation.Visitor):
 			self.visit(shape.descend(label), node.children[label], prime)
 		
 		# Begin:
-		self.enter_node(node, state)
+		self.enter_node(shape, node, state)
 		if len(schedule) == 1:
 			# The only element is also the first and last element.
 			enter(schedule[0], True, True)
@@ -491,7 +2219,10 @@ class Cartographer(foundation.Visitor):
 		self.leave_node(node)
 	
 	def visit_TreeDefinition(self, shape: static.TreeDefinition, node: InternalNode, state: veneer.PlanState):
-		schedule = sorted(node.children.keys(), key=state.environment.collation(shape.cursor_key))
+		# Under a cardinality policy, "other" comes last.
+		other = node.census.other if node.census else _NOTHING_ELSE
+		schedule = sorted((k for k in node.children.keys() if k != other), key=state.environment.collation(shape.cursor_key))
+		if other in node.children: schedule.append(other)
 		return self._compound(shape, node, state, schedule)
 	
 	def visit_FrameDefinition(self, shape:static.FrameDefinition, node:InternalNode, state:veneer.PlanState):
@@ -524,5 +2255,11 @@ class FreshNodeFactory(foundation.Visitor):
 		for label, child in shape.fields.items():
 			node.children[label] = self.visit(child)
 		return node
+	
+	def visit_MeasureDefinition(self, shape:static.MeasureDefinition):
+		node = self.visit_FrameDefinition(shape)
+		for label, child in shape.fields.items():
+			node.children[label].reading = Reading(node, child.measure, child.statistic)
+		return node
 
 node_factory = FreshNodeFactory()
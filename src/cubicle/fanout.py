@@ -0,0 +1,118 @@
+"""
+Making one workbook per entity (per customer, say) from the same layout, a great many at once.
+
+Each report is independent of the others, so they spread nicely over a pool of processes.
+Every worker sets up an empty canvas once, as a template, and thereafter each entity's
+report starts from `Canvas.fresh`. The data arrive one entity at a time, from any iterable
+of `(entity, records)` pairs, and only a bounded number of entities are out at the workers
+at once. So the source can be a generator over a database cursor or a directory of files,
+and the parent's memory stays bounded however many reports there are.
+
+Whatever goes to the workers travels by pickle: the compiled module, the environment,
+the `convert` function, the entities and their records. Define classes and functions at
+the top level of some module, as usual for `multiprocessing`.
+"""
+
+import os, time, traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Callable, Iterable, Mapping, NamedTuple
+import xlsxwriter
+from . import dynamic, static, runtime
+
+class EntityResult(NamedTuple):
+	""" How one entity's workbook went. """
+	entity: object
+	path: str
+	rows: int
+	rejected: int
+	seconds: float # In the worker, from the fresh canvas to the closed workbook.
+	error: Optional[str] # None if the workbook was made; otherwise the traceback.
+
+class FanoutReport(NamedTuple):
+	""" What happened during `render_all`. Results are in the order the workbooks were finished. """
+	results: list
+	seconds: float
+
+	@property
+	def succeeded(self) -> list: return [r for r in self.results if r.error is None]
+
+	@property
+	def failed(self) -> list: return [r for r in self.results if r.error is not None]
+
+	@property
+	def workbooks_per_second(self) -> float:
+		return len(self.results) / self.seconds if self.seconds else float('inf')
+
+
+class _Job(NamedTuple):
+	""" Everything the workers need to know, apart from the data. """
+	axis_map: Mapping[str, str]
+	value_field: Optional[str]
+	convert: Optional[Callable]
+	measure: Optional[str]
+	sheet_name: Optional[str]
+	workbook_options: dict
+	plot_options: dict
+
+_template = None # In a worker process, the empty canvas and the `_Job`.
+
+def _start(cub_module:static.CubModule, identifier:str, environment:runtime.Environment, job:_Job):
+	global _template
+	_template = dynamic.Canvas(cub_module, identifier, environment), job
+
+def _render(entity, records:list, path:str) -> EntityResult:
+	template, job = _template
+	started = time.perf_counter()
+	rows = rejected = 0
+	try:
+		canvas = template.fresh()
+		ingested = canvas.ingest_records(records, job.axis_map, job.value_field, convert=job.convert, measure=job.measure)
+		rows, rejected = ingested.rows, ingested.rejected
+		workbook = xlsxwriter.Workbook(path, job.workbook_options)
+		try: canvas.plot(workbook, workbook.add_worksheet(job.sheet_name), 0, 0, **job.plot_options)
+		finally: workbook.close()
+	except Exception: error = traceback.format_exc()
+	else: error = None
+	return EntityResult(entity, path, rows, rejected, time.perf_counter() - started, error)
+
+
+def render_all(
+		cub_module:static.CubModule, identifier:str, environment:runtime.Environment,
+		partitions:Iterable, path_for:Callable, axis_map:Mapping[str, str], value_field:Optional[str]=None,
+		*, convert:Callable=None, measure:str=None, sheet_name:str=None, workbook_options:dict=None, plot_options:dict=None,
+		workers:int=None, max_in_flight:int=None, progress:Callable=None,
+) -> FanoutReport:
+	"""
+	Plot canvas `identifier` once per entity, each in a workbook of its own.
+
+	`partitions` yields `(entity, records)` pairs. The records are as for `Canvas.ingest_records`,
+	along with `axis_map`, `value_field`, `convert`, and `measure`. `path_for(entity)` names the file.
+	`plot_options` are keyword arguments for `Canvas.plot`; `workbook_options` are for xlsxwriter.
+
+	There are `workers` processes (by default, one per CPU), and at most `max_in_flight` entities
+	(by default, twice as many) handed out and not yet finished. A failure is confined to its entity:
+	it shows up in the report, and everything else carries on. If given, `progress` gets each
+	`EntityResult` as it comes in.
+	"""
+	job = _Job(dict(axis_map), value_field, convert, measure, sheet_name, dict(workbook_options or {}), dict(plot_options or {}))
+	workers = workers or os.cpu_count() or 1
+	limit = max(1, max_in_flight or 2 * workers)
+	results = []
+	pending = {} # Future -> (entity, path)
+
+	def finish(done):
+		for future in done:
+			entity, path = pending.pop(future)
+			try: result = future.result()
+			except Exception: result = EntityResult(entity, path, 0, 0, 0.0, traceback.format_exc())
+			results.append(result)
+			if progress is not None: progress(result)
+
+	started = time.perf_counter()
+	with ProcessPoolExecutor(workers, initializer=_start, initargs=(cub_module, identifier, environment, job)) as pool:
+		for entity, records in partitions:
+			if len(pending) >= limit: finish(wait(pending, return_when=FIRST_COMPLETED).done)
+			path = os.fspath(path_for(entity))
+			pending[pool.submit(_render, entity, list(records), path)] = entity, path
+		finish(wait(pending).done)
+	return FanoutReport(results, time.perf_counter() - started)
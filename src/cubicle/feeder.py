@@ -0,0 +1,129 @@
+"""
+Feeding a canvas from asyncio code without stalling the event loop.
+
+Finding key paths is honest CPU work, and a burst of `incr` calls on the loop
+holds up every other coroutine meanwhile. An `AsyncCanvasFeeder` instead collects
+points into a `dynamic.Batch` (which is cheap: a dictionary update) and hands
+each full batch to a worker thread to apply. Batches apply one at a time and in
+order, so the canvas never sees two threads at once.
+
+Backpressure: at most `max_pending` batches may be waiting on the worker. When
+producers outrun it, `incr` waits for room, so memory stays bounded and the
+slow-down reaches whoever is producing rather than piling up in a buffer.
+"""
+
+import asyncio
+from typing import Optional, Callable
+from .dynamic import Canvas
+
+class AsyncCanvasFeeder:
+	"""
+	Use it as an async context manager, which also applies a partly-full batch every `interval`
+	seconds so that the canvas never lags far behind a trickle of data:
+
+		async with AsyncCanvasFeeder(canvas) as feeder:
+			await feeder.consume(source)
+		# Here, everything has been applied.
+
+	The canvas belongs to the feeder until `flush` returns; don't read it in the meantime.
+	A bad point goes to `reject(point, exception)`, called on the worker thread, if you supply
+	that callback. Otherwise, its exception raises from whichever `incr`, `flush`, or exit comes
+	next after its batch was applied. Either way, the rest of that batch goes in.
+	"""
+	def __init__(self, canvas:Canvas, *, batch_size:int=10000, max_pending:int=2, interval:Optional[float]=1.0, executor=None, reject:Callable=None):
+		self.canvas = canvas
+		self.batch_size = batch_size
+		self.interval = interval
+		self.executor = executor # None means the event loop's default executor.
+		self.max_pending = max_pending
+		self.reject = reject
+		self.__batch = canvas.batch()
+		self.__room = None # An asyncio.Semaphore, made by `__ready`.
+		self.__turn = None # An asyncio.Lock, so batches apply in order, one at a time.
+		self.__pending = set()
+		self.__error = None
+		self.__timer = None
+
+	async def incr(self, point, value, measure:str=None):
+		self.__check()
+		self.__batch.incr(point, value, measure)
+		if len(self.__batch) >= self.batch_size: await self.__submit()
+
+	async def decr(self, point, value):
+		self.__check()
+		self.__batch.decr(point, value)
+		if len(self.__batch) >= self.batch_size: await self.__submit()
+
+	async def consume(self, source):
+		"""
+		Feed from an async iterator, or from an `asyncio.Queue` until it yields `None`.
+		Either way, the items are `(point, value)` or `(point, value, measure)` tuples.
+		"""
+		if isinstance(source, asyncio.Queue):
+			while True:
+				item = await source.get()
+				try:
+					if item is None: break
+					await self.incr(*item)
+				finally: source.task_done()
+		else:
+			async for item in source: await self.incr(*item)
+
+	async def flush(self):
+		""" Apply everything given so far, and wait until that's done. """
+		if len(self.__batch): await self.__submit()
+		while self.__pending: await asyncio.wait(list(self.__pending))
+		self.__check()
+
+	def __check(self):
+		if self.__error is not None:
+			error, self.__error = self.__error, None
+			raise error
+
+	def __ready(self):
+		""" Before Python 3.10, these bind to the event loop current when they're made, so make them within the running loop. """
+		if self.__room is None:
+			self.__room = asyncio.Semaphore(self.max_pending)
+			self.__turn = asyncio.Lock()
+
+	async def __submit(self):
+		"""
+		Wait for room before taking the batch, so that a producer cancelled meanwhile drops nothing.
+		Other producers may add to the batch in the meantime, or even submit it first.
+		"""
+		self.__ready()
+		await self.__room.acquire()
+		if not len(self.__batch):
+			self.__room.release()
+			return
+		batch, self.__batch = self.__batch, self.canvas.batch()
+		task = asyncio.ensure_future(self.__apply(batch))
+		self.__pending.add(task)
+		task.add_done_callback(self.__pending.discard)
+
+	async def __apply(self, batch):
+		try:
+			async with self.__turn:
+				errors = []
+				reject = self.reject or (lambda point, e: errors.append(e))
+				await asyncio.get_running_loop().run_in_executor(self.executor, self.canvas.apply, batch, reject)
+				if errors: raise errors[0]
+		except Exception as e:
+			if self.__error is None: self.__error = e
+		finally: self.__room.release()
+
+	async def __tick(self):
+		self.__ready()
+		while True:
+			await asyncio.sleep(self.interval)
+			if len(self.__batch) and not self.__room.locked(): await self.__submit()
+
+	async def __aenter__(self):
+		if self.interval is not None: self.__timer = asyncio.ensure_future(self.__tick())
+		return self
+
+	async def __aexit__(self, *exc):
+		if self.__timer is not None:
+			self.__timer.cancel()
+			self.__timer = None
+		await self.flush()
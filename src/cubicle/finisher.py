@@ -0,0 +1,90 @@
+"""
+Closing workbooks in the background, so the next report can get going meanwhile.
+
+`xlsxwriter.Workbook.close` is where the whole file actually gets written: all the
+XML, zipped up. For a report of any size that's a good share of the time it takes,
+and none of it involves the canvas. A `WorkbookFinisher` takes finished workbooks off
+your hands and closes them on a worker thread. Compression happens in `zlib`, which
+lets go of the global interpreter lock, so it overlaps well with ingesting and plotting
+the next canvas.
+
+It's threads rather than processes because a workbook holds open files and its
+worksheets' data, and does not survive a trip through `pickle`.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional
+import xlsxwriter
+from .dynamic import Canvas
+
+class WorkbookFinisher:
+	"""
+	Use it as a context manager:
+
+		with WorkbookFinisher() as finisher:
+			for customer in customers:
+				canvas = ...
+				finisher.plot(canvas, 'out/%s.xlsx' % customer)
+		# Here, every workbook has been closed.
+
+	At most `max_pending` workbooks may be waiting to close. Beyond that, handing over another
+	one waits for room, so unwritten workbooks don't pile up in memory. Once you hand over a
+	workbook, leave it alone. If one fails to close, the error comes out of the next `close`,
+	`plot`, or `join`, or on leaving the `with` block. Others already handed over still get closed.
+	"""
+	def __init__(self, *, max_pending:int=2, threads:int=1):
+		self.__pool = ThreadPoolExecutor(threads, thread_name_prefix='cubicle-finisher')
+		self.__room = threading.BoundedSemaphore(max_pending)
+		self.__lock = threading.Lock() # Guards the pending set and the error.
+		self.__pending = set()
+		self.__error = None
+
+	def close(self, workbook:xlsxwriter.Workbook):
+		""" Close the workbook in the background. """
+		self.__check()
+		self.__room.acquire()
+		try: future = self.__pool.submit(self.__close, workbook)
+		except BaseException:
+			self.__room.release()
+			raise
+		with self.__lock: self.__pending.add(future)
+		future.add_done_callback(self.__done)
+
+	def plot(self, canvas:Canvas, filename, top_row_index:int=0, left_column_index:int=0, blank=None, *, sheet_name:Optional[str]=None, workbook_options:dict=None, **kwargs) -> xlsxwriter.Workbook:
+		"""
+		Plot the canvas onto a worksheet of a new workbook, and close that in the background.
+		Other keyword arguments are as for `Canvas.plot`. The answer is the workbook, for reference only.
+		"""
+		self.__check()
+		workbook = xlsxwriter.Workbook(filename, workbook_options or {})
+		canvas.plot(workbook, workbook.add_worksheet(sheet_name), top_row_index, left_column_index, blank, **kwargs)
+		self.close(workbook)
+		return workbook
+
+	def join(self):
+		""" Wait until every workbook handed over so far is closed. """
+		with self.__lock: pending = list(self.__pending)
+		wait(pending)
+		self.__check()
+
+	def __close(self, workbook:xlsxwriter.Workbook):
+		try: workbook.close()
+		except Exception as e:
+			with self.__lock:
+				if self.__error is None: self.__error = e
+		finally: self.__room.release()
+
+	def __done(self, future):
+		with self.__lock: self.__pending.discard(future)
+
+	def __check(self):
+		with self.__lock: error, self.__error = self.__error, None
+		if error is not None: raise error
+
+	def __enter__(self): return self
+
+	def __exit__(self, exc_type, exc, tb):
+		try:
+			if exc_type is None: self.join()
+		finally: self.__pool.shutdown(wait=True)
@@ -6,7 +6,7 @@ from . import AST, formulae, utility
 TABLES = utility.tables(__file__, 'core.md')
 
 class CoreDriver(brt.TypicalApplication):
-	VALID_KEYWORDS = frozenset('AXIS CANVAS FRAME GAP HEAD LEAF MENU MERGE STYLE TREE USE ZONE'.split())
+	VALID_KEYWORDS = frozenset('AXIS CANVAS FRAME GAP HEAD LEAF MEASURE MENU MERGE STYLE TREE USE ZONE'.split())
 	
 	def default_scan_action(self, message, scanner, param):
 		# Just in case I forgot something:
@@ -113,12 +113,15 @@ class CoreDriver(brt.TypicalApplication):
 	def parse_field(self, name, zone, shape):
 		assert isinstance(name, AST.Name), type(name)
 		assert zone is None or isinstance(zone, AST.Name), type(zone)
-		assert isinstance(shape, (AST.Marginalia, AST.Frame, AST.Menu, AST.Tree, AST.LinkRef)), type(shape)
+		assert isinstance(shape, (AST.Marginalia, AST.Frame, AST.Menu, AST.Measure, AST.Tree, AST.LinkRef, AST.Reading)), type(shape)
 		return AST.Field(name, zone, shape)
 	
 	def parse_frame(self, margin, key, fields): return AST.Frame(margin, key, fields)
 	def parse_menu(self, margin, key, fields): return AST.Menu(margin, key, fields)
 	def parse_tree(self, margin, key, within): return AST.Tree(margin, key, within)
+	def parse_measure(self, margin, key, fields): return AST.Measure(margin, key, fields)
+	def parse_plain_reading(self, statistic, margin): return AST.Reading(None, statistic, margin)
+	def parse_reading(self, measure, statistic, margin): return AST.Reading(measure, statistic, margin)
 	
 	def parse_assignment(self, name, value):
 		assert isinstance(name, AST.Name)
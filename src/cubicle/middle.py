@@ -8,7 +8,7 @@ But things will get better...
 import collections
 from typing import List, Union, Mapping, MutableMapping, NamedTuple, Tuple, Dict
 from boozetools.support import foundation, failureprone
-from . import AST, static, formulae, xl_schema, veneer
+from . import AST, static, formulae, xl_schema, veneer, aggregates
 
 
 class SemanticError(Exception):
@@ -134,6 +134,10 @@ class MidCompound(NamedTuple):
 	kind: str # Literal['frame', 'menu', 'tree'] # Literal is new in Python 3.8.
 	argument: object # And as appropriate.
 
+class MidReading(NamedTuple):
+	measure: Union[str, None]
+	statistic: str
+
 class FieldEntry(NamedTuple):
 	shape: object
 	zones: SymbolTable
@@ -315,6 +319,17 @@ class RoutingPass(foundation.Visitor):
 		else: reader = static.SimpleReader(key_text)
 		return MidStyled(menu.margin, MidCompound(reader, 'menu', children.as_dict()))
 	
+	def visit_Measure(self, measure:AST.Measure, name:AST.Name) -> MidStyled:
+		# The reader never reads anything, so a computed one would be no different.
+		computed, key_text, span = self.__figure_key(measure.key or name)
+		children = self.__children(measure.fields, key_text)
+		return MidStyled(measure.margin, MidCompound(static.SimpleReader(key_text), 'measure', children.as_dict()))
+	
+	def visit_Reading(self, reading:AST.Reading, _:AST.Name) -> MidStyled:
+		if aggregates.kind_of(reading.statistic.text) is None: raise UndefinedNameError(reading.statistic, "statistic")
+		measure = None if reading.measure is None else reading.measure.text
+		return MidStyled(reading.margin, MidReading(measure, reading.statistic.text))
+	
 	def visit_Tree(self, tree:AST.Tree, name:AST.Name) -> MidStyled:
 		computed, key_text, span = self.__figure_key(tree.key or name)
 		if computed: reader = static.ComputedReader(key_text)
@@ -415,12 +430,17 @@ class StylingPass(foundation.Visitor):
 		mb.mutate_style(notes.appearance, sub.sc)
 		return sub.visit(ms.content)
 	
+	def visit_MidReading(self, mr:MidReading) -> static.ReadingDefinition:
+		return static.ReadingDefinition(mr.measure, mr.statistic, self.__static_marginalia())
+	
 	def visit_MidCompound(self, mc:MidCompound) -> static.CompoundShapeDefinition:
 		marginalia = self.__static_marginalia()
 		if   mc.kind == 'frame':
 			return static.FrameDefinition(mc.reader, self.visit(mc.argument), marginalia)
 		elif mc.kind == 'menu':
 			return static.MenuDefinition(mc.reader, self.visit(mc.argument), marginalia)
+		elif mc.kind == 'measure':
+			return static.MeasureDefinition(mc.reader, self.visit(mc.argument), marginalia)
 		elif mc.kind == 'tree':
 			return static.TreeDefinition(mc.reader, self.visit(mc.argument), marginalia)
 		else:
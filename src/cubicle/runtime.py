@@ -3,7 +3,7 @@ Here shall be defined those things necessary to integrate the presentation syste
 with whatever run-time plug-in computing power.
 """
 
-from typing import Mapping, Callable, Dict
+from typing import Mapping, Callable, Dict, Optional, Tuple
 
 class DataStreamError(KeyError):
 	pass
@@ -14,6 +14,9 @@ class AbsentKeyError(DataStreamError):
 class InvalidOrdinalError(DataStreamError):
 	""" args[0] is the axis Identifier, or None. args[1] is the offending ordinal. """
 
+class ExpiredOrdinalError(DataStreamError):
+	""" args[0] is the axis Identifier. args[1] is the ordinal, which is older than the axis's window allows. """
+
 
 
 class Environment:
@@ -41,6 +44,33 @@ class Environment:
 	def get_global(self, name:str):
 		""" Whatever this returns must be allowable in a spreadsheet as-is. """
 		raise NotImplementedError(type(self))
+	
+	def cardinality(self, key) -> Optional[Tuple[int, object]]:
+		"""
+		To keep a tree axis down to its heaviest `top` ordinals, with the rest lumped
+		together under the ordinal `other`, return the pair `(top, other)`.
+		The default is no limit.
+		"""
+		return None
+	
+	def window(self, key):
+		"""
+		To keep a tree axis down to a rolling window of its most recent ordinals, return
+		the width of the window. Once an ordinal arrives, any older than it less the width
+		expire, along with everything beneath them. So for instance ordinals that are hours
+		counted as integers, with a width of 23, keep the latest 24 hours. The ordinals must
+		be in order and allow subtraction of the width, like numbers, or else datetimes with
+		a timedelta width. The default is no window.
+		"""
+		return None
+
+	def fingerprint(self):
+		"""
+		Something which changes whenever this environment would make a report come out differently.
+		`cache.WorkbookCache` digests it. The default is the object's attributes.
+		Functions count by name only, so if yours compute with methods, override this to say what matters.
+		"""
+		return vars(self)
 
 class Dimension:
 	"""
@@ -49,12 +79,18 @@ class Dimension:
 	controlled by those `Env` objects.
 	"""
 	sort_key : Callable[[object], object] = None
+	top : Optional[int] = None # Keep only this many ordinals; see `Environment.cardinality`.
+	other : object = 'Other' # ... and lump the rest together under this one.
+	window : object = None # Keep only ordinals this close to the newest; see `Environment.window`.
 	def as_text(self, value) -> str: return str(value)
 	def attribute(self, value, attr:str):
 		try: return getattr(value, attr)
 		except AttributeError: return "[-."+attr+": not found-]"
 		except TypeError: return "[-."+attr+": bad type-]"
 	def indexed(self, value, idx:int): return "[-index-]"
+	def fingerprint(self) -> dict:
+		""" For `Env.fingerprint`: the settings above, whether they come from the class or the instance. """
+		return {'class': type(self), 'sort_key': self.sort_key, 'top': self.top, 'other': self.other, 'window': self.window, **vars(self)}
 
 class Env(Environment):
 	"""
@@ -74,6 +110,20 @@ class Env(Environment):
 	
 	def collation(self, key): return self.__dim(key).sort_key
 	
+	def cardinality(self, key):
+		dim = self.__dim(key)
+		if dim.top is not None: return dim.top, dim.other
+	
+	def window(self, key): return self.__dim(key).window
+	
+	def fingerprint(self):
+		""" Dimensions mostly keep their settings on the class, where `vars` would not see them. """
+		return {
+			'env': self.env,
+			'dims': {key: dim.fingerprint() for key, dim in self.dims.items()},
+			'default': self.default.fingerprint(),
+		}
+	
 	def get_global(self, name: str):
 		try: return self.env[name]
 		except KeyError: return "[.%s: missing global]"%name
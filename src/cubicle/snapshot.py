@@ -0,0 +1,218 @@
+"""
+Read-only canvases shared between processes by way of a memory-mapped file.
+
+`Canvas.freeze(path)` writes a finished canvas out as flat arrays, and `attach`
+opens one in any number of other processes. The cells stay in the mapping: the
+operating system shares those pages among every process that attaches, so a big
+canvas costs its memory once rather than once per worker. Only the layout trees
+get rebuilt as objects, because plotting plans them in place; they grow with the
+number of rows and columns, not with the number of cells.
+
+The cells are stored row by row, in the manner of a compressed sparse-row matrix:
+
+	ROWS	for each node serial number, where its row's cells begin (one extra at the end)
+	COLS	the column serial number of each cell, ascending within each row
+	TAGS	one byte per cell saying what sort of value it has
+	VALS	eight bytes per cell: an integer, a float, or else an index into OFFS
+	OFFS	where each pickled value begins in BLOB (one extra at the end)
+	BLOB	the pickles, for everything that isn't a plain number (e.g. measure tallies)
+
+Along with those, NAME, KEYS, ORDS, ACRS, DOWN and CENS are as in a checkpoint.
+The arrays are in the machine's own byte order, since that's what makes them
+usable in place, so a snapshot only attaches on a machine of the same kind.
+"""
+
+import bisect, mmap, pickle, struct, sys
+from array import array
+from . import dynamic, static, runtime, checkpoint
+
+MAGIC = b'CUBSNAP\x00'
+VERSION = 1
+ORDER = {'little':0, 'big':1}[sys.byteorder]
+
+_INT, _FLOAT, _OTHER = 0, 1, 2
+_HEAD = struct.Struct('<8sIII') # magic, version, byte order, number of sections
+_ENTRY = struct.Struct('<4s4xQQ') # tag, offset, length
+
+class SnapshotError(checkpoint.CheckpointError):
+	""" The file is no snapshot, or was made elsewhere, or for some other layout. """
+
+
+def freeze(canvas:dynamic.Canvas, path):
+	canvas.sweep()
+	ordinals, nodes, streams = checkpoint._flatten(canvas)
+	serials = {node:i for i, node in enumerate(nodes)}
+	censuses = {i:node.census for i, node in enumerate(nodes) if isinstance(node, dynamic.InternalNode) and node.census}
+	by_row = {}
+	for (col_node, row_node), value in canvas.cell_data.items():
+		by_row.setdefault(serials[row_node], []).append((serials[col_node], value))
+	starts, cols, tags, vals, offsets, blob = array('Q', [0]), array(checkpoint._U32), bytearray(), bytearray(), array('Q', [0]), bytearray()
+	for r in range(len(nodes)):
+		for c, value in sorted(by_row.get(r, ()), key=lambda pair: pair[0]):
+			cols.append(c)
+			kind = type(value)
+			if kind is int and -2**63 <= value < 2**63:
+				tags.append(_INT)
+				vals += struct.pack('=q', value)
+			elif kind is float:
+				tags.append(_FLOAT)
+				vals += struct.pack('=d', value)
+			else:
+				tags.append(_OTHER)
+				vals += struct.pack('=q', len(offsets) - 1)
+				blob += pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+				offsets.append(len(blob))
+		starts.append(len(cols))
+
+	sections = [
+		(b'NAME', canvas.identifier.encode('utf-8')),
+		(b'KEYS', checkpoint._axis_keys(canvas)),
+		(b'ORDS', checkpoint._pack_values(ordinals)),
+		(b'ACRS', streams[0].tobytes()),
+		(b'DOWN', streams[1].tobytes()),
+		(b'CENS', checkpoint._pack_censuses(censuses)),
+		(b'ROWS', starts.tobytes()),
+		(b'COLS', cols.tobytes()),
+		(b'TAGS', bytes(tags)),
+		(b'VALS', bytes(vals)),
+		(b'OFFS', offsets.tobytes()),
+		(b'BLOB', bytes(blob)),
+	]
+	with open(path, 'wb') as fh:
+		at = _HEAD.size + _ENTRY.size * len(sections)
+		fh.write(_HEAD.pack(MAGIC, VERSION, ORDER, len(sections)))
+		places = []
+		for tag, data in sections:
+			at += -at % 8 # Keep every array aligned for its widest item.
+			places.append(at)
+			fh.write(_ENTRY.pack(tag, at, len(data)))
+			at += len(data)
+		for place, (tag, data) in zip(places, sections):
+			fh.write(bytes(place - fh.tell()))
+			fh.write(data)
+
+
+class SnapshotCellStore:
+	"""
+	Stands in for a canvas's cell dictionary, reading straight from the mapping.
+	Lookups find the row, then bisect that row's columns. Writing raises `TypeError`.
+	"""
+	def __init__(self, mapping:mmap.mmap, sections:dict, nodes:list):
+		self.__mapping = mapping
+		self.__views = []
+		def view(tag, typecode=None):
+			offset, length = sections[tag]
+			it = memoryview(mapping)[offset:offset+length]
+			self.__views.append(it)
+			if typecode is not None:
+				it = it.cast(typecode)
+				self.__views.append(it)
+			return it
+		self.__starts = view(b'ROWS', 'Q')
+		self.__cols = view(b'COLS', checkpoint._U32)
+		self.__tags = view(b'TAGS')
+		self.__ints = view(b'VALS', 'q')
+		self.__floats = view(b'VALS', 'd')
+		self.__offsets = view(b'OFFS', 'Q')
+		self.__blob = view(b'BLOB')
+		self.__nodes = nodes
+		self.__serial = {node:i for i, node in enumerate(nodes)}
+
+	def __value(self, i:int):
+		tag = self.__tags[i]
+		if tag == _INT: return self.__ints[i]
+		if tag == _FLOAT: return self.__floats[i]
+		j = self.__ints[i]
+		return pickle.loads(self.__blob[self.__offsets[j]:self.__offsets[j+1]])
+
+	def __find(self, key) -> int:
+		""" Index of a cell, or -1 if it's not there. """
+		col, row = self.__serial.get(key[0]), self.__serial.get(key[1])
+		if col is None or row is None: return -1
+		lo, hi = self.__starts[row], self.__starts[row+1]
+		i = bisect.bisect_left(self.__cols, col, lo, hi)
+		return i if i < hi and self.__cols[i] == col else -1
+
+	def get(self, key, default=None):
+		i = self.__find(key)
+		return default if i < 0 else self.__value(i)
+
+	def __getitem__(self, key):
+		""" Like a `defaultdict(int)`, except that reading does not create the cell. """
+		return self.get(key, 0)
+
+	def __contains__(self, key):
+		return self.__find(key) >= 0
+
+	def __len__(self):
+		return len(self.__cols)
+
+	def items(self):
+		""" Every cell, row by row. """
+		nodes, starts, cols = self.__nodes, self.__starts, self.__cols
+		for row in range(len(nodes)):
+			for i in range(starts[row], starts[row+1]):
+				yield (nodes[cols[i]], nodes[row]), self.__value(i)
+
+	def __iter__(self):
+		for key, _ in self.items(): yield key
+
+	def keys(self): return iter(self)
+
+	def values(self):
+		for _, value in self.items(): yield value
+
+	def __setitem__(self, key, value): raise TypeError("A canvas snapshot is read-only.")
+	def __delitem__(self, key): raise TypeError("A canvas snapshot is read-only.")
+	def pop(self, key, default=None): raise TypeError("A canvas snapshot is read-only.")
+
+	def close(self):
+		""" Let go of the mapping. Any further reading of the canvas is an error. """
+		for it in reversed(self.__views): it.release()
+		self.__views = []
+		self.__mapping.close()
+
+	def __enter__(self): return self
+	def __exit__(self, *exc): self.close()
+
+
+def attach(cub_module:static.CubModule, identifier:str, environment:runtime.Environment, path) -> dynamic.Canvas:
+	"""
+	A read-only canvas over the snapshot at `path`. It plots, renders, and reads cells
+	like any other, but refuses new data. Its `cell_data` is a `SnapshotCellStore`,
+	to `close()` when you're done.
+	"""
+	with open(path, 'rb') as fh:
+		mapping = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+	try:
+		if len(mapping) < _HEAD.size: raise SnapshotError("Not a canvas snapshot.")
+		magic, version, order, count = _HEAD.unpack_from(mapping)
+		if magic != MAGIC: raise SnapshotError("Not a canvas snapshot.")
+		if version > VERSION: raise SnapshotError("Snapshot format version %d is newer than this software (%d)." % (version, VERSION))
+		if order != ORDER: raise SnapshotError("Snapshot was made on a machine of the other byte order.")
+		sections = {}
+		for k in range(count):
+			tag, offset, length = _ENTRY.unpack_from(mapping, _HEAD.size + k * _ENTRY.size)
+			if offset + length > len(mapping): raise SnapshotError("Snapshot is truncated.")
+			sections[tag] = offset, length
+		def read(tag) -> bytes:
+			try: offset, length = sections[tag]
+			except KeyError: raise SnapshotError("Snapshot lacks section %s." % tag.decode('ascii')) from None
+			return mapping[offset:offset+length]
+
+		canvas = dynamic.Canvas(cub_module, identifier, environment)
+		if read(b'KEYS') != checkpoint._axis_keys(canvas):
+			raise SnapshotError("Snapshot of canvas %r does not match the layout of %r." % (read(b'NAME').decode('utf-8'), identifier))
+		for tag in (b'ROWS', b'COLS', b'TAGS', b'VALS', b'OFFS', b'BLOB'): read(tag)
+		try:
+			streams = [array(checkpoint._U32, read(b'ACRS')), array(checkpoint._U32, read(b'DOWN'))]
+			nodes = checkpoint._rebuild(canvas, checkpoint._unpack_values(read(b'ORDS')), streams)
+			for serial, census in checkpoint._unpack_censuses(read(b'CENS')).items(): nodes[serial].census = census
+		except SnapshotError: raise
+		except (checkpoint.CheckpointError, *checkpoint._DAMAGE) as e: raise SnapshotError("Snapshot is damaged, or does not fit the layout.") from e
+		canvas.cell_data = SnapshotCellStore(mapping, sections, nodes)
+		canvas.read_only = True
+	except Exception:
+		mapping.close()
+		raise
+	return canvas
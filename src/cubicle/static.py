@@ -67,6 +67,14 @@ class LeafDefinition(ShapeDefinition):
 		pass # Nothing to do here.
 
 
+class ReadingDefinition(LeafDefinition):
+	""" A field of a :measure, which shows one statistic (see module `aggregates`) of one measure. """
+	def __init__(self, measure:Optional[str], statistic:str, margin:Marginalia):
+		super().__init__(margin)
+		self.measure = measure
+		self.statistic = statistic
+
+
 class CompoundShapeDefinition(ShapeDefinition):
 	"""
 	Call it implementation inheritance if you must, but it's expedient, factored, and not too weird.
@@ -115,6 +123,14 @@ class FrameDefinition(CompoundShapeDefinition):
 		return self.fields[label]
 	
 
+class MeasureDefinition(FrameDefinition):
+	"""
+	A :measure in the language. Laid out just like a frame, but it reads no ordinal:
+	data lands on the measure as a whole, and each field reads its own statistic out of that.
+	The reader is only there to give selectors a characteristic axis.
+	"""
+
+
 class MenuDefinition(CompoundShapeDefinition):
 	"""
 	A :menu in the language. Has some things in common with both Tree and Frame.
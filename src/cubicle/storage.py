@@ -0,0 +1,203 @@
+"""
+Alternative homes for the cell data of a canvas.
+
+Normally a `dynamic.Canvas` keeps its cells in a `defaultdict(int)` keyed by
+pairs of (column, row) layout nodes. That's fine until it isn't. The stores
+in here mimic just enough of that dictionary to stand in for it:
+`incr`/`decr`/`poke` need item get-and-set with a default of zero,
+and plotting needs `.get(key, default)`.
+"""
+
+import collections, os, pickle, sqlite3, tempfile, threading
+
+_MISSING = object()
+
+def _encode(value):
+	""" SQLite natively stores these. Anything else (dates, booleans, URLs...) goes in a pickle. """
+	if value is None or type(value) in (float, str): return value
+	if type(value) is int and -2**63 <= value < 2**63: return value
+	return pickle.dumps(value)
+
+def _decode(stored):
+	if isinstance(stored, bytes): return pickle.loads(stored)
+	return stored
+
+
+class SpillingCellStore:
+	"""
+	Keeps recently-touched cells in memory and spills the rest to an SQLite file.
+
+	The only knob is the memory budget, in bytes. That's converted to a number of
+	resident cells using a rough per-cell cost. When the resident set outgrows it,
+	the least-recently-used quarter gets written out in one batch.
+
+	Reads that miss in memory fetch the entire row from disk and keep it as a "page".
+	Plotting reads cells in row-major order, so that's one query per row rather than
+	one per cell (most of which are blank anyway).
+
+	Layout nodes can't go to disk, so each one gets a serial number on first use.
+	That table grows with the number of rows and columns, not with the number of cells.
+
+	If you give a `path`, any existing cell table there is replaced: serial numbers
+	mean nothing to another process. Otherwise a temporary file is used and removed
+	by `.close()`.
+
+	Any thread may use the store (as `concurrency` and `feeder` do), one at a time:
+	it takes a lock of its own around each operation.
+	"""
+
+	CELL_COST = 200 # Rough bytes per resident cell, including key tuple and LRU bookkeeping.
+
+	def __init__(self, memory_budget:int, path=None):
+		self.capacity = max(1, memory_budget // self.CELL_COST)
+		if path is None:
+			handle, path = tempfile.mkstemp(suffix='.cells')
+			os.close(handle)
+			self.__temporary = path
+		else: self.__temporary = None
+		self.__db = sqlite3.connect(path, check_same_thread=False)
+		self.__db.execute('PRAGMA journal_mode=OFF')
+		self.__db.execute('PRAGMA synchronous=OFF')
+		self.__db.execute('DROP TABLE IF EXISTS cell')
+		self.__db.execute('CREATE TABLE cell (row INTEGER, col INTEGER, value, PRIMARY KEY (row, col)) WITHOUT ROWID')
+		self.__hot = collections.OrderedDict() # Least-recently used first.
+		self.__dirty = set()
+		self.__serial = {}
+		self.__nodes = []
+		self.__page_row, self.__page = None, {}
+		self.__count = 0 # Cells in the store, resident or not.
+		self.__lock = threading.RLock()
+
+	def __number(self, node) -> int:
+		try: return self.__serial[node]
+		except KeyError:
+			it = self.__serial[node] = len(self.__nodes)
+			self.__nodes.append(node)
+			return it
+
+	def __fetch(self, key):
+		""" Look on disk, by way of the current page. """
+		col, row = self.__serial.get(key[0]), self.__serial.get(key[1])
+		if col is None or row is None: return _MISSING
+		if row != self.__page_row:
+			query = self.__db.execute('SELECT col, value FROM cell WHERE row=?', (row,))
+			self.__page_row, self.__page = row, dict(query)
+		stored = self.__page.get(col, _MISSING)
+		return stored if stored is _MISSING else _decode(stored)
+
+	def __write(self, keys):
+		rows = [(self.__number(r), self.__number(c), _encode(self.__hot[c, r])) for c, r in keys]
+		self.__db.executemany('INSERT OR REPLACE INTO cell VALUES (?, ?, ?)', rows)
+		self.__page_row = None
+
+	def __spill(self):
+		victims = []
+		for key in self.__hot:
+			victims.append(key)
+			if len(victims) * 4 >= self.capacity: break
+		self.__write([key for key in victims if key in self.__dirty])
+		for key in victims:
+			self.__dirty.discard(key)
+			del self.__hot[key]
+
+	def flush(self):
+		""" Make the disk copy complete. Resident cells stay resident. """
+		with self.__lock:
+			if self.__dirty:
+				self.__write(self.__dirty)
+				self.__dirty.clear()
+
+	def get(self, key, default=None):
+		with self.__lock:
+			try: value = self.__hot[key]
+			except KeyError:
+				value = self.__fetch(key)
+				return default if value is _MISSING else value
+			else:
+				self.__hot.move_to_end(key)
+				return value
+
+	def __getitem__(self, key):
+		""" Like a `defaultdict(int)`, except that reading does not create the cell. """
+		return self.get(key, 0)
+
+	def __setitem__(self, key, value):
+		with self.__lock:
+			if key not in self.__hot and self.__fetch(key) is _MISSING: self.__count += 1
+			self.__hot[key] = value
+			self.__hot.move_to_end(key)
+			self.__dirty.add(key)
+			if len(self.__hot) > self.capacity: self.__spill()
+
+	def __contains__(self, key):
+		with self.__lock: return key in self.__hot or self.__fetch(key) is not _MISSING
+
+	def __delitem__(self, key):
+		with self.__lock:
+			present = key in self
+			self.__hot.pop(key, None)
+			self.__dirty.discard(key)
+			if not present: raise KeyError(key)
+			self.__count -= 1
+			col, row = self.__serial.get(key[0]), self.__serial.get(key[1])
+			if col is not None and row is not None:
+				self.__db.execute('DELETE FROM cell WHERE row=? AND col=?', (row, col))
+				if row == self.__page_row: self.__page_row = None
+
+	def pop(self, key, default=_MISSING):
+		with self.__lock:
+			value = self.get(key, _MISSING)
+			if value is _MISSING:
+				if default is _MISSING: raise KeyError(key)
+				return default
+			del self[key]
+			return value
+
+	def __len__(self):
+		return self.__count
+
+	def __query(self, sql, parameters=()):
+		""" Rows a batch at a time, so that other threads get a turn in between. """
+		with self.__lock:
+			self.flush()
+			cursor = self.__db.execute(sql, parameters)
+		while True:
+			with self.__lock: batch = cursor.fetchmany(1000)
+			if not batch: return
+			yield from batch
+
+	def items(self):
+		""" Every cell, in no particular order. """
+		nodes = self.__nodes
+		for row, col, stored in self.__query('SELECT row, col, value FROM cell'):
+			yield (nodes[col], nodes[row]), _decode(stored)
+
+	def __iter__(self):
+		for key, _ in self.items(): yield key
+
+	def keys(self): return iter(self)
+
+	def values(self):
+		for _, value in self.items(): yield value
+
+	def row_major(self, row_nodes):
+		"""
+		Populated cells in the same order `Canvas.plot` visits them: rows in the order given,
+		and within each row, by column position. So the canvas must be planned (or plotted) first.
+		"""
+		nodes = self.__nodes
+		for row_node in row_nodes:
+			row = self.__serial.get(row_node)
+			if row is None: continue
+			query = self.__query('SELECT col, value FROM cell WHERE row=?', (row,))
+			found = sorted(((nodes[col], stored) for col, stored in query), key=lambda pair: pair[0].begin)
+			for col_node, stored in found: yield (col_node, row_node), _decode(stored)
+
+	def close(self):
+		with self.__lock: self.__db.close()
+		if self.__temporary is not None:
+			os.remove(self.__temporary)
+			self.__temporary = None
+
+	def __enter__(self): return self
+	def __exit__(self, *exc): self.close()
@@ -1,7 +1,7 @@
 """
 Some utility functions and classes that should make life easier everywhere else.
 """
-import pathlib, tempfile, pickle, os, sys, subprocess
+import pathlib, tempfile, pickle, os, sys, subprocess, itertools
 from typing import Iterable
 from xlsxwriter.utility import xl_rowcol_to_cell, xl_range
 
@@ -33,6 +33,15 @@ def collapse_runs(entries: Iterable[int]):
 	stash()
 	return result
 
+def chunked(items: Iterable, size: int):
+	""" Break a (possibly endless) stream into lists of at most `size` elements. """
+	assert size > 0, size
+	traversal = iter(items)
+	while True:
+		chunk = list(itertools.islice(traversal, size))
+		if not chunk: return
+		yield chunk
+
 def tables(basis, doc) -> dict:
 	"""
 	Perhaps this routine belies a deficiency in the stack, but the object is to be able to
@@ -63,6 +63,28 @@ FORMAT_PROPERTIES = {
 	'right_color': kind_color,
 }
 
+# How big a worksheet can be:
+MAX_ROWS = 1048576
+MAX_COLUMNS = 16384
+MAX_FORMULA = 8192 # characters
+
+# These properties make a difference even to a cell with nothing in it, unless they have the given inert value.
+# A blank cell formatted with none of them looks (and behaves) the same as no cell at all.
+BLANK_CELL_PROPERTIES = {
+	'pattern': 0,
+	'bg_color': None,
+	'fg_color': None,
+	'border': 0,
+	'bottom': 0,
+	'top': 0,
+	'left': 0,
+	'right': 0,
+	'diag_border': 0,
+	'diag_type': 0,
+	'locked': True,
+	'hidden': False,
+}
+
 OUTLINE_PROPERTIES = {
 	'height': kind_number,
 	'width': kind_number,
@@ -0,0 +1,4 @@
+import os, sys
+
+# So that plain `pytest` finds the package without installing it first.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,72 @@
+import os, tempfile, unittest
+from cubicle import cache, compiler, dynamic, runtime
+
+SOURCE = '''
+kinds :frame [ label :head 1 ; _ 'Amount' ]
+months :tree :axis month "[month]"
+statement :canvas kinds months [ ]
+'''
+
+DATA = [('Jan', 1), ('Feb', 2), ('Mar', 3), ('Jan', 4)]
+
+class TopTwo(runtime.Dimension):
+	top = 2
+
+class TopThree(runtime.Dimension):
+	top = 3
+
+class Backwards(runtime.Dimension):
+	@staticmethod
+	def sort_key(month): return month[::-1]
+
+class TestWorkbookCache(unittest.TestCase):
+	
+	def setUp(self):
+		self.module = compiler.compile_string(SOURCE)
+		folder = tempfile.TemporaryDirectory()
+		self.addCleanup(folder.cleanup)
+		self.folder = folder.name
+		self.cache = cache.WorkbookCache(os.path.join(self.folder, 'cache'))
+	
+	def canvas(self, data=DATA, env=None):
+		canvas = dynamic.Canvas(self.module, 'statement', env or runtime.Env())
+		for month, amount in data: canvas.incr({'month': month}, amount)
+		return canvas
+	
+	def plot(self, canvas, name='out.xlsx', **kwargs):
+		return self.cache.plot(canvas, os.path.join(self.folder, name), **kwargs)
+	
+	def test_hit(self):
+		self.assertFalse(self.plot(self.canvas(), 'a.xlsx'))
+		self.assertTrue(self.plot(self.canvas(list(reversed(DATA))), 'b.xlsx'))
+		self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+		with open(os.path.join(self.folder, 'a.xlsx'), 'rb') as a, open(os.path.join(self.folder, 'b.xlsx'), 'rb') as b:
+			self.assertEqual(a.read(), b.read())
+	
+	def test_miss(self):
+		self.assertFalse(self.plot(self.canvas()))
+		self.assertFalse(self.plot(self.canvas(DATA + [('Apr', 1)])))
+		self.assertFalse(self.plot(self.canvas(), evaluate=True))
+		self.assertEqual(0, self.cache.hits)
+	
+	def test_dimension_settings_count(self):
+		digest = lambda env: self.cache.digest(self.canvas([], env))
+		plain = digest(runtime.Env())
+		top_two = digest(runtime.Env(dims={'month': TopTwo()}))
+		self.assertNotEqual(plain, top_two)
+		self.assertNotEqual(top_two, digest(runtime.Env(dims={'month': TopThree()})))
+		self.assertNotEqual(plain, digest(runtime.Env(dims={'month': Backwards()})))
+		self.assertEqual(top_two, digest(runtime.Env(dims={'month': TopTwo()})))
+		TopTwo.top = 3 # As if someone edited the class between runs.
+		try: self.assertNotEqual(top_two, digest(runtime.Env(dims={'month': TopTwo()})))
+		finally: TopTwo.top = 2
+	
+	def test_evict(self):
+		self.plot(self.canvas())
+		self.plot(self.canvas(DATA[:2]))
+		self.cache.max_bytes = 1
+		self.cache.evict()
+		self.assertEqual([], [name for name in os.listdir(self.cache.directory) if name.endswith('.xlsx')])
+
+if __name__ == '__main__':
+	unittest.main()
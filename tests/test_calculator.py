@@ -0,0 +1,70 @@
+import io, unittest
+import openpyxl, xlsxwriter
+from cubicle import calculator, compiler, dynamic, runtime
+from cubicle.calculator import Cells, Unevaluable, calculate
+
+SOURCE = '''
+across :frame [
+	pl 'Plan'
+	ch 'Change'
+	fc 'Forecast' @'[across=pl|ch]'
+]
+down :frame [
+	_ :tree :axis region
+	total 'Total' @'sum([down=_])'
+]
+sheet :canvas across down [ ]
+'''
+
+class TestCalculate(unittest.TestCase):
+	
+	def test_arithmetic_and_precedence(self):
+		self.assertEqual(7, calculate(['=1+2*3']))
+		self.assertEqual(9, calculate(['(1+2)*3']))
+		self.assertEqual(-8, calculate(['-2^3']))
+		self.assertEqual(0.5, calculate(['50%']))
+		self.assertEqual(2.5, calculate(['5/2']))
+	
+	def test_operands_and_ranges(self):
+		self.assertEqual(10, calculate(['sum(', Cells([1, None, 'text', 4]), ',', 5, ')']))
+		self.assertEqual(3, calculate([Cells([3]), '*1']))
+		self.assertEqual(2, calculate(['count(', Cells([1, True, None, 2.5]), ')']))
+		self.assertEqual(2.5, calculate(['average(1,2,3,4)']))
+		self.assertEqual(-3, calculate(['min(4,-3)']))
+		self.assertEqual(3.0, calculate(['round(2.5)']))
+	
+	def test_integers_stay_integers(self):
+		self.assertIsInstance(calculator.total(1, 2, Cells([3])), int)
+	
+	def test_unevaluable(self):
+		for pieces in (['1/0'], ['vlookup(1,2)'], ['1+'], ['(1'], ['#'], [Cells([1, 2]), '+1'], ['"a"+1'], ['average()']):
+			with self.subTest(pieces=pieces), self.assertRaises(Unevaluable):
+				calculate(pieces)
+
+class TestCachedValues(unittest.TestCase):
+	
+	def setUp(self):
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'sheet', runtime.Env())
+		self.canvas.incr({'region': 'North', 'across': 'pl'}, 2)
+		self.canvas.incr({'region': 'South', 'across': 'pl'}, 3)
+		self.canvas.incr({'region': 'North', 'across': 'ch'}, 1)
+	
+	def plot(self, data_only, **kwargs):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0, **kwargs)
+		workbook.close()
+		return [[cell.value for cell in row] for row in openpyxl.load_workbook(out, data_only=data_only).active.iter_rows()]
+	
+	def test_formulas_carry_their_values(self):
+		self.assertEqual([[2, 1, 3], [3, None, 3], [5, 1, 6]], self.plot(True, evaluate=True))
+		self.assertEqual('=sum(sum(A1:A2))', self.plot(False, evaluate=True)[2][0])
+	
+	def test_values_only(self):
+		self.assertEqual([[2, 1, 3], [3, None, 3], [5, 1, 6]], self.plot(False, values_only=True))
+	
+	def test_no_values_unless_asked(self):
+		self.assertEqual(0, self.plot(True)[2][2])
+
+if __name__ == '__main__':
+	unittest.main()
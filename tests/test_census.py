@@ -0,0 +1,54 @@
+import io, random, unittest
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1
+	amount 'Amount'
+]
+down :frame [
+	_ :tree :axis sku "[sku]"
+	total 'Total' @'sum([down=_])'
+]
+report :canvas across down [ ]
+'''
+
+class TopFive(runtime.Dimension):
+	top = 5
+
+class TestCensus(unittest.TestCase):
+	
+	def setUp(self):
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'report', runtime.Env(dims={'sku': TopFive()}))
+		rng = random.Random(4)
+		self.feed = [('tail-%d' % rng.randrange(500), 1) for _ in range(3000)]
+		self.feed[1500:1500] = [('heavy-%d' % (i % 3), 50) for i in range(60)] # Late heavy hitters
+		for sku, amount in self.feed:
+			self.canvas.incr({'sku': sku, 'across': 'amount'}, amount)
+	
+	def skus(self):
+		return self.canvas.down.tree.children['_'].children
+	
+	def test_top_and_other(self):
+		skus = self.skus()
+		self.assertLessEqual(len(skus), 6)
+		self.assertIn('Other', skus)
+		self.assertLessEqual({'heavy-0', 'heavy-1', 'heavy-2'}, set(skus))
+	
+	def test_totals_are_exact(self):
+		self.assertEqual(sum(amount for _, amount in self.feed), sum(self.canvas.cell_data.values()))
+		self.assertEqual(len(self.skus()), len(self.canvas.cell_data))
+	
+	def test_other_plots_last(self):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0, evaluate=True)
+		workbook.close()
+		rows = [[cell.value for cell in row] for row in openpyxl.load_workbook(out, data_only=True).active.iter_rows()]
+		self.assertEqual(['Other', 'Total'], [row[0] for row in rows[-2:]])
+		self.assertEqual(sum(amount for _, amount in self.feed), rows[-1][1])
+		self.assertEqual(sum(row[1] for row in rows[:-1]), rows[-1][1])
+
+if __name__ == '__main__':
+	unittest.main()
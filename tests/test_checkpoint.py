@@ -0,0 +1,85 @@
+import io, random, unittest
+import openpyxl, xlsxwriter
+from cubicle import checkpoint, compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1
+	amount 'Amount'
+	_ :measure [
+		biggest price.max 'Biggest'
+		buyers buyer.distinct 'Buyers'
+	]
+]
+down :frame [
+	_ :tree :axis sku "[sku]"
+	total 'Total' @'sum([down=_])'
+]
+report :canvas across down [ ]
+other :canvas down across [ ]
+'''
+
+class TopFour(runtime.Dimension):
+	top = 4
+
+class TestCheckpoint(unittest.TestCase):
+	
+	def setUp(self):
+		self.module = compiler.compile_string(SOURCE)
+		self.env = runtime.Env(dims={'sku': TopFour()})
+		self.canvas = dynamic.Canvas(self.module, 'report', self.env)
+		self.feed(self.canvas, 1)
+	
+	def feed(self, canvas, seed):
+		rng = random.Random(seed)
+		for i in range(400):
+			sku = 'sku-%d' % min(rng.randrange(40), rng.randrange(40))
+			canvas.incr({'sku': sku, 'across': 'amount'}, rng.randint(1, 9))
+			canvas.incr({'sku': sku}, {'price': rng.uniform(1, 50), 'buyer': 'b%d' % rng.randrange(30)})
+	
+	def saved(self, canvas=None):
+		out = io.BytesIO()
+		(canvas or self.canvas).save(out)
+		return out.getvalue()
+	
+	def load(self, data, identifier='report'):
+		return dynamic.Canvas.load(self.module, identifier, self.env, io.BytesIO(data))
+	
+	@staticmethod
+	def plot(canvas):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+		workbook.close()
+		return [[cell.value for cell in row] for row in openpyxl.load_workbook(out).active.iter_rows()]
+	
+	def test_round_trip(self):
+		restored = self.load(self.saved())
+		self.assertEqual(self.plot(self.canvas), self.plot(restored))
+		self.assertEqual(self.plot(self.canvas), self.plot(self.load(self.saved(restored))))
+	
+	def test_census_carries_on(self):
+		restored = self.load(self.saved())
+		self.feed(self.canvas, 2)
+		self.feed(restored, 2)
+		self.assertEqual(self.plot(self.canvas), self.plot(restored))
+	
+	def test_census_is_not_pickled(self):
+		self.assertNotIn(b'Census', self.saved())
+	
+	def test_wrong_layout(self):
+		with self.assertRaises(checkpoint.CheckpointError): self.load(self.saved(), 'other')
+	
+	def test_damage(self):
+		data = self.saved()
+		for size in (0, 5, 12, 40, len(data) // 2, len(data) - 1):
+			with self.assertRaises(checkpoint.CheckpointError): self.load(data[:size])
+		rng = random.Random(3)
+		for _ in range(300):
+			damaged = bytearray(data)
+			for _ in range(rng.randint(1, 4)): damaged[rng.randrange(12, len(damaged))] = rng.randrange(256)
+			try: self.load(bytes(damaged))
+			except checkpoint.CheckpointError: pass
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,87 @@
+import random, threading, unittest
+from cubicle import compiler, concurrency, dynamic, runtime
+
+SOURCE = '''
+kinds :frame :axis kind [ base 'Base' ; change 'Change Orders' ]
+regions :tree :axis region "[region]"
+plain :canvas kinds regions [ ]
+'''
+
+def canvas():
+	return dynamic.Canvas(compiler.compile_string(SOURCE), 'plain', runtime.Env())
+
+def cells(canvas):
+	""" The cell data keyed by ordinals rather than by nodes, to compare between canvases. """
+	kinds = {node: label for label, node in canvas.across.tree.children.items()}
+	regions = {node: label for label, node in canvas.down.tree.children.items()}
+	return {(kinds[col], regions[row]): value for (col, row), value in canvas.cell_data.items()}
+
+class TestBatch(unittest.TestCase):
+	
+	def fill(self, target):
+		rng = random.Random(9)
+		for _ in range(500):
+			point = {'kind': rng.choice(['base', 'change']), 'region': 'R%d' % rng.randrange(20)}
+			if rng.random() < 0.2: target.decr(point, 1)
+			else: target.incr(point, rng.randint(1, 10))
+	
+	def test_same_as_direct(self):
+		direct, batched = canvas(), canvas()
+		self.fill(direct)
+		batch = batched.batch()
+		self.fill(batch)
+		self.assertEqual(40, len(batch))
+		batched.apply(batch)
+		self.assertEqual(cells(direct), cells(batched))
+	
+	def test_all_or_nothing(self):
+		target = canvas()
+		batch = target.batch()
+		for r in range(20): batch.incr({'kind': 'base', 'region': 'R%d' % r}, 1)
+		batch.incr({'kind': 'bogus', 'region': 'Nowhere'}, 1)
+		with self.assertRaises(runtime.InvalidOrdinalError): target.apply(batch)
+		self.assertEqual({}, target.down.tree.children)
+		self.assertEqual(0, len(target.cell_data))
+		self.assertEqual(21, len(batch))
+	
+	def test_reject(self):
+		target = canvas()
+		batch = target.batch()
+		for r in range(20): batch.incr({'kind': 'base', 'region': 'R%d' % r}, 1)
+		batch.incr({'kind': 'bogus', 'region': 'Nowhere'}, 1)
+		batch.incr({'kind': 'change', 'region': 'R0'}, 'text')
+		rejected = []
+		target.apply(batch, lambda point, e: rejected.append((point['region'], type(e))))
+		self.assertEqual([('Nowhere', runtime.InvalidOrdinalError), ('R0', TypeError)], sorted(rejected))
+		self.assertEqual(20, sum(target.cell_data.values()))
+
+class TestConcurrentCanvas(unittest.TestCase):
+	
+	def test_many_threads(self):
+		shared = concurrency.ConcurrentCanvas(canvas(), batch_limit=7)
+		def work(n):
+			for i in range(1000): shared.incr({'kind': ('base', 'change')[i % 2], 'region': 'R%d' % (i % 13)}, n)
+		threads = [threading.Thread(target=work, args=(n,)) for n in range(1, 9)]
+		for t in threads: t.start()
+		for t in threads: t.join()
+		with shared.exclusive() as target:
+			self.assertEqual(1000 * sum(range(1, 9)), sum(target.cell_data.values()))
+			self.assertEqual(26, len(target.cell_data))
+	
+	def test_bad_point_loses_no_good_data(self):
+		shared = concurrency.ConcurrentCanvas(canvas(), batch_limit=21)
+		for r in range(20): shared.incr({'kind': 'base', 'region': 'R%d' % r}, 1)
+		with self.assertRaises(runtime.InvalidOrdinalError): shared.incr({'kind': 'bogus', 'region': 'Nowhere'}, 1)
+		with shared.exclusive() as target: self.assertEqual(20, sum(target.cell_data.values()))
+	
+	def test_reject_callback(self):
+		rejected = []
+		shared = concurrency.ConcurrentCanvas(canvas(), reject=lambda point, e: rejected.append(point))
+		shared.incr({'kind': 'base', 'region': 'East'}, 5)
+		shared.incr({'kind': 'bogus', 'region': 'West'}, 5)
+		shared.flush()
+		self.assertEqual([{'kind': 'bogus', 'region': 'West'}], rejected)
+		with shared.exclusive() as target: self.assertEqual([5], list(target.cell_data.values()))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,93 @@
+import io, os, subprocess, sys, unittest
+import openpyxl, xlsxwriter
+from cubicle import aggregates, compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1
+	_ :measure [
+		customers customer.distinct 'Customers'
+	]
+]
+down :frame [
+	_ :tree :axis region "[region]"
+	total 'All' @'[down=_]'
+]
+report :canvas across down [ ]
+'''
+
+def sketch(values):
+	hll = aggregates.HyperLogLog()
+	for value in values: hll.add(value)
+	return hll
+
+class TestHyperLogLog(unittest.TestCase):
+	
+	def test_exact_when_small(self):
+		self.assertEqual(64, sketch('id-%d' % (i % 64) for i in range(1000)).estimate())
+		self.assertEqual(0, aggregates.HyperLogLog().estimate())
+	
+	def test_accuracy(self):
+		# The standard error is 1.6%; four of those is a generous bound for a fixed input.
+		for n in (100, 5000, 200000):
+			with self.subTest(n=n):
+				self.assertLess(abs(sketch('user-%d' % i for i in range(n)).estimate() - n), n * 0.064)
+	
+	def test_merge_is_union(self):
+		a, b = sketch(range(0, 30000)), sketch(range(20000, 50000))
+		self.assertLess(abs((a + b).estimate() - 50000), 50000 * 0.064)
+		small = sketch(range(10)) + sketch(range(5, 20))
+		self.assertEqual(20, small.estimate())
+	
+	def test_stable_across_processes(self):
+		script = 'from cubicle import aggregates; print(aggregates._hash64("customer-1"))'
+		env = dict(os.environ, PYTHONHASHSEED='12345', PYTHONPATH=os.pathsep.join(sys.path))
+		elsewhere = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True)
+		self.assertEqual(aggregates._hash64('customer-1'), int(elsewhere.stdout))
+
+class TestDistinctMeasure(unittest.TestCase):
+	
+	def setUp(self):
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'report', runtime.Env())
+	
+	def plot(self):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+		workbook.close()
+		return {row[0]: row[1] for row in openpyxl.load_workbook(out).active.iter_rows(values_only=True)}
+	
+	def test_subtotal_merges_sketches(self):
+		records = [{'region': region, 'customer': 'c%d' % (i % span)} for region, span in (('East', 30), ('West', 50)) for i in range(200)]
+		report = self.canvas.ingest_records(records, {'region': 'region'}, 'customer')
+		self.assertEqual(0, report.rejected)
+		rows = self.plot()
+		self.assertEqual((30, 50), (rows['East'], rows['West']))
+		self.assertEqual(50, rows['All']) # The customers overlap, so the subtotal is no sum.
+	
+	def test_identifiers_are_not_summed(self):
+		self.canvas.ingest_records([{'region': 'East', 'customer': 'x' * 1000}] * 5000, {'region': 'region'}, 'customer')
+		self.assertEqual(1, self.plot()['East'])
+
+	def test_identifiers_weigh_one_each(self):
+		class TopOne(runtime.Dimension): top = 1
+		canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'report', runtime.Env(dims={'region': TopOne()}))
+		records = [{'region': 'East', 'customer': 'c%d' % i} for i in range(3)] + [{'region': 'West', 'customer': 'c%d' % i} for i in range(9)]
+		self.assertEqual(0, canvas.ingest_records(records, {'region': 'region'}, 'customer').rejected)
+		self.assertEqual({'West', 'Other'}, set(canvas.down.tree.children['_'].children))
+
+class TestRejectedRecords(unittest.TestCase):
+	
+	def test_nothing_of_a_rejected_record_stays(self):
+		module = compiler.compile_string(SOURCE.replace("customers customer.distinct 'Customers'", "amount amount.sum 'Amount'\n\t\tlargest amount.max 'Largest'"))
+		canvas = dynamic.Canvas(module, 'report', runtime.Env())
+		rejects = []
+		records = [{'region': 'East', 'amount': 5}, {'region': 'East', 'amount': 'lots'}, {'region': 'East', 'amount': 7}]
+		report = canvas.ingest_records(records, {'region': 'region'}, 'amount', reject=lambda record, error: rejects.append(record))
+		self.assertEqual(1, report.rejected)
+		self.assertEqual([records[1]], rejects)
+		(tally,) = canvas.cell_data.values()
+		self.assertEqual((12, 7), (tally.read('amount', 'sum'), tally.read('amount', 'max')))
+
+if __name__ == '__main__':
+	unittest.main()
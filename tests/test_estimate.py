@@ -0,0 +1,59 @@
+import io, random, unittest
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1 width=20
+	q1 'Q1'
+	q2 'Q2'
+	all 'Year' @'[across=q1|q2]'
+]
+down :frame [
+	head 'Place'
+	_ :tree :axis region :frame :axis line [
+		_ :tree :axis city "[city]"
+		subtotal "[region] Total" @'[line=_]'
+	]
+	total 'Grand Total' @'sum([down=_,line=_])'
+]
+report :canvas across down [ ]
+'''
+
+class TestEstimate(unittest.TestCase):
+	
+	def setUp(self):
+		rng = random.Random(3)
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'report', runtime.Env())
+		for r in range(10):
+			for k in range(rng.randint(1, 9)):
+				for q in ('q1', 'q2'):
+					self.canvas.incr({'region': 'R%d' % r, 'city': 'City %d' % k, 'across': q}, rng.randint(1, 100))
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0, subtotal_refs=False)
+		workbook.close()
+		self.sheet = openpyxl.load_workbook(out).active
+		self.formulas = [cell.value for row in self.sheet.iter_rows() for cell in row if isinstance(cell.value, str) and cell.value.startswith('=')]
+	
+	def test_shape(self):
+		estimate = self.canvas.estimate()
+		self.assertEqual((self.sheet.max_row, self.sheet.max_column), (estimate.rows, estimate.columns))
+		self.assertEqual(estimate.rows * estimate.columns, estimate.cells)
+		self.assertEqual(len(self.canvas.cell_data), estimate.populated)
+		self.assertTrue(estimate.fits)
+	
+	def test_formulas(self):
+		estimate = self.canvas.estimate()
+		self.assertEqual(len(self.formulas), estimate.formula_cells)
+		self.assertGreaterEqual(estimate.longest_formula, max(map(len, self.formulas)) - 1) # Less the leading '='.
+		actual = sum(map(len, self.formulas)) - len(self.formulas)
+		self.assertLess(abs(estimate.formula_chars - actual), actual / 4)
+	
+	def test_origin_counts_against_the_limits(self):
+		estimate = self.canvas.estimate(top_row_index=1048576 - 5)
+		self.assertFalse(estimate.fits)
+		self.assertGreater(estimate.memory, estimate.constant_memory)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,54 @@
+import os, tempfile, unittest
+import openpyxl
+from cubicle import compiler, dynamic, fanout, runtime
+
+SOURCE = '''
+kinds :frame [ label :head 1 ; _ 'Amount' ]
+months :tree :axis month "[month]"
+statement :canvas kinds months [ ]
+'''
+
+def partitions():
+	for customer in ('alice', 'bob', 'carol'):
+		yield customer, [{'month': m, 'amount': n} for m, n in [('Jan', 1), ('Feb', 2), ('Jan', 3)]]
+	yield 'dave', [{'month': 'Jan', 'amount': 'lots'}, {'month': 'Feb', 'amount': 4}]
+
+class TestFanout(unittest.TestCase):
+	
+	def setUp(self):
+		self.module = compiler.compile_string(SOURCE)
+		self.folder = tempfile.TemporaryDirectory()
+		self.addCleanup(self.folder.cleanup)
+	
+	def path_for(self, customer):
+		if customer == 'erin': return os.path.join(self.folder.name, 'missing', 'erin.xlsx')
+		return os.path.join(self.folder.name, customer + '.xlsx')
+	
+	def test_fresh(self):
+		template = dynamic.Canvas(self.module, 'statement', runtime.Env())
+		one, two = template.fresh(), template.fresh()
+		one.incr({'month': 'Jan', 'kinds': '_'}, 5)
+		self.assertEqual({}, two.down.tree.children)
+		self.assertEqual({}, template.down.tree.children)
+		self.assertEqual(0, len(two.cell_data))
+		self.assertIs(template.definition, two.definition)
+	
+	def test_render_all(self):
+		seen = []
+		source = list(partitions()) + [('erin', [])]
+		report = fanout.render_all(
+			self.module, 'statement', runtime.Env(), iter(source), self.path_for,
+			{'month': 'month'}, 'amount', workers=2, max_in_flight=2, progress=seen.append,
+		)
+		self.assertEqual(5, len(report.results))
+		self.assertEqual(report.results, seen)
+		by_entity = {result.entity: result for result in report.results}
+		self.assertEqual((3, 0), (by_entity['alice'].rows, by_entity['alice'].rejected))
+		self.assertEqual((2, 1), (by_entity['dave'].rows, by_entity['dave'].rejected))
+		self.assertEqual(['erin'], [result.entity for result in report.failed])
+		self.assertIn('Error', report.failed[0].error)
+		rows = {row[0]: row[1] for row in openpyxl.load_workbook(by_entity['bob'].path).active.iter_rows(values_only=True)}
+		self.assertEqual({'Jan': 4, 'Feb': 2}, rows)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,76 @@
+import asyncio, threading, unittest
+from cubicle import compiler, dynamic, feeder, runtime, storage
+
+SOURCE = '''
+kinds :frame :axis kind [ base 'Base' ; change 'Change Orders' ]
+regions :tree :axis region "[region]"
+plain :canvas kinds regions [ ]
+'''
+
+def points(count):
+	return [({'kind': ('base', 'change')[i % 2], 'region': 'R%d' % (i % 17)}, i) for i in range(count)]
+
+class TestAsyncCanvasFeeder(unittest.TestCase):
+	
+	def setUp(self):
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'plain', runtime.Env())
+	
+	def test_everything_arrives(self):
+		feed = feeder.AsyncCanvasFeeder(self.canvas, batch_size=5, max_pending=1) # Made outside any event loop.
+		async def main():
+			async with feed:
+				for point, value in points(1000): await feed.incr(point, value)
+		asyncio.run(main())
+		self.assertEqual(sum(range(1000)), sum(self.canvas.cell_data.values()))
+		self.assertEqual(34, len(self.canvas.cell_data))
+	
+	def test_queue(self):
+		async def main():
+			queue = asyncio.Queue()
+			for item in points(100): queue.put_nowait(item)
+			queue.put_nowait(None)
+			async with feeder.AsyncCanvasFeeder(self.canvas, batch_size=7) as feed: await feed.consume(queue)
+			return queue.empty()
+		self.assertTrue(asyncio.run(main()))
+		self.assertEqual(sum(range(100)), sum(self.canvas.cell_data.values()))
+	
+	def test_cancelled_producer_drops_nothing(self):
+		gate, apply = threading.Event(), self.canvas.apply
+		def slow_apply(batch, reject=None):
+			gate.wait()
+			apply(batch, reject)
+		self.canvas.apply = slow_apply
+		async def main():
+			feed = feeder.AsyncCanvasFeeder(self.canvas, batch_size=1, max_pending=1, interval=None)
+			await feed.incr({'kind': 'base', 'region': 'East'}, 1) # Takes the only room.
+			waiting = asyncio.ensure_future(feed.incr({'kind': 'base', 'region': 'West'}, 2))
+			await asyncio.sleep(0.01)
+			self.assertFalse(waiting.done()) # It's waiting for room.
+			waiting.cancel()
+			gate.set()
+			await feed.flush()
+		asyncio.run(main())
+		self.assertEqual([1, 2], sorted(self.canvas.cell_data.values()))
+	
+	def test_bad_point_loses_no_good_data(self):
+		async def main():
+			feed = feeder.AsyncCanvasFeeder(self.canvas, batch_size=100, interval=None)
+			for point, value in points(20): await feed.incr(point, value)
+			await feed.incr({'kind': 'bogus', 'region': 'Nowhere'}, 1)
+			with self.assertRaises(runtime.InvalidOrdinalError): await feed.flush()
+		asyncio.run(main())
+		self.assertEqual(sum(range(20)), sum(self.canvas.cell_data.values()))
+	
+	def test_spilling_store(self):
+		store = storage.SpillingCellStore(memory_budget=5 * storage.SpillingCellStore.CELL_COST)
+		self.addCleanup(store.close)
+		canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'plain', runtime.Env(), cell_store=store)
+		async def main():
+			async with feeder.AsyncCanvasFeeder(canvas, batch_size=3) as feed:
+				for point, value in points(500): await feed.incr(point, value)
+		asyncio.run(main())
+		self.assertEqual(34, len(store))
+		self.assertEqual(sum(range(500)), sum(value for key, value in store.items()))
+
+if __name__ == '__main__':
+	unittest.main()
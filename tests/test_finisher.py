@@ -0,0 +1,57 @@
+import os, tempfile, threading, unittest
+import openpyxl
+from xlsxwriter.exceptions import FileCreateError
+from cubicle import compiler, dynamic, finisher, runtime
+
+SOURCE = '''
+kinds :frame [ label :head 1 ; _ 'Amount' ]
+months :tree :axis month "[month]"
+statement :canvas kinds months [ ]
+'''
+
+class Stalled:
+	""" Stands in for a workbook whose closing takes until it's let go. """
+	def __init__(self): self.go, self.closed = threading.Event(), False
+	def close(self):
+		self.go.wait(5)
+		self.closed = True
+
+class TestFinisher(unittest.TestCase):
+	
+	def setUp(self):
+		self.folder = tempfile.TemporaryDirectory()
+		self.addCleanup(self.folder.cleanup)
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'statement', runtime.Env())
+		self.canvas.incr({'month': 'Jan'}, 7)
+	
+	def test_plot(self):
+		paths = [os.path.join(self.folder.name, '%d.xlsx' % i) for i in range(4)]
+		with finisher.WorkbookFinisher(threads=2) as it:
+			for path in paths: it.plot(self.canvas, path)
+		for path in paths:
+			self.assertEqual([('Jan', 7)], list(openpyxl.load_workbook(path).active.iter_rows(values_only=True)))
+	
+	def test_error_comes_out(self):
+		it = finisher.WorkbookFinisher()
+		it.plot(self.canvas, os.path.join(self.folder.name, 'missing', 'x.xlsx'))
+		with self.assertRaises(FileCreateError): it.join()
+		it.join() # Just the once.
+		with self.assertRaises(FileCreateError):
+			with it: it.plot(self.canvas, os.path.join(self.folder.name, 'missing', 'y.xlsx'))
+	
+	def test_bounded(self):
+		first, second = Stalled(), Stalled()
+		with finisher.WorkbookFinisher(max_pending=1) as it:
+			it.close(first)
+			handing = threading.Thread(target=it.close, args=(second,))
+			handing.start()
+			handing.join(0.2)
+			self.assertTrue(handing.is_alive())
+			first.go.set()
+			second.go.set()
+			handing.join(5)
+			self.assertFalse(handing.is_alive())
+		self.assertTrue(first.closed and second.closed)
+
+if __name__ == '__main__':
+	unittest.main()
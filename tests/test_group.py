@@ -0,0 +1,120 @@
+import io, unittest
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+body :frame :axis part [
+	_ :tree :axis region
+	total 'Total' @'[part=_]'
+]
+kinds :frame :axis kind [ base 'Base' ; change 'Change Orders' ]
+stats :measure [
+	orders count 'Orders'
+	revenue revenue.sum 'Revenue'
+]
+plain :canvas kinds body [ ]
+flip :canvas body kinds [ ]
+sheet :canvas stats body [ ]
+'''
+
+class Dims(runtime.Environment):
+	def cardinality(self, key): return (2, 'Other') if key == 'region' else None
+
+RECORDS = [
+	{'part': '_', 'region': region, 'kind': kind, 'revenue': revenue}
+	for region, kind, revenue in [('East', 'base', 5), ('West', 'base', 3), ('East', 'change', 2), ('North', 'base', 1), ('South', 'change', 4), ('West', 'change', 6)]
+]
+AXES = {'part': 'part', 'region': 'region', 'kind': 'kind'}
+
+def shape_of(node):
+	""" The ordinals of every node beneath this one, nested, and the census weights. """
+	census = getattr(node, 'census', None)
+	weights = dict(census.members) if census else None
+	children = getattr(node, 'children', {})
+	return weights, {ordinal: shape_of(child) for ordinal, child in children.items()}
+
+def plot(canvas):
+	out = io.BytesIO()
+	workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+	canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+	workbook.close()
+	return [list(row) for row in openpyxl.load_workbook(out).active.iter_rows(values_only=True)]
+
+class TestCanvasGroup(unittest.TestCase):
+	
+	def setUp(self):
+		self.module = compiler.compile_string(SOURCE)
+		self.group = dynamic.CanvasGroup(self.module, ['flip', 'plain', 'sheet'], Dims())
+	
+	def snapshot(self):
+		trees = [shape_of(tree) for tree in self.group.trees.values()]
+		cells = {identifier: len(canvas.cell_data) for identifier, canvas in self.group.canvases.items()}
+		return trees, cells
+	
+	def test_trees_are_shared(self):
+		self.assertEqual(3, len(self.group.trees))
+		self.assertIs(self.group['plain'].down.tree, self.group['flip'].across.tree)
+		self.assertIs(self.group['plain'].down.tree, self.group['sheet'].down.tree)
+	
+	def test_same_as_feeding_each(self):
+		self.group.ingest_records(RECORDS, AXES, 'revenue')
+		for identifier, canvas in self.group.canvases.items():
+			alone = dynamic.Canvas(self.module, identifier, Dims())
+			alone.ingest_records(RECORDS, AXES, 'revenue')
+			self.assertEqual(plot(alone), plot(canvas), identifier)
+	
+	def test_ingest_csv(self):
+		text = 'part,region,kind,revenue\n' + ''.join('%(part)s,%(region)s,%(kind)s,%(revenue)s\n' % r for r in RECORDS)
+		report = self.group.ingest_csv(io.StringIO(text), AXES, 'revenue')
+		self.assertEqual((6, 0), (report.rows, report.rejected))
+		self.assertEqual(21, self.group['plain'].total({'part': '_'}))
+	
+	def test_fold_moves_every_members_cells(self):
+		self.group.ingest_records(RECORDS, AXES, 'revenue')
+		self.assertEqual(3, len(self.group['plain'].down.tree.children['_'].children))
+		other = self.group['plain'].total({'region': 'Other'})
+		self.assertLess(0, other)
+		self.assertEqual(other, self.group['flip'].total({'region': 'Other'}))
+		self.assertEqual(other, self.group['sheet'].total({'region': 'Other', 'stats': 'revenue'}))
+		self.assertEqual(21, self.group['sheet'].total({'stats': 'revenue'}))
+	
+	def test_rejected_point_changes_no_tree(self):
+		self.group.incr({'part': '_', 'region': 'East', 'kind': 'base'}, 5, 'revenue')
+		before = self.snapshot()
+		with self.assertRaises(runtime.InvalidOrdinalError):
+			self.group.incr({'part': '_', 'region': 'Bogus', 'kind': 'zzz'}, 1, 'revenue')
+		with self.assertRaises(runtime.InvalidOrdinalError):
+			self.group.poke({'part': '_', 'region': 'Bogus2', 'kind': 'zzz'}, 1)
+		self.assertEqual(before, self.snapshot())
+	
+	def test_rejected_records_change_no_tree(self):
+		self.group.incr({'part': '_', 'region': 'East', 'kind': 'base'}, 5, 'revenue')
+		before = self.snapshot()
+		rejects = []
+		records = [{'part': '_', 'region': 'Bogus', 'kind': 'zzz', 'revenue': 1}]
+		report = self.group.ingest_records(records, AXES, 'revenue', reject=lambda record, error: rejects.append(error))
+		self.assertEqual(1, report.rejected)
+		self.assertIsInstance(rejects[0], runtime.InvalidOrdinalError)
+		self.assertEqual(before, self.snapshot())
+	
+	def test_refused_mapping_changes_no_tree(self):
+		self.group.incr({'part': '_', 'region': 'East', 'kind': 'base'}, 5, 'revenue')
+		before = self.snapshot()
+		with self.assertRaises(TypeError):
+			self.group.incr({'part': '_', 'region': 'West', 'kind': 'base'}, {'revenue': 3})
+		self.assertEqual(before, self.snapshot())
+	
+	def test_apply_is_all_or_nothing(self):
+		batch = self.group.batch()
+		batch.incr({'part': '_', 'region': 'East', 'kind': 'base'}, 5)
+		batch.incr({'part': '_', 'region': 'West', 'kind': 'zzz'}, 1)
+		before = self.snapshot()
+		with self.assertRaises(runtime.InvalidOrdinalError): self.group.apply(batch)
+		self.assertEqual(before, self.snapshot())
+		rejects = []
+		self.group.apply(batch, reject=lambda point, error: rejects.append(point))
+		self.assertEqual([{'part': '_', 'region': 'West', 'kind': 'zzz'}], rejects)
+		self.assertEqual(5, self.group['flip'].total({}))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,68 @@
+import io, random, re, unittest, zipfile
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1 width=20
+	_ :tree :axis month
+]
+down :frame [
+	boxed 'Boxed' border=1 +bold
+	_ :tree :axis region
+]
+sheet :canvas across down [ ]
+'''
+
+def effective_border(sheet, row, column) -> str:
+	""" The border a cell shows: its own format, or else its row's, or else its column's. """
+	cell = sheet._cells.get((row, column))
+	if cell is not None and cell.has_style: return cell.border.left.style
+	workbook = sheet.parent
+	dimension = sheet.row_dimensions[row]
+	if not dimension.customFormat:
+		dimension = next((d for key, d in sheet.column_dimensions.items() if d.min <= column <= d.max), None)
+		if dimension is None or not dimension.has_style: return None
+	return workbook._borders[dimension._style.borderId].left.style
+
+class TestFormatHoisting(unittest.TestCase):
+	
+	def setUp(self):
+		rng = random.Random(5)
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'sheet', runtime.Env())
+		for r in range(30):
+			for m in range(12):
+				if rng.random() < 0.7: self.canvas.incr({'region': 'R%02d' % r, 'month': 'M%02d' % m}, rng.randint(1, 9))
+	
+	def plot(self, **kwargs):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0, **kwargs)
+		workbook.close()
+		return out
+	
+	def test_same_values(self):
+		values = lambda out: [[cell.value for cell in row] for row in openpyxl.load_workbook(out).active.iter_rows()]
+		self.assertEqual(values(self.plot()), values(self.plot(hoist_formats=True)))
+		self.assertEqual(values(self.plot()), values(self.plot(hoist_formats=True, sparse=True)))
+	
+	def test_same_look(self):
+		for options in ({}, {'sparse': True}):
+			with self.subTest(**options):
+				plain, hoisted = openpyxl.load_workbook(self.plot(**options)).active, openpyxl.load_workbook(self.plot(hoist_formats=True, **options)).active
+				for row in range(1, 32):
+					for column in range(1, 14):
+						self.assertEqual(effective_border(plain, row, column), effective_border(hoisted, row, column), (row, column))
+	
+	def test_fewer_cell_formats(self):
+		def sheet_xml(out):
+			with zipfile.ZipFile(out) as z: return z.read('xl/worksheets/sheet1.xml').decode('utf-8')
+		plain, hoisted = sheet_xml(self.plot()), sheet_xml(self.plot(hoist_formats=True))
+		formatted = r'<c [^>]*\bs="'
+		self.assertLess(len(re.findall(formatted, hoisted)), len(re.findall(formatted, plain)))
+		boxed = re.search(r'<row r="1"[^>]*>', hoisted).group()
+		self.assertIn('customFormat="1"', boxed)
+		self.assertEqual(['<c r="A1" s="'], re.findall(formatted, re.search(r'<row r="1".*?</row>', hoisted).group())) # Only the label differs.
+
+if __name__ == '__main__':
+	unittest.main()
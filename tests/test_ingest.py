@@ -0,0 +1,81 @@
+import io, unittest
+import xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+regions :tree :axis region
+kinds :frame :axis kind [ base 'Base' ; change 'Change Orders' ]
+plain :canvas kinds regions [ ]
+flip :canvas regions kinds [ ]
+'''
+
+CSV = """region,kind,amount
+East,base,5
+East,change,2
+West,base,3
+East,base,1.5
+North,bogus,4
+South
+"""
+
+def plotted(canvas):
+	workbook = xlsxwriter.Workbook(io.BytesIO(), {'in_memory': True})
+	canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+	workbook.close()
+
+class TestIngest(unittest.TestCase):
+	
+	def setUp(self):
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'plain', runtime.Env())
+		self.rejects = []
+	
+	def reject(self, record, error):
+		self.rejects.append((record, error))
+	
+	def ingest_csv(self, **kwargs):
+		return self.canvas.ingest_csv(io.StringIO(CSV), {'region': 'region', 'kind': 'kind'}, 'amount', reject=self.reject, **kwargs)
+	
+	def cell(self, region, kind):
+		return self.canvas.cell_data[self.canvas.key_pair({'region': region, 'kind': kind})]
+	
+	def test_csv_sums_by_coordinate(self):
+		report = self.ingest_csv()
+		self.assertEqual((6, 2, 4), (report.rows, report.rejected, report.accepted))
+		self.assertEqual(6.5, self.cell('East', 'base'))
+		self.assertEqual(2.0, self.cell('East', 'change'))
+		self.assertEqual(3.0, self.cell('West', 'base'))
+		self.assertGreater(report.rows_per_second, 0)
+	
+	def test_chunks_give_the_same_answer(self):
+		self.ingest_csv(chunk_size=1)
+		self.assertEqual(6.5, self.cell('East', 'base'))
+	
+	def test_rejects_go_to_the_side_channel(self):
+		self.ingest_csv()
+		errors = {record['region']: error for record, error in self.rejects}
+		self.assertEqual({'North', 'South'}, set(errors))
+		self.assertEqual(runtime.InvalidOrdinalError('kind', 'bogus').args, errors['North'].args)
+		self.assertEqual(runtime.InvalidOrdinalError('kind', None).args, errors['South'].args)
+	
+	def test_rejected_record_leaves_no_trace(self):
+		self.ingest_csv()
+		self.assertEqual({'East', 'West'}, set(self.canvas.down.tree.children))
+		plotted(self.canvas)
+	
+	def test_count_records_without_a_value_field(self):
+		records = [{'r': 'East', 'k': 'base'}] * 3 + [{'r': 'West', 'k': 'change'}]
+		report = self.canvas.ingest_records(records, {'region': 'r', 'kind': 'k'}, None)
+		self.assertEqual(0, report.rejected)
+		self.assertEqual(3, self.cell('East', 'base'))
+		self.assertEqual(1, self.cell('West', 'change'))
+	
+	def test_bad_ordinal_down_grows_no_tree_across(self):
+		flip = dynamic.Canvas(self.canvas.cub_module, 'flip', runtime.Env())
+		report = flip.ingest_records([{'region': 'Bogus', 'kind': 'zzz'}], {'region': 'region', 'kind': 'kind'}, None)
+		self.assertEqual(1, report.rejected)
+		with self.assertRaises(runtime.InvalidOrdinalError):
+			flip.incr({'region': 'Bogus2', 'kind': 'zzz'}, 1)
+		self.assertEqual({}, flip.across.tree.children)
+
+if __name__ == '__main__':
+	unittest.main()
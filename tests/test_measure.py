@@ -0,0 +1,62 @@
+import io, unittest
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+stats :frame [
+	label :head 1
+	_ :measure [
+		orders revenue.count 'Orders'
+		revenue revenue.sum 'Revenue'
+		largest revenue.max 'Largest'
+		average revenue.mean 'Average'
+		units quantity.sum 'Units'
+	]
+]
+regions :tree :axis region "[region]"
+plain_across :frame [ label :head 1 ; amount 'Amount' ]
+report :canvas stats regions [ ]
+plain :canvas plain_across regions [ ]
+'''
+
+class TestMeasure(unittest.TestCase):
+	
+	def setUp(self):
+		module = compiler.compile_string(SOURCE)
+		self.report = dynamic.Canvas(module, 'report', runtime.Env())
+		self.plain = dynamic.Canvas(module, 'plain', runtime.Env())
+	
+	def plot(self, canvas):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+		workbook.close()
+		return {row[0]: row[1:] for row in openpyxl.load_workbook(out).active.iter_rows(values_only=True)}
+	
+	def test_one_call_feeds_every_column(self):
+		self.report.incr({'region': 'East'}, {'revenue': 12.5, 'quantity': 3})
+		self.report.incr({'region': 'East'}, {'revenue': 7.5, 'quantity': 1})
+		self.report.incr({'region': 'West'}, 4, measure='revenue')
+		rows = self.plot(self.report)
+		self.assertEqual((2, 20, 12.5, 10, 4), rows['East'])
+		self.assertEqual((1, 4, 4, 4, None), rows['West'])
+	
+	def test_no_taking_back(self):
+		with self.assertRaises(TypeError): self.report.decr({'region': 'East'}, 1)
+		self.assertEqual({}, self.report.down.tree.children)
+	
+	def test_mapping_needs_a_measure(self):
+		with self.assertRaises(TypeError): self.plain.incr({'region': 'East', 'plain_across': 'amount'}, {'revenue': 1})
+		self.assertEqual({}, self.plain.down.tree.children)
+		self.assertEqual(0, len(self.plain.cell_data))
+	
+	def test_ingest(self):
+		records = [{'region': 'East', 'revenue': r} for r in (3, 9, 6)] + [{'region': 'West', 'revenue': 2}]
+		report = self.report.ingest_records(records, {'region': 'region'}, 'revenue')
+		self.assertEqual(0, report.rejected)
+		rows = self.plot(self.report)
+		self.assertEqual((3, 18, 9, 6), rows['East'][:4])
+		self.assertEqual((1, 2, 2, 2), rows['West'][:4])
+
+if __name__ == '__main__':
+	unittest.main()
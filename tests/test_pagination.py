@@ -0,0 +1,71 @@
+import io, random, unittest
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1 width=20
+	q1 'Q1'
+	q2 'Q2'
+	all 'Year' @'[across=q1|q2]'
+]
+down :frame [
+	head 'Place'
+	_ :tree :axis region :frame :axis line [
+		_ :tree :axis city "[city]"
+		subtotal "[region] Total" @'[line=_]'
+	]
+	total 'Grand Total' @'sum([down=_,line=_])'
+]
+report :canvas across down [ ]
+'''
+
+class TestPagination(unittest.TestCase):
+	
+	def setUp(self):
+		rng = random.Random(2)
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'report', runtime.Env())
+		for r in range(8):
+			for k in range(6):
+				for q in ('q1', 'q2'):
+					self.canvas.incr({'region': 'R%d' % r, 'city': 'C%d' % k, 'across': q}, rng.randint(1, 100))
+	
+	def workbook(self, paged, data_only=True, **kwargs):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		if paged: self.sheets = self.canvas.plot_pages(workbook, 'Report', 0, 0, evaluate=True, **kwargs)
+		else: self.canvas.plot(workbook, workbook.add_worksheet('Report'), 0, 0, evaluate=True)
+		workbook.close()
+		book = openpyxl.load_workbook(out, data_only=data_only)
+		return [[[cell.value for cell in row] for row in sheet.iter_rows()] for sheet in book.worksheets]
+	
+	def test_pages_fit_and_repeat_headings(self):
+		pages = self.workbook(True, row_limit=20)
+		self.assertGreater(len(pages), 1)
+		self.assertEqual(['Report', 'Report (2)'], [sheet.name for sheet in self.sheets[:2]])
+		for page in pages:
+			self.assertLessEqual(len(page), 20)
+			self.assertEqual('Place', page[0][0])
+		self.assertEqual('Grand Total', pages[-1][-1][0])
+		self.assertNotIn('Grand Total', [row[0] for page in pages[:-1] for row in page])
+	
+	def test_pages_break_between_regions(self):
+		for page in self.workbook(True, row_limit=20):
+			labels = [row[0] for row in page[1:] if row[0] != 'Grand Total']
+			self.assertTrue(labels[-1].endswith(' Total'), labels) # Each page ends on a subtotal.
+	
+	def test_cross_sheet_totals(self):
+		single = self.workbook(False)[0]
+		pages = self.workbook(True, row_limit=20)
+		self.assertEqual(single[-1], pages[-1][-1])
+		body = [row for page in pages for row in page[1:] if row[0] != 'Grand Total']
+		self.assertEqual(single[1:-1], body)
+		formulas = self.workbook(True, data_only=False, row_limit=20)
+		self.assertIn("Report!B", formulas[-1][-1][1]) # The grand total reaches back to the first page.
+	
+	def test_too_small_for_headings(self):
+		with self.assertRaises(dynamic.SheetLimitError):
+			self.workbook(True, row_limit=1)
+
+if __name__ == '__main__':
+	unittest.main()
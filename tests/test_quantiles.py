@@ -0,0 +1,81 @@
+import io, random, unittest
+import openpyxl, xlsxwriter
+from cubicle import aggregates, compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1
+	_ :measure [
+		median latency.median 'Median'
+		p95 latency.p95 'P95'
+	]
+]
+down :frame [
+	_ :tree :axis region "[region]"
+	total 'All' @'[down=_]'
+]
+report :canvas across down [ ]
+'''
+
+def sketch(values):
+	kll = aggregates.QuantileSketch()
+	for value in values: kll.add(value)
+	return kll
+
+def rank(values:list, item) -> float:
+	return sum(1 for v in values if v <= item) / len(values)
+
+class TestQuantileSketch(unittest.TestCase):
+	
+	def test_fractions(self):
+		fraction = aggregates.QuantileSketch.fraction
+		self.assertEqual((0.5, 0.95, None, None), (fraction('median'), fraction('p95'), fraction('p101'), fraction('mean')))
+		self.assertAlmostEqual(0.999, fraction('p99_9'))
+		self.assertIs(aggregates.QuantileSketch, aggregates.kind_of('p99'))
+	
+	def test_exact_when_small(self):
+		values = list(range(1, 100))
+		random.Random(5).shuffle(values)
+		kll = sketch(values)
+		self.assertEqual((50, 95), (kll.read('median'), kll.read('p95')))
+		self.assertIsNone(aggregates.QuantileSketch().read('median'))
+	
+	def test_accuracy_and_bounded_size(self):
+		rng = random.Random(6)
+		values = [rng.lognormvariate(0, 1) for _ in range(100000)]
+		kll = sketch(values)
+		self.assertLess(sum(map(len, kll.levels)), 3 * aggregates.QuantileSketch.K)
+		ordered = sorted(values)
+		for statistic, fraction in (('median', 0.5), ('p95', 0.95), ('p99', 0.99)):
+			with self.subTest(statistic):
+				self.assertLess(abs(rank(ordered, kll.read(statistic)) - fraction), 0.02)
+	
+	def test_merge(self):
+		rng = random.Random(7)
+		low, high = [rng.uniform(0, 100) for _ in range(20000)], [rng.uniform(100, 300) for _ in range(20000)]
+		merged = sketch(low) + sketch(high)
+		self.assertEqual(40000, merged.size)
+		self.assertLess(abs(rank(sorted(low + high), merged.read('median')) - 0.5), 0.02)
+	
+	def test_repeatable(self):
+		values = [random.Random(8).random() for _ in range(5000)]
+		self.assertEqual(sketch(values).levels, sketch(values).levels)
+
+class TestQuantileMeasure(unittest.TestCase):
+	
+	def test_subtotal_merges_sketches(self):
+		canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'report', runtime.Env())
+		for i in range(1, 101):
+			canvas.incr({'region': 'East'}, i, measure='latency')
+			canvas.incr({'region': 'West'}, 100 + i, measure='latency')
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+		workbook.close()
+		rows = {row[0]: row[1:] for row in openpyxl.load_workbook(out).active.iter_rows(values_only=True)}
+		self.assertEqual((50, 95), rows['East'])
+		self.assertEqual((150, 195), rows['West'])
+		self.assertEqual((100, 190), rows['All'])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,67 @@
+import io, sqlite3, unittest
+import xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+regions :tree :axis region
+kinds :frame :axis kind [ base 'Base' ; change 'Change Orders' ]
+plain :canvas kinds regions [ ]
+'''
+
+ROWS = [
+	('East', 'base', 5),
+	('East', 'base', 1),
+	('East', 'change', 2),
+	('West', 'base', 3),
+	('West', 'base', None),
+	(None, 'base', 7),
+	('West', None, 11),
+	('North', 'bogus', 13),
+]
+
+class TestIngestQuery(unittest.TestCase):
+	
+	def setUp(self):
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'plain', runtime.Env())
+		self.connection = sqlite3.connect(':memory:')
+		self.connection.execute('CREATE TABLE sales (region TEXT, kind TEXT, amount INTEGER)')
+		self.connection.executemany('INSERT INTO sales VALUES (?, ?, ?)', ROWS)
+		self.rejects = []
+	
+	def tearDown(self):
+		self.connection.close()
+	
+	def ingest(self, *args, **kwargs):
+		return self.canvas.ingest_query(self.connection, *args, reject=lambda row, error: self.rejects.append((tuple(row), error)), **kwargs)
+	
+	def cell(self, region, kind):
+		return self.canvas.cell_data[self.canvas.key_pair({'region': region, 'kind': kind})]
+	
+	def test_sums_come_back_grouped(self):
+		report = self.ingest('SELECT * FROM sales', ['region', 'kind'], 'amount')
+		self.assertEqual(6, report.rows) # Distinct coordinates with a non-NULL amount, not rows of the table.
+		self.assertEqual(6, self.cell('East', 'base'))
+		self.assertEqual(2, self.cell('East', 'change'))
+		self.assertEqual(3, self.cell('West', 'base'))
+	
+	def test_count_without_a_value_column(self):
+		self.ingest('SELECT * FROM sales', {'region': 'region', 'kind': 'kind'})
+		self.assertEqual(2, self.cell('East', 'base'))
+		self.assertEqual(2, self.cell('West', 'base'))
+	
+	def test_axis_columns_default_to_the_canvas_space(self):
+		self.ingest('SELECT region, kind, amount FROM sales WHERE region = ?', value_column='amount', parameters=('East',))
+		self.assertEqual(6, self.cell('East', 'base'))
+	
+	def test_null_axis_values_are_rejected(self):
+		report = self.ingest('SELECT * FROM sales', ['region', 'kind'], 'amount')
+		self.assertEqual(3, report.rejected)
+		self.assertEqual({(None, 'base', 7), ('West', None, 11), ('North', 'bogus', 13)}, {row for row, error in self.rejects})
+		for row, error in self.rejects: self.assertIsInstance(error, runtime.InvalidOrdinalError)
+		self.assertEqual({'East', 'West'}, set(self.canvas.down.tree.children))
+		workbook = xlsxwriter.Workbook(io.BytesIO(), {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+		workbook.close()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+stats :frame [
+	label :head 1
+	_ :measure [
+		orders revenue.count 'Orders'
+		revenue revenue.sum 'Revenue'
+		largest revenue.max 'Largest'
+	]
+]
+kinds :frame [ label :head 1 ; opening 'Opening' ; change 'Change' ]
+regions :tree :axis region "[region]"
+report :canvas stats regions [ ]
+plain :canvas kinds regions [ ]
+'''
+
+class TestReading(unittest.TestCase):
+	
+	def setUp(self):
+		module = compiler.compile_string(SOURCE)
+		self.report = dynamic.Canvas(module, 'report', runtime.Env())
+		self.plain = dynamic.Canvas(module, 'plain', runtime.Env())
+		for region, opening, change in [('North', 10, 1), ('South', 20, -2), ('East', 30, 3)]:
+			self.plain.incr({'region': region, 'kinds': 'opening'}, opening)
+			self.plain.incr({'region': region, 'kinds': 'change'}, change)
+		for region, revenue in [('North', 5), ('North', 9), ('South', 7)]:
+			self.report.incr({'region': region}, revenue, measure='revenue')
+	
+	def test_get(self):
+		self.assertEqual(-2, self.plain.get({'region': 'South', 'kinds': 'change'}))
+		self.assertEqual(9, self.report.get({'region': 'North', 'stats': '_', '_': 'largest'}))
+		self.assertEqual(2, self.report.get({'region': 'North', 'stats': '_', '_': 'orders'}))
+	
+	def test_get_creates_nothing(self):
+		before = dict(self.plain.down.tree.children)
+		self.assertIsNone(self.plain.get({'region': 'West', 'kinds': 'change'}))
+		self.assertEqual('none', self.plain.get({'region': 'West', 'kinds': 'change'}, 'none'))
+		self.assertEqual(before, self.plain.down.tree.children)
+		self.assertEqual(6, len(self.plain.cell_data))
+	
+	def test_slice(self):
+		found = self.plain.slice({'region': {'North', 'East'}, 'kinds': 'change'})
+		self.assertEqual(
+			[({'region': 'East', 'kinds': 'change'}, 3), ({'region': 'North', 'kinds': 'change'}, 1)],
+			sorted(found, key=lambda pair: pair[0]['region']),
+		)
+		self.assertEqual(6, len(self.plain.slice({})))
+	
+	def test_total(self):
+		self.assertEqual(2, self.plain.total({'kinds': 'change'}))
+		self.assertEqual(30, self.plain.total({'region': {'North', 'South'}, 'kinds': 'opening'}))
+	
+	def test_total_beneath_a_measure(self):
+		self.assertEqual(21, self.report.total({'_': 'revenue'}))
+		self.assertEqual(9, self.report.total({'stats': '_', '_': 'largest'}))
+		with self.assertRaises(ValueError): self.report.total({})
+	
+	def test_no_such_axis(self):
+		with self.assertRaises(KeyError): self.plain.slice({'colour': 'red'})
+
+if __name__ == '__main__':
+	unittest.main()
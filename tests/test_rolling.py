@@ -0,0 +1,82 @@
+import io, os, tempfile, unittest
+from cubicle import cache, compiler, dynamic, runtime
+
+SOURCE = '''
+kinds :frame [ label :head 1 ; _ 'Amount' ]
+hours :frame [
+	_ :tree :axis hour "[hour]" :tree :axis region "[region]"
+	total 'Total' @'sum([hours=_])'
+]
+dashboard :canvas kinds hours [ ]
+'''
+
+class Hours(runtime.Dimension):
+	window = 2
+
+class TestRolling(unittest.TestCase):
+	
+	def setUp(self):
+		self.module = compiler.compile_string(SOURCE)
+		self.env = runtime.Env(dims={'hour': Hours()})
+		self.canvas = dynamic.Canvas(self.module, 'dashboard', self.env)
+	
+	def hours(self, canvas=None):
+		return sorted((canvas or self.canvas).down.tree.children['_'].children)
+	
+	def feed(self, hours, canvas=None):
+		for hour in hours:
+			for region in ('East', 'West'): (canvas or self.canvas).incr({'hour': hour, 'region': region}, hour)
+	
+	def test_old_hours_expire(self):
+		self.feed(range(1, 8))
+		self.assertEqual([5, 6, 7], self.hours())
+		self.canvas.sweep()
+		self.assertEqual(6, len(self.canvas.cell_data))
+		self.assertEqual(36, self.canvas.total({}))
+	
+	def test_cells_get_swept_along_the_way(self):
+		self.feed(range(1, 200))
+		self.assertLess(len(self.canvas.cell_data), 20)
+	
+	def test_expired_ordinal(self):
+		self.feed([5])
+		with self.assertRaises(runtime.ExpiredOrdinalError): self.canvas.incr({'hour': 2, 'region': 'East'}, 1)
+		self.assertEqual([5], self.hours())
+		rejects = []
+		report = self.canvas.ingest_records([{'hour': 1, 'region': 'East'}, {'hour': 4, 'region': 'East'}], {'hour': 'hour', 'region': 'region'}, None, reject=lambda record, error: rejects.append(record))
+		self.assertEqual(1, report.rejected)
+		self.assertEqual([{'hour': 1, 'region': 'East'}], rejects)
+		self.assertEqual([4, 5], self.hours())
+	
+	def test_apply_refuses_what_the_batch_would_expire(self):
+		batch = self.canvas.batch()
+		for hour in (1, 10, 9):
+			batch.incr({'hour': hour, 'region': 'East'}, hour)
+		with self.assertRaises(runtime.ExpiredOrdinalError): self.canvas.apply(batch)
+		self.assertEqual([], self.hours())
+		self.assertEqual(0, len(self.canvas.cell_data))
+		rejects = []
+		self.canvas.apply(batch, reject=lambda point, error: rejects.append(point))
+		self.assertEqual([{'hour': 1, 'region': 'East'}], rejects)
+		self.assertEqual([9, 10], self.hours())
+		self.assertEqual(19, self.canvas.total({}))
+	
+	def test_checkpoint_resumes_the_window(self):
+		self.feed(range(1, 6))
+		out = io.BytesIO()
+		self.canvas.save(out)
+		out.seek(0)
+		loaded = dynamic.Canvas.load(self.module, 'dashboard', self.env, out)
+		self.assertEqual([3, 4, 5], self.hours(loaded))
+		with self.assertRaises(runtime.ExpiredOrdinalError): loaded.incr({'hour': 2, 'region': 'East'}, 1)
+		self.feed([6], loaded)
+		self.assertEqual([4, 5, 6], self.hours(loaded))
+	
+	def test_window_counts_for_the_cache(self):
+		with tempfile.TemporaryDirectory() as folder:
+			workbooks = cache.WorkbookCache(os.path.join(folder, 'cache'))
+			plain = dynamic.Canvas(self.module, 'dashboard', runtime.Env())
+			self.assertNotEqual(workbooks.digest(plain), workbooks.digest(self.canvas))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,89 @@
+import io, os, random, tempfile, unittest
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime, snapshot
+
+SOURCE = '''
+across :frame [
+	label :head 1
+	amount 'Amount'
+	_ :measure [
+		biggest price.max 'Biggest'
+	]
+]
+down :frame [
+	_ :tree :axis sku "[sku]"
+	total 'Total' @'sum([down=_])'
+]
+report :canvas across down [ ]
+'''
+
+class TopFour(runtime.Dimension):
+	top = 4
+
+class TestSnapshot(unittest.TestCase):
+	
+	def setUp(self):
+		self.module = compiler.compile_string(SOURCE)
+		self.env = runtime.Env(dims={'sku': TopFour()})
+		self.canvas = dynamic.Canvas(self.module, 'report', self.env)
+		rng = random.Random(1)
+		for i in range(300):
+			sku = 'sku-%d' % min(rng.randrange(30), rng.randrange(30))
+			self.canvas.incr({'sku': sku, 'across': 'amount'}, rng.choice([rng.randint(1, 9), rng.uniform(0, 1)]))
+			self.canvas.incr({'sku': sku}, rng.uniform(1, 50), measure='price')
+		handle, self.path = tempfile.mkstemp(suffix='.snap')
+		os.close(handle)
+		self.addCleanup(os.remove, self.path)
+		self.canvas.freeze(self.path)
+	
+	def attach(self, path=None):
+		shared = snapshot.attach(self.module, 'report', self.env, path or self.path)
+		self.addCleanup(shared.cell_data.close)
+		return shared
+	
+	@staticmethod
+	def plot(canvas):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+		workbook.close()
+		return [[cell.value for cell in row] for row in openpyxl.load_workbook(out).active.iter_rows()]
+	
+	def test_round_trip(self):
+		shared = self.attach()
+		self.assertEqual(self.plot(self.canvas), self.plot(shared))
+		self.assertEqual(len(self.canvas.cell_data), len(shared.cell_data))
+	
+	def test_census_comes_along(self):
+		original, shared = self.canvas.down.tree.children['_'].census, self.attach().down.tree.children['_'].census
+		self.assertEqual(original.state(), shared.state())
+		self.assertEqual((original.top, original.other, original.capacity), (shared.top, shared.other, shared.capacity))
+	
+	def test_read_only(self):
+		shared = self.attach()
+		skus = dict(shared.down.tree.children['_'].children)
+		new = {'sku': 'brand-new', 'across': 'amount'}
+		for write in (
+			lambda: shared.incr(new, 1),
+			lambda: shared.decr(new, 1),
+			lambda: shared.poke(new, 1),
+			lambda: shared.ingest_records([{'sku': 'brand-new', 'n': 1}], {'sku': 'sku'}, 'n'),
+			lambda: shared.apply(shared.batch()),
+		):
+			with self.assertRaisesRegex(TypeError, 'read-only'): write()
+		self.assertEqual(skus, shared.down.tree.children['_'].children)
+	
+	def test_census_section_is_required(self):
+		with open(self.path, 'rb') as fh: data = fh.read()
+		self.assertEqual(1, data.count(b'CENS'))
+		damaged = self.path + '.old'
+		with open(damaged, 'wb') as fh: fh.write(data.replace(b'CENS', b'SNEC'))
+		self.addCleanup(os.remove, damaged)
+		with self.assertRaises(snapshot.SnapshotError): self.attach(damaged)
+	
+	def test_wrong_file(self):
+		with open(self.path, 'r+b') as fh: fh.write(b'NOTASNAP')
+		with self.assertRaises(snapshot.SnapshotError): self.attach()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,58 @@
+import io, random, re, unittest, zipfile
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1 width=20
+	_ :tree :axis month
+]
+down :frame [
+	boxed 'Boxed' border=1
+	_ :tree :axis region
+]
+sheet :canvas across down [ ]
+'''
+
+class TestSparsePlot(unittest.TestCase):
+	
+	def setUp(self):
+		rng = random.Random(5)
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'sheet', runtime.Env())
+		for r in range(40):
+			self.canvas.incr({'region': 'R%02d' % r, 'month': 'M%02d' % rng.randrange(12)}, rng.randint(1, 9))
+		self.canvas.poke({'region': 'R00', 'month': 'M99'}, '=not a formula')
+	
+	def plot(self, **kwargs):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0, **kwargs)
+		workbook.close()
+		return out
+	
+	@staticmethod
+	def values(out):
+		return [[cell.value for cell in row] for row in openpyxl.load_workbook(out).active.iter_rows()]
+	
+	@staticmethod
+	def written(out):
+		with zipfile.ZipFile(out) as z: return z.read('xl/worksheets/sheet1.xml').decode('utf-8')
+	
+	def test_same_values(self):
+		dense, sparse = self.values(self.plot()), self.values(self.plot(sparse=True))
+		self.assertEqual(dense, sparse)
+	
+	def test_blank_cells_are_skipped_unless_they_show(self):
+		dense, sparse = self.written(self.plot()), self.written(self.plot(sparse=True))
+		self.assertLess(len(re.findall('<c ', sparse)), len(re.findall('<c ', dense)) / 3)
+		boxed = re.search(r'<row r="1".*?</row>', sparse).group()
+		self.assertEqual(14, len(re.findall('<c ', boxed))) # The bordered row shows, blank or not.
+	
+	def test_text_stays_text(self):
+		rows = self.values(self.plot(sparse=True))
+		self.assertIn('=not a formula', [value for row in rows for value in row])
+		sheet = openpyxl.load_workbook(self.plot(sparse=True)).active
+		self.assertEqual('s', [cell for row in sheet.iter_rows() for cell in row if cell.value == '=not a formula'][0].data_type)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,82 @@
+import datetime, io, random, threading, unittest
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime, storage
+
+SOURCE = '''
+regions :tree :axis region
+kinds :frame :axis kind [ base 'Base' ; change 'Change Orders' ]
+plain :canvas kinds regions [ ]
+'''
+
+def plotted(canvas):
+	out = io.BytesIO()
+	workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+	canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+	workbook.close()
+	return [[cell.value for cell in row] for row in openpyxl.load_workbook(out).active.iter_rows()]
+
+class TestSpillingCellStore(unittest.TestCase):
+	
+	def setUp(self):
+		self.module = compiler.compile_string(SOURCE)
+		self.store = storage.SpillingCellStore(memory_budget=10 * storage.SpillingCellStore.CELL_COST)
+		self.spilled = dynamic.Canvas(self.module, 'plain', runtime.Env(), cell_store=self.store)
+		self.plain = dynamic.Canvas(self.module, 'plain', runtime.Env())
+	
+	def tearDown(self):
+		self.store.close()
+	
+	def feed(self, count=500):
+		rng = random.Random(7)
+		for i in range(count):
+			point = {'region': 'R%03d' % rng.randrange(60), 'kind': rng.choice(['base', 'change'])}
+			for canvas in (self.spilled, self.plain):
+				if i % 7 == 0: canvas.decr(point, 2)
+				elif i % 11 == 0: canvas.poke(point, i)
+				else: canvas.incr(point, 3)
+	
+	def test_same_cells_as_a_dictionary(self):
+		self.feed()
+		self.assertEqual(len(self.plain.cell_data), len(self.store))
+		self.assertEqual(plotted(self.plain), plotted(self.spilled))
+	
+	def test_length_follows_deletions(self):
+		self.feed()
+		keys = list(self.store.keys())
+		count = len(self.store)
+		del self.store[keys[0]]
+		self.assertIn(keys[1], self.store)
+		self.store.pop(keys[1])
+		self.assertEqual(None, self.store.pop(keys[1], None))
+		self.assertEqual(count - 2, len(self.store))
+		self.assertEqual(count - 2, sum(1 for _ in self.store.items()))
+		with self.assertRaises(KeyError): del self.store[keys[0]]
+	
+	def test_values_beyond_numbers(self):
+		when = datetime.date(2024, 2, 29)
+		self.spilled.poke({'region': 'East', 'kind': 'base'}, when)
+		self.feed(100) # Enough to push it out to disk.
+		self.assertEqual(when, self.store.get(self.spilled.key_pair({'region': 'East', 'kind': 'base'})))
+	
+	def test_row_major_follows_the_plan(self):
+		self.feed()
+		plotted(self.spilled)
+		cells = list(self.store.items())
+		row_nodes = sorted({row for (col, row), value in cells}, key=lambda node: node.begin)
+		found = [(row.begin, col.begin) for (col, row), value in self.store.row_major(row_nodes)]
+		self.assertEqual(sorted(found), found)
+		self.assertEqual(len(cells), len(found))
+	
+	def test_other_threads_may_use_it(self):
+		errors = []
+		def work():
+			try: self.feed(200)
+			except Exception as e: errors.append(e)
+		worker = threading.Thread(target=work)
+		worker.start()
+		worker.join()
+		self.assertEqual([], errors)
+		self.assertEqual(plotted(self.plain), plotted(self.spilled))
+
+if __name__ == '__main__':
+	unittest.main()
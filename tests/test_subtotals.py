@@ -0,0 +1,55 @@
+import io, random, re, unittest
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1 width=20
+	q1 'Q1'
+	q2 'Q2'
+	all 'Year' @'[across=q1|q2]'
+]
+down :frame [
+	head 'Place' :gap
+	_ :tree :axis region :frame :axis line [
+		_ :tree :axis city "[city]"
+		subtotal "[region] Total" @'[line=_]' +bold
+	]
+	total 'Grand Total' @'=sum([down=_,line=_])' +bold
+]
+report :canvas across down [ ]
+'''
+
+class TestSubtotalReferences(unittest.TestCase):
+	
+	def setUp(self):
+		rng = random.Random(1)
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'report', runtime.Env())
+		for r in range(12):
+			for k in range(5):
+				for q in ('q1', 'q2'):
+					self.canvas.incr({'region': 'R%02d' % r, 'city': 'C%d' % k, 'across': q}, rng.randint(1, 100))
+	
+	def plot(self, data_only=False, **kwargs):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0, evaluate=True, **kwargs)
+		workbook.close()
+		return [[cell.value for cell in row] for row in openpyxl.load_workbook(out, data_only=data_only).active.iter_rows()]
+	
+	def grand_total(self, **kwargs):
+		return self.plot(**kwargs)[-1][1]
+	
+	def test_grand_total_refers_to_subtotals(self):
+		short, long = self.grand_total(), self.grand_total(subtotal_refs=False)
+		self.assertEqual(12, len(re.findall(r'[A-Z]+\d+', short))) # One per region's subtotal cell.
+		self.assertLess(len(short), len(long))
+		self.assertEqual(24, len(re.findall(r'[A-Z]+\d+', long))) # Both ends of every region's range.
+	
+	def test_same_values_either_way(self):
+		self.assertEqual(self.plot(True), self.plot(True, subtotal_refs=False))
+		values = self.plot(True)
+		self.assertEqual(sum(row[1] for row in values if row[0] and str(row[0]).endswith('Total') and row[0] != 'Grand Total'), values[-1][1])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,65 @@
+import io, random, unittest
+from unittest import mock
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+across :frame [
+	label :head 1 width=20
+	pl 'Plan'
+	ch 'Change'
+	fc 'Forecast' @'[across=pl|ch]'
+	share 'Share' @'[across=fc]/sum([across=fc,down=*,line=*])'
+]
+down :frame [
+	_ :tree :axis region :frame :axis line [
+		_ :tree :axis city "[city]"
+		subtotal "[region] Total" @'[line=_]'
+	]
+	total 'Grand Total' @'sum([down=_,line=_])'
+]
+report :canvas across down [ ]
+'''
+
+def interpreting_every_cell():
+	return mock.patch.object(dynamic.FormulaTemplate, 'shape_of', staticmethod(lambda formula, canvas: None))
+
+class TestFormulaTemplates(unittest.TestCase):
+	
+	def setUp(self):
+		rng = random.Random(3)
+		self.module = compiler.compile_string(SOURCE)
+		self.canvas = dynamic.Canvas(self.module, 'report', runtime.Env())
+		for r in range(4):
+			for k in range(6):
+				for kind in ('pl', 'ch'):
+					self.canvas.incr({'region': 'R%d' % r, 'city': 'C%d' % k, 'across': kind}, rng.randint(1, 50))
+	
+	def plot(self, **kwargs):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0, **kwargs)
+		workbook.close()
+		return [[cell.value for cell in row] for row in openpyxl.load_workbook(out).active.iter_rows()]
+	
+	def test_same_formulas_as_interpreting_each_cell(self):
+		for options in ({}, {'subtotal_refs': False}):
+			with self.subTest(**options):
+				templated = self.plot(**options)
+				with interpreting_every_cell(): interpreted = self.plot(**options)
+				self.assertEqual(interpreted, templated)
+	
+	def test_lockstep_formulas_follow_the_row(self):
+		rows = self.plot()
+		self.assertEqual('=sum(B1:C1)', rows[0][3])
+		self.assertEqual('=sum(B5:C5)', rows[4][3])
+	
+	def test_each_template_serves_many_cells(self):
+		with mock.patch.object(dynamic, 'FormulaTemplate', wraps=dynamic.FormulaTemplate) as spy:
+			rows = self.plot()
+		formulas = sum(1 for row in rows for value in row if isinstance(value, str) and value.startswith('='))
+		self.assertGreater(formulas, 50)
+		self.assertLess(spy.call_count, formulas / 4)
+
+if __name__ == '__main__':
+	unittest.main()
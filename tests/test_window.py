@@ -0,0 +1,60 @@
+import io, unittest
+import openpyxl, xlsxwriter
+from cubicle import compiler, dynamic, runtime
+
+SOURCE = '''
+kinds :frame [ label :head 1 ; opening 'Opening' ; change 'Change' ; closing 'Closing' @'[kinds=opening]+[kinds=change]' ]
+regions :frame [
+	_ :tree :axis region "[region]"
+	total 'Total' @'sum([regions=_])'
+]
+report :canvas kinds regions [ ]
+'''
+
+class TestWindow(unittest.TestCase):
+	
+	def setUp(self):
+		self.canvas = dynamic.Canvas(compiler.compile_string(SOURCE), 'report', runtime.Env())
+		for region, opening, change in [('North', 10, 1), ('South', 20, -2), ('East', 30, 3)]:
+			self.canvas.incr({'region': region, 'kinds': 'opening'}, opening)
+			self.canvas.incr({'region': region, 'kinds': 'change'}, change)
+	
+	def plot(self):
+		out = io.BytesIO()
+		workbook = xlsxwriter.Workbook(out, {'in_memory': True})
+		self.canvas.plot(workbook, workbook.add_worksheet(), 0, 0)
+		workbook.close()
+		return [list(row) for row in openpyxl.load_workbook(out).active.iter_rows(values_only=True)]
+	
+	@staticmethod
+	def values(window):
+		return [[value for value, style in line] for line in window.cells]
+	
+	def test_whole_canvas_matches_the_plot(self):
+		window = self.canvas.render_window(range(0, 100))
+		self.assertEqual(range(0, 4), window.rows)
+		self.assertEqual(range(0, 4), window.columns)
+		self.assertEqual(self.plot(), self.values(window))
+	
+	def test_block(self):
+		whole = self.values(self.canvas.render_window(range(0, 5)))
+		block = self.canvas.render_window(range(1, 3), range(1, 3))
+		self.assertEqual([line[1:3] for line in whole[1:3]], self.values(block))
+		self.assertEqual(2, len(block.heights))
+		self.assertEqual(2, len(block.widths))
+	
+	def test_evaluate(self):
+		window = self.canvas.render_window(range(0, 5), evaluate=True)
+		rows = {line[0]: line[1:] for line in self.values(window)}
+		self.assertEqual([30, 3, 33], rows['East'])
+		self.assertEqual([60, 2, 62], rows['Total'])
+	
+	def test_new_data_spoil_the_plan(self):
+		before = self.canvas.render_window(range(0, 100))
+		self.canvas.incr({'region': 'West', 'kinds': 'opening'}, 5)
+		after = self.canvas.render_window(range(0, 100))
+		self.assertEqual(len(before.rows) + 1, len(after.rows))
+		self.assertIn('West', [line[0] for line in self.values(after)])
+
+if __name__ == '__main__':
+	unittest.main()